@@ -11,9 +11,28 @@ from app.models import (
     TaskStatus, VideoGenerationRequest, VideoGenerationResponse,
     FinalizeShortRequest, FinalizeShortResponse, ImageAnalysisRequest, ImageAnalysisResponse,
     ScenarioGenerationRequest, ScenarioGenerationResponse, SaveScenarioRequest, SaveScenarioResponse,
-    TestAudioRequest, TestAudioResponse
+    TestAudioRequest, TestAudioResponse, SnapshotReextractRequest, PlatformMemoOverrideRequest
 )
 from app.services.scraping_service import scraping_service
+from app.browser_pool import browser_pool
+from app.page_readiness import page_readiness
+from app.lazy_loading import lazy_loader
+from app.compact_dom import compact_dom
+from app.platform_detector import platform_detector
+from app.platform_memo import platform_memo
+from app.extractors.factory import ExtractorFactory
+from app.early_detection import early_detector
+from app.http_fetcher import http_fetcher, TIER_HTTP, TIER_BROWSER
+from app.resource_blocking import resource_blocker
+from app.asset_cache import asset_cache
+from app.domain_scheduler import domain_scheduler
+from app.snapshot_archive import snapshot_archive
+from app.response_capture import response_capture
+from app.task_deadline import task_deadlines
+from app.storage_state_store import storage_state_store
+from app.proxy_pool import proxy_pool
+from app.fetch_hedging import fetch_hedger
+from app.retry_policy import retry_policy
 from app.services.video_generation_service import video_generation_service
 from app.services.merging_service import merging_service
 from app.services.image_analysis_service import image_analysis_service
@@ -44,7 +63,7 @@ def scrape_product(
     """
     Scrape product information from a URL
     
-    This endpoint accepts a URL and starts scraping asynchronously using threads.
+    This endpoint accepts a URL and submits scraping to the async browser engine.
     Returns immediately with a task ID for polling.
     
     Authentication: Optional API key via Bearer token
@@ -82,7 +101,7 @@ def scrape_product(
         
         logger.info(f"Credit check passed for user {request.user_id}. Can perform scraping action.")
         
-        # Start scraping using threads (no need for background tasks with threading)
+        # Submit scraping to the browser engine loop (no need for background tasks)
         response = scraping_service.start_scraping_task(
             url=str(request.url),
             user_id=request.user_id,
@@ -221,6 +240,24 @@ def get_stats():
                 'by_status': {}
             },
             'security': security_stats,
+            'browser_pool': browser_pool.get_stats(),
+            'page_readiness': page_readiness.get_stats(),
+            'lazy_loading': lazy_loader.get_stats(),
+            'compact_dom': compact_dom.get_stats(),
+            'fetch_tiers': http_fetcher.get_stats(),
+            'resource_blocking': resource_blocker.get_stats(),
+            'asset_cache': asset_cache.get_stats(),
+            'domain_scheduler': domain_scheduler.get_stats(),
+            'snapshot_archive': snapshot_archive.get_stats(),
+            'api_capture': response_capture.get_stats(),
+            'task_deadlines': task_deadlines.get_stats(),
+            'storage_state': storage_state_store.get_stats(),
+            'proxy_pool': proxy_pool.get_stats(),
+            'fetch_hedging': fetch_hedger.get_stats(),
+            'retry_policy': retry_policy.get_stats(),
+            'platform_detection': platform_detector.get_stats(),
+            'platform_memo': platform_memo.get_stats(),
+            'early_detection': early_detector.get_stats(),
             'timestamp': datetime.now().isoformat()
         }
         
@@ -252,11 +289,14 @@ def cancel_task(task_id: str):
         if task_info['status'] not in [TaskStatus.PENDING, TaskStatus.RUNNING]:
             raise HTTPException(status_code=400, detail="Cannot cancel completed or failed task")
         
-        # Update task status to cancelled
-        scraping_service._update_task_status(task_id, TaskStatus.FAILED, "Task cancelled by user")
+        # Interrupt the running pipeline (releasing its browser slot) and mark the task cancelled
+        if not scraping_service.cancel_task(task_id):
+            raise HTTPException(status_code=409, detail="Task is already saving its result and can no longer be cancelled")
         
         return {"message": f"Task {task_id} cancelled successfully"}
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error cancelling task {task_id}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to cancel task: {str(e)}")
@@ -279,6 +319,123 @@ def cleanup_tasks():
 
 
 
+# ============================================================================
+# Snapshot Archive Endpoints
+# ============================================================================
+
+@router.get("/snapshots")
+def list_snapshots(url: Optional[str] = None, platform: Optional[str] = None, limit: int = 100):
+    """
+    List archived page snapshots, newest first
+    """
+    try:
+        snapshots = snapshot_archive.find(url=url, platform=platform, limit=limit)
+        return {
+            "snapshots": [
+                {
+                    "snapshot_id": s.snapshot_id,
+                    "url": s.url,
+                    "platform": s.platform,
+                    "fetch_tier": s.fetch_tier,
+                    "fetched_at": datetime.fromtimestamp(s.fetched_at, timezone.utc).isoformat(),
+                    "size": s.size,
+                    "stored_size": s.stored_size,
+                }
+                for s in snapshots
+            ],
+            "count": len(snapshots)
+        }
+    except Exception as e:
+        logger.error(f"Error listing snapshots: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to list snapshots: {str(e)}")
+
+
+@router.post("/snapshots/reextract")
+def reextract_snapshots(request: SnapshotReextractRequest):
+    """
+    Re-run the extractors over archived snapshots without fetching anything
+    """
+    try:
+        snapshots = snapshot_archive.find(
+            url=request.url,
+            platform=request.platform,
+            since=request.since.timestamp() if request.since else None,
+            latest_only=request.latest_only,
+            limit=request.limit
+        )
+        results = snapshot_archive.reextract(snapshots, workers=request.workers)
+        failed = [r for r in results if r['error']]
+        return {
+            "count": len(results),
+            "succeeded": len(results) - len(failed),
+            "failed": len(failed),
+            "results": results if request.include_products else failed
+        }
+    except Exception as e:
+        logger.error(f"Error re-extracting snapshots: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to re-extract snapshots: {str(e)}")
+
+
+# ============================================================================
+# Platform Memo Endpoints
+# ============================================================================
+
+@router.get("/platform-memo")
+def list_platform_memo(domain: Optional[str] = None, platform: Optional[str] = None, limit: int = 100):
+    """
+    List remembered domain platforms, most recently verified first
+    """
+    try:
+        entries = platform_memo.list_entries(domain=domain, platform=platform, limit=limit)
+        return {
+            "entries": [
+                {
+                    **entry.to_dict(),
+                    "verified_at": datetime.fromtimestamp(entry.verified_at, timezone.utc).isoformat(),
+                    "stale": entry.is_stale(),
+                }
+                for entry in entries
+            ],
+            "count": len(entries)
+        }
+    except Exception as e:
+        logger.error(f"Error listing platform memo: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to list platform memo: {str(e)}")
+
+
+@router.put("/platform-memo/{domain}")
+def override_platform_memo(domain: str, request: PlatformMemoOverrideRequest):
+    """
+    Pin the platform of a domain; detections no longer replace it
+    """
+    if request.fetch_tier not in (None, TIER_HTTP, TIER_BROWSER):
+        raise HTTPException(status_code=400, detail=f"fetch_tier must be '{TIER_HTTP}' or '{TIER_BROWSER}'")
+    if not ExtractorFactory.is_platform_supported(request.platform):
+        raise HTTPException(status_code=400, detail=f"platform must be one of: {', '.join(ExtractorFactory.get_supported_platforms())}")
+    try:
+        entry = platform_memo.override(domain, request.platform.lower(), request.fetch_tier)
+        return {"message": f"Platform of {entry.domain} set to {entry.platform}", "entry": entry.to_dict()}
+    except Exception as e:
+        logger.error(f"Error overriding platform memo for {domain}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to override platform memo: {str(e)}")
+
+
+@router.delete("/platform-memo/{domain}")
+def delete_platform_memo(domain: str):
+    """
+    Forget the platform of a domain so the next scrape detects it again
+    """
+    try:
+        if not platform_memo.forget(domain):
+            raise HTTPException(status_code=404, detail=f"No platform remembered for {domain}")
+        return {"message": f"Platform memo for {domain} removed"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error deleting platform memo for {domain}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to delete platform memo: {str(e)}")
+
+
 # ============================================================================
 # Video Generation Endpoints
 # ============================================================================
@@ -0,0 +1,305 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional, Dict, Any
+from app.config import settings
+from app.logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Only render-critical static bundles are worth caching - everything else goes to the network
+CACHEABLE_RESOURCE_TYPES = frozenset({'script', 'stylesheet'})
+
+# Response headers replayed on a cache hit (the body is stored decoded, so no content-encoding)
+REPLAYED_HEADERS = ('content-type', 'access-control-allow-origin', 'timing-allow-origin', 'cache-control')
+
+MAX_AGE_RE = re.compile(r'(?:s-)?max-age=(\d+)')
+
+# Seconds between index writes while the cache is changing
+INDEX_SAVE_INTERVAL = 30
+
+
+@dataclass
+class AssetEntry:
+    """Cached response for one URL; the body lives in the blob store under its content hash"""
+    content_hash: str
+    size: int
+    headers: Dict[str, str]
+    expires_at: float
+
+
+class AssetCache:
+    """
+    Persistent, size-bounded cache for script and stylesheet responses.
+
+    Hooked into every page with page.route, so all pooled browsers (of any engine)
+    share it and it survives browser relaunches and restarts. Bodies are stored
+    content-addressed (identical bundles served from different URLs are kept once)
+    and URLs are evicted least-recently-used once the store exceeds its size limit.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = Path(cache_dir or settings.ASSET_CACHE_DIR)
+        self.max_bytes = max_bytes or settings.ASSET_CACHE_MAX_SIZE_MB * 1024 * 1024
+        self.max_item_bytes = settings.ASSET_CACHE_MAX_ITEM_SIZE_MB * 1024 * 1024
+        self._entries: "OrderedDict[str, AssetEntry]" = OrderedDict()
+        self._blob_refs: Dict[str, int] = {}
+        self._blob_sizes: Dict[str, int] = {}
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+        self.bytes_fetched = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self._blob_sizes.values())
+
+    def _blob_path(self, content_hash: str) -> Path:
+        return self.cache_dir / 'blobs' / content_hash[:2] / content_hash
+
+    def _index_path(self) -> Path:
+        return self.cache_dir / 'index.json'
+
+    # ------------------------------------------------------------------
+    # Index persistence (blocking - run via asyncio.to_thread)
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        """Load the index from disk, dropping entries whose blob is missing"""
+        index_path = self._index_path()
+        if not index_path.exists():
+            return
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # Stored oldest-first, so the OrderedDict keeps LRU order
+            for url, raw_entry in data.get('entries', []):
+                entry = AssetEntry(**raw_entry)
+                if not self._blob_path(entry.content_hash).exists():
+                    continue
+                self._entries[url] = entry
+                self._blob_refs[entry.content_hash] = self._blob_refs.get(entry.content_hash, 0) + 1
+                self._blob_sizes[entry.content_hash] = entry.size
+            logger.info(f"Asset cache loaded {len(self._entries)} entries ({self.total_bytes / 1024 / 1024:.1f} MB)")
+        except Exception as e:
+            logger.warning(f"Failed to load asset cache index, starting empty: {e}")
+            self._entries.clear()
+            self._blob_refs.clear()
+            self._blob_sizes.clear()
+
+    def _save(self, snapshot: list):
+        """Atomically write an index snapshot to disk"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._index_path().with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'entries': snapshot}, f)
+            os.replace(tmp_path, self._index_path())
+        except Exception as e:
+            logger.warning(f"Failed to save asset cache index: {e}")
+
+    def _write_blob(self, content_hash: str, body: bytes):
+        path = self._blob_path(content_hash)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    def _delete_blob(self, content_hash: str):
+        try:
+            self._blob_path(content_hash).unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to delete cached asset {content_hash}: {e}")
+
+    def _read_blob(self, content_hash: str) -> bytes:
+        with open(self._blob_path(content_hash), 'rb') as f:
+            return f.read()
+
+    def _snapshot(self) -> list:
+        return [(url, asdict(entry)) for url, entry in self._entries.items()]
+
+    async def flush(self):
+        """Write the index to disk if it changed"""
+        if self._dirty:
+            self._dirty = False
+            self._last_save = time.time()
+            await asyncio.to_thread(self._save, self._snapshot())
+
+    async def _maybe_flush(self):
+        if self._dirty and time.time() - self._last_save >= INDEX_SAVE_INTERVAL:
+            await self.flush()
+
+    # ------------------------------------------------------------------
+    # Cache operations
+    # ------------------------------------------------------------------
+
+    def _ttl(self, headers: Dict[str, str]) -> Optional[float]:
+        """
+        Work out how long a response may be reused
+
+        Returns:
+            TTL in seconds, or None if the response must not be stored
+        """
+        cache_control = headers.get('cache-control', '').lower()
+        if 'no-store' in cache_control or 'private' in cache_control:
+            return None
+        match = MAX_AGE_RE.search(cache_control)
+        if match:
+            max_age = int(match.group(1))
+            return max_age if max_age > 0 else None
+        return settings.ASSET_CACHE_DEFAULT_TTL
+
+    def _release_entry(self, entry: AssetEntry):
+        refs = self._blob_refs.get(entry.content_hash, 0) - 1
+        if refs <= 0:
+            self._blob_refs.pop(entry.content_hash, None)
+            self._blob_sizes.pop(entry.content_hash, None)
+            self._delete_blob(entry.content_hash)
+        else:
+            self._blob_refs[entry.content_hash] = refs
+
+    def _evict(self):
+        """Drop least recently used URLs until the store fits its size limit"""
+        total = self.total_bytes
+        while self._entries and total > self.max_bytes:
+            _, entry = self._entries.popitem(last=False)
+            before = len(self._blob_sizes)
+            self._release_entry(entry)
+            if len(self._blob_sizes) < before:
+                total -= entry.size
+            self.evictions += 1
+
+    async def _store(self, url: str, headers: Dict[str, str], body: bytes, ttl: float):
+        content_hash = hashlib.sha256(body).hexdigest()
+        await asyncio.to_thread(self._write_blob, content_hash, body)
+
+        previous = self._entries.pop(url, None)
+        self._blob_refs[content_hash] = self._blob_refs.get(content_hash, 0) + 1
+        self._blob_sizes[content_hash] = len(body)
+        if previous:
+            self._release_entry(previous)
+
+        self._entries[url] = AssetEntry(
+            content_hash=content_hash,
+            size=len(body),
+            headers={name: headers[name] for name in REPLAYED_HEADERS if name in headers},
+            expires_at=time.time() + ttl,
+        )
+        self.stores += 1
+        self._evict()
+        self._dirty = True
+
+    async def handle_route(self, route):
+        """
+        Serve a script/stylesheet request from the cache, or fetch and store it
+
+        Args:
+            route: Playwright route (requests of other types are passed through)
+        """
+        request = route.request
+        if request.resource_type not in CACHEABLE_RESOURCE_TYPES or request.method != 'GET':
+            await route.continue_()
+            return
+
+        url = request.url
+        entry = self._entries.get(url)
+        if entry and entry.expires_at > time.time():
+            try:
+                body = await asyncio.to_thread(self._read_blob, entry.content_hash)
+                self._entries.move_to_end(url)
+                self.hits += 1
+                self.bytes_saved += entry.size
+                await route.fulfill(status=200, headers=entry.headers, body=body)
+                return
+            except FileNotFoundError:
+                self._entries.pop(url, None)
+                self._release_entry(entry)
+
+        self.misses += 1
+        response = await route.fetch()
+        body = await response.body()
+        self.bytes_fetched += len(body)
+
+        headers = response.headers
+        ttl = self._ttl(headers) if response.status == 200 else None
+        if ttl and len(body) <= self.max_item_bytes:
+            try:
+                await self._store(url, headers, body, ttl)
+            except Exception as e:
+                logger.warning(f"Failed to cache asset {url}: {e}")
+        await route.fulfill(response=response, body=body)
+        await self._maybe_flush()
+
+    async def _ensure_loaded(self):
+        """Load the index once; pages attaching while it loads wait for the same load"""
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if not self._loaded:
+                await asyncio.to_thread(self._load)
+                self._loaded = True
+
+    async def attach(self, page):
+        """
+        Install the cache route on a page. Must be attached before any route that
+        falls back to it (Playwright runs the most recently added route first).
+
+        Args:
+            page: Playwright page object
+        """
+        if not settings.ASSET_CACHE_ENABLED:
+            return
+        await self._ensure_loaded()
+
+        async def handle_route(route):
+            try:
+                await self.handle_route(route)
+            except Exception as e:
+                logger.debug(f"Asset cache passthrough for {route.request.url}: {e}")
+                try:
+                    await route.continue_()
+                except Exception:
+                    pass
+
+        await page.route("**/*", handle_route)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit-rate and size statistics"""
+        lookups = self.hits + self.misses
+        return {
+            'enabled': settings.ASSET_CACHE_ENABLED,
+            'entries': len(self._entries),
+            'blobs': len(self._blob_sizes),
+            'size_bytes': self.total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            'bytes_saved': self.bytes_saved,
+            'bytes_fetched': self.bytes_fetched,
+            'stores': self.stores,
+            'evictions': self.evictions,
+        }
+
+
+# Global asset cache instance
+asset_cache = AssetCache()
@@ -0,0 +1,128 @@
+import html
+from typing import Optional, Dict, Any, List
+from playwright.async_api import Page
+from app.logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Collects what an extractor reads instead of serialising the whole DOM: head metadata
+# (title, meta tags, canonical link, JSON-LD), inline scripts carrying the given markers
+# and the outerHTML of the product containers. Each container is wrapped in empty
+# copies of its ancestors so descendant selectors (e.g. "div#x > ul > li") still match.
+# Returns null when no container matched (captcha/challenge pages, layout changes).
+COMPACT_DOM_JS = """
+(cfg) => {
+    const matched = new Set();
+    for (const selector of cfg.selectors) {
+        try {
+            document.querySelectorAll(selector).forEach((el) => matched.add(el));
+        } catch (e) {}
+    }
+    // Drop elements nested in another match and keep document order
+    const roots = Array.from(matched)
+        .filter((el) => { for (let p = el.parentElement; p; p = p.parentElement) { if (matched.has(p)) return false; } return true; })
+        .sort((a, b) => (a.compareDocumentPosition(b) & Node.DOCUMENT_POSITION_FOLLOWING) ? -1 : 1);
+    if (!roots.length) {
+        return null;
+    }
+
+    const body = roots.map((el) => {
+        let node = el.cloneNode(true);
+        for (let p = el.parentElement; p && p !== document.body && p !== document.documentElement; p = p.parentElement) {
+            const shell = p.cloneNode(false);
+            shell.appendChild(node);
+            node = shell;
+        }
+        return node.outerHTML;
+    });
+    const scripts = Array.from(document.querySelectorAll('body script:not([src])'))
+        .filter((script) => !roots.some((root) => root.contains(script)))
+        .filter((script) => cfg.scriptMarkers.some((marker) => (script.textContent || '').includes(marker)))
+        .map((script) => script.outerHTML);
+
+    const head = Array.from(document.querySelectorAll(
+        'title, meta[name], meta[property], meta[itemprop], link[rel="canonical"], script[type="application/ld+json"]'
+    ))
+        .filter((el) => !roots.some((root) => root.contains(el)))
+        .map((el) => el.outerHTML);
+
+    return { lang: document.documentElement.lang || '', head: head.join(''), body: body.concat(scripts).join('') };
+}
+"""
+
+
+class CompactDom:
+    """
+    Builds a compact HTML document of the parts of a page an extractor reads.
+
+    page.content() serialises the whole DOM (1-3 MB on Amazon) across the CDP pipe
+    and every later stage parses all of it. For platforms whose extractor declares
+    compact_selectors, only the head metadata, JSON-LD, marked inline scripts and
+    the product containers are collected in the page and rendered as a small HTML
+    document, so extractors read it exactly like the full page.
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    async def capture(self, page: Page, platform: Optional[str] = None) -> Optional[str]:
+        """
+        Collect the compact document of a page
+
+        Args:
+            page: Playwright page object
+            platform: Platform name used to pick the extractor's selectors
+
+        Returns:
+            Compact HTML, or None if the platform has no compact selectors or none of them
+            matched (the caller falls back to page.content())
+        """
+        from app.extractors.factory import ExtractorFactory
+        extractor_class = ExtractorFactory.get_extractor_class(platform)
+        selectors: List[str] = extractor_class.compact_selectors
+        if not selectors:
+            return None
+
+        key = platform or 'generic'
+        try:
+            payload = await page.evaluate(COMPACT_DOM_JS, {
+                'selectors': selectors,
+                'scriptMarkers': extractor_class.compact_script_markers,
+            })
+        except Exception as e:
+            logger.warning(f"Compact DOM extraction failed, using the full page content: {e}")
+            payload = None
+
+        if not payload:
+            self._record(key, None)
+            return None
+
+        lang = f' lang="{html.escape(payload["lang"])}"' if payload.get('lang') else ''
+        content = f'<!DOCTYPE html><html{lang}><head>{payload["head"]}</head><body>{payload["body"]}</body></html>'
+        self._record(key, len(content))
+        return content
+
+    def _record(self, platform: str, size: Optional[int]):
+        entry = self.stats.setdefault(platform, {'compact': 0, 'fallbacks': 0, 'bytes': 0})
+        if size is None:
+            entry['fallbacks'] += 1
+        else:
+            entry['compact'] += 1
+            entry['bytes'] += size
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-platform compact capture counts and average document size"""
+        return {
+            platform: {
+                'compact': entry['compact'],
+                'fallbacks': entry['fallbacks'],
+                'avg_kb': round(entry['bytes'] / entry['compact'] / 1024, 1) if entry['compact'] else None,
+            }
+            for platform, entry in self.stats.items()
+        }
+
+
+# Global compact DOM instance
+compact_dom = CompactDom()
@@ -27,47 +27,57 @@ class Settings:
     # Available browsers: "chrome", "firefox", "safari"
     DEFAULT_BROWSER: str = "chrome"
     
+    # Marketplace domains by platform (subdomains match too), shared by URL platform
+    # detection, security domain validation and browser engine routing (app/domain_registry.py)
+    MARKETPLACE_DOMAINS: Dict[str, List[str]] = {
+        "amazon": [
+            "amazon.com", "amazon.co.uk", "amazon.de", "amazon.fr", "amazon.it", "amazon.es",
+            "amazon.nl", "amazon.ca", "amazon.com.au", "amazon.co.jp", "amazon.in",
+        ],
+        "ebay": [
+            "ebay.com", "ebay.co.uk", "ebay.de", "ebay.fr", "ebay.it", "ebay.es",
+            "ebay.ca", "ebay.nl", "ebay.com.au",
+        ],
+        "otto": ["otto.de"],
+        "bol": ["bol.com"],
+        "jd": ["jd.com"],
+        "cdiscount": ["cdiscount.com"],
+        "shopify": ["myshopify.com"],
+        "bigcommerce": ["bigcommerce.com"],
+        "squarespace": ["squarespace.com"],
+    }
+    # More marketplace domains without code changes: "domain=platform[:browser]", comma-separated
+    MARKETPLACE_EXTRA_DOMAINS: List[str] = [d.strip() for d in os.getenv("MARKETPLACE_EXTRA_DOMAINS", "").split(",") if d.strip()]
+    
     # Platform-specific browser selection
-    # Format: {"platform_domain": "browser_name"}
+    # Format: {"platform": "browser_name"}; other platforms use DEFAULT_BROWSER
     PLATFORM_BROWSERS: Dict[str, str] = {
-        # Amazon platforms - use Chrome for better compatibility
-        "amazon.com": "chrome",
-        "amazon.co.uk": "chrome", 
-        "amazon.de": "chrome",
-        "amazon.fr": "chrome",
-        "amazon.it": "chrome",
-        "amazon.es": "chrome",
-        "amazon.nl": "chrome",
-        "amazon.ca": "chrome",
-        "amazon.com.au": "chrome",
-        "amazon.co.jp": "chrome",
-        "amazon.in": "chrome",
+        # Amazon - use Chrome for better compatibility
+        "amazon": "chrome",
         
-        # eBay platforms - use Firefox for better stealth
-        "ebay.com": "firefox",
-        "ebay.co.uk": "firefox",
-        "ebay.de": "firefox", 
-        "ebay.fr": "firefox",
-        "ebay.it": "firefox",
-        "ebay.es": "firefox",
-        "ebay.ca": "firefox",
-        "ebay.nl": "firefox",
-        "ebay.com.au": "firefox",
+        # eBay - use Firefox for better stealth
+        "ebay": "firefox",
         
         # JD.com - use Chrome for better performance
-        "jd.com": "chrome",
-        "global.jd.com": "chrome",
+        "jd": "chrome",
         
-        # European platforms - use Firefox for better compatibility
-        "otto.de": "firefox",
-        "bol.com": "chrome",
-        "cdiscount.com": "firefox",
+        # European platforms
+        "otto": "firefox",
+        "bol": "chrome",
+        "cdiscount": "firefox",
         
         # Bigcommerce and Squarespace - use Chrome for better compatibility
-        "bigcommerce.com": "chrome",
-        "squarespace.com": "chrome",
+        "bigcommerce": "chrome",
+        "squarespace": "chrome",
     }
     
+    # Browser Memory Settings
+    BROWSER_RENDERER_MAX_HEAP_MB: int = int(os.getenv("BROWSER_RENDERER_MAX_HEAP_MB", "1024"))  # V8 heap limit per Chromium renderer
+    BROWSER_MEMORY_WATCHDOG_ENABLED: bool = os.getenv("BROWSER_MEMORY_WATCHDOG_ENABLED", "True").lower() == "true"  # Sample browser RSS (needs psutil)
+    BROWSER_MAX_RSS_MB: int = int(os.getenv("BROWSER_MAX_RSS_MB", "2048"))  # Recycle a browser whose process tree exceeds this
+    BROWSER_MAX_RENDERER_RSS_MB: int = int(os.getenv("BROWSER_MAX_RENDERER_RSS_MB", "1024"))  # Recycle a browser with a renderer above this
+    BROWSER_KILL_ORPHANS: bool = os.getenv("BROWSER_KILL_ORPHANS", "True").lower() == "true"  # Kill browser processes left behind by failed cleanups
+    
     # Browser-specific configurations
     BROWSER_CONFIGS: Dict[str, Dict] = {
         "chrome": {
@@ -114,7 +124,7 @@ class Settings:
                 '--lang=en-US,en',
                 '--accept-lang=en-US,en;q=0.9',
                 '--memory-pressure-off',
-                '--max_old_space_size=4096',
+                f'--js-flags=--max-old-space-size={BROWSER_RENDERER_MAX_HEAP_MB}',
                 '--disable-background-networking',
                 '--disable-background-timer-throttling',
                 '--disable-client-side-phishing-detection',
@@ -201,7 +211,7 @@ class Settings:
                 '--lang=en-US,en',
                 '--accept-lang=en-US,en;q=0.9',
                 '--memory-pressure-off',
-                '--max_old_space_size=4096',
+                f'--js-flags=--max-old-space-size={BROWSER_RENDERER_MAX_HEAP_MB}',
                 '--disable-background-networking',
                 '--disable-background-timer-throttling',
                 '--disable-client-side-phishing-detection',
@@ -239,6 +249,15 @@ class Settings:
     DECODO_ENDPOINT: str = os.getenv("DECODO_ENDPOINT", "")
     DECODO_PROXY_TYPE: str = os.getenv("DECODO_PROXY_TYPE", "http")  # http, https, socks5
     DECODO_ENABLED: bool = os.getenv("DECODO_ENABLED", "False").lower() == "true"
+    DECODO_STICKY_SESSIONS: int = int(os.getenv("DECODO_STICKY_SESSIONS", "0"))  # Sticky Decodo sessions scored as separate proxies (0 = rotating endpoint)
+    DECODO_SESSION_USERNAME_FORMAT: str = os.getenv("DECODO_SESSION_USERNAME_FORMAT", "user-{username}-session-{session}")  # Username carrying the session ID
+    
+    # Proxy Pool Settings (health scoring, circuit breaking, sticky sessions)
+    PROXY_STICKY_TTL: int = int(os.getenv("PROXY_STICKY_TTL", "1800"))  # Seconds a domain keeps its proxy (0 disables)
+    PROXY_CIRCUIT_FAILURES: int = int(os.getenv("PROXY_CIRCUIT_FAILURES", "3"))  # Consecutive failures before a proxy is ejected
+    PROXY_CIRCUIT_COOLDOWN: int = int(os.getenv("PROXY_CIRCUIT_COOLDOWN", "60"))  # First ejection in seconds, doubled per repeat
+    PROXY_CIRCUIT_MAX_COOLDOWN: int = int(os.getenv("PROXY_CIRCUIT_MAX_COOLDOWN", "1800"))  # Longest ejection in seconds
+    PROXY_LATENCY_REFERENCE: float = float(os.getenv("PROXY_LATENCY_REFERENCE", "5.0"))  # Fetch seconds that halve a proxy's score
     
     # User Agent Settings
     ROTATE_USER_AGENTS: bool = os.getenv("ROTATE_USER_AGENTS", "True").lower() == "true"
@@ -254,20 +273,119 @@ class Settings:
     BROWSER_DOM_LOAD_TIMEOUT: int = int(os.getenv("BROWSER_DOM_LOAD_TIMEOUT", "10000"))
     BROWSER_ADDITIONAL_WAIT: int = int(os.getenv("BROWSER_ADDITIONAL_WAIT", "2000"))
     BROWSER_MAX_RETRIES: int = int(os.getenv("BROWSER_MAX_RETRIES", "2"))
+    RETRY_BACKOFF_BASE: float = float(os.getenv("RETRY_BACKOFF_BASE", "1.0"))  # Backoff of the first retry in seconds (full jitter)
+    RETRY_BACKOFF_MAX: float = float(os.getenv("RETRY_BACKOFF_MAX", "20.0"))  # Longest backoff in seconds
+    RETRY_HOPELESS_TTL: int = int(os.getenv("RETRY_HOPELESS_TTL", "3600"))  # Seconds a URL that gave up with 404/DNS fails fast (0 disables)
     BROWSER_PAGE_COMPLETION_TIMEOUT: int = int(os.getenv("BROWSER_PAGE_COMPLETION_TIMEOUT", "15000"))
+    BROWSER_READY_QUIET_MS: int = int(os.getenv("BROWSER_READY_QUIET_MS", "500"))  # DOM quiet time once product data is present
+    BROWSER_READY_FALLBACK_QUIET_MS: int = int(os.getenv("BROWSER_READY_FALLBACK_QUIET_MS", "1500"))  # DOM quiet time when no data signal matches
+    BROWSER_READY_POLL_INTERVAL: int = int(os.getenv("BROWSER_READY_POLL_INTERVAL", "100"))  # Readiness predicate polling interval (ms)
     
     # Browser Operation Timeouts (new settings to prevent blocking)
     BROWSER_SCROLL_TIMEOUT: int = int(os.getenv("BROWSER_SCROLL_TIMEOUT", "5000"))  # 5 seconds per scroll
     BROWSER_SCROLL_WAIT_TIMEOUT: int = int(os.getenv("BROWSER_SCROLL_WAIT_TIMEOUT", "2000"))  # 2 seconds wait after scroll
     BROWSER_CLEANUP_TIMEOUT: int = int(os.getenv("BROWSER_CLEANUP_TIMEOUT", "10000"))  # 10 seconds for cleanup
     BROWSER_PAGE_FETCH_TIMEOUT: int = int(os.getenv("BROWSER_PAGE_FETCH_TIMEOUT", "120000"))  # 2 minutes for page fetch
+    SCRAPE_TASK_TIMEOUT: int = int(os.getenv("SCRAPE_TASK_TIMEOUT", "240"))  # Seconds for a whole scraping task (fetch, captcha, extraction, save)
     BROWSER_ENABLE_SCROLLING: bool = os.getenv("BROWSER_ENABLE_SCROLLING", "True").lower() == "true"  # Enable/disable scrolling
+    BROWSER_SCROLL_MODE: str = os.getenv("BROWSER_SCROLL_MODE", "targeted").lower()  # "targeted" (review anchors only) or "full" (five-stop scroll)
+    BROWSER_COMPACT_DOM: bool = os.getenv("BROWSER_COMPACT_DOM", "False").lower() == "true"  # Collect only the extractor's containers/metadata in the page instead of page.content()
+    
+    # Browser Pool Settings
+    BROWSER_POOL_MIN_SIZE: int = int(os.getenv("BROWSER_POOL_MIN_SIZE", "1"))  # Warm browsers kept alive
+    BROWSER_POOL_MAX_SIZE: int = int(os.getenv("BROWSER_POOL_MAX_SIZE", "4"))  # Upper bound on browser processes
+    BROWSER_POOL_MAX_PAGES_PER_BROWSER: int = int(os.getenv("BROWSER_POOL_MAX_PAGES_PER_BROWSER", "50"))  # Recycle after this many contexts
+    BROWSER_POOL_IDLE_TIMEOUT: int = int(os.getenv("BROWSER_POOL_IDLE_TIMEOUT", "300"))  # Seconds before an extra idle browser is retired
+    BROWSER_POOL_WARM_ENGINES: List[str] = [e.strip().lower() for e in os.getenv("BROWSER_POOL_WARM_ENGINES", "").split(",") if e.strip()]  # Engines kept warm (default: DEFAULT_BROWSER + engines used by marketplace domains)
+    BROWSER_POOL_MAX_CONTEXTS_PER_BROWSER: int = int(os.getenv("BROWSER_POOL_MAX_CONTEXTS_PER_BROWSER", "16"))  # Concurrent contexts sharing one browser
+    BROWSER_ENGINE_MAX_CONCURRENT_TASKS: int = int(os.getenv("BROWSER_ENGINE_MAX_CONCURRENT_TASKS", "50"))  # Scrapes running at once on the engine loop
+    
+    # Fetch Hedging Settings (second attempt for fetches slower than the domain's usual latency)
+    HEDGE_ENABLED: bool = os.getenv("HEDGE_ENABLED", "False").lower() == "true"  # Opt-in
+    HEDGE_PERCENTILE: float = float(os.getenv("HEDGE_PERCENTILE", "0.9"))  # Domain latency percentile that triggers the hedge
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", "10"))  # Fetches of a domain needed before it is hedged
+    HEDGE_LATENCY_WINDOW: int = int(os.getenv("HEDGE_LATENCY_WINDOW", "50"))  # Recent fetch latencies kept per domain
+    HEDGE_MIN_DELAY: float = float(os.getenv("HEDGE_MIN_DELAY", "3.0"))  # Never hedge earlier than this (seconds)
+    HEDGE_MAX_RATE: float = float(os.getenv("HEDGE_MAX_RATE", "0.1"))  # Fraction of fetches that may be hedged
+    HEDGE_MAX_IN_FLIGHT: int = int(os.getenv("HEDGE_MAX_IN_FLIGHT", "4"))  # Hedged attempts running at once
+    HEDGE_MAX_WASTE_RATIO: float = float(os.getenv("HEDGE_MAX_WASTE_RATIO", "0.15"))  # Pause hedging while cancelled work exceeds this share of fetch time
+    
+    # Resource Blocking Settings
+    RESOURCE_BLOCK_TRACKERS: bool = os.getenv("RESOURCE_BLOCK_TRACKERS", "True").lower() == "true"  # Block analytics, ad and chat-widget hosts
+    RESOURCE_BLOCK_EXTRA_DOMAINS: List[str] = [d.strip().lower() for d in os.getenv("RESOURCE_BLOCK_EXTRA_DOMAINS", "").split(",") if d.strip()]
+    RESOURCE_ALLOW_DOMAINS: List[str] = [d.strip().lower() for d in os.getenv("RESOURCE_ALLOW_DOMAINS", "").split(",") if d.strip()]
+    
+    # Domain Scheduler Settings (politeness limits per retailer domain)
+    SCHEDULER_ENABLED: bool = os.getenv("SCHEDULER_ENABLED", "True").lower() == "true"
+    SCHEDULER_DEFAULT_CONCURRENCY: int = int(os.getenv("SCHEDULER_DEFAULT_CONCURRENCY", "4"))  # Simultaneous fetches per domain
+    SCHEDULER_DEFAULT_MIN_INTERVAL: float = float(os.getenv("SCHEDULER_DEFAULT_MIN_INTERVAL", "0.5"))  # Seconds between request starts
+    SCHEDULER_DEFAULT_RATE: float = float(os.getenv("SCHEDULER_DEFAULT_RATE", "1.0"))  # Token bucket refill, requests per second
+    SCHEDULER_DEFAULT_BURST: int = int(os.getenv("SCHEDULER_DEFAULT_BURST", "4"))  # Token bucket size
+    SCHEDULER_BLOCK_WINDOW: int = int(os.getenv("SCHEDULER_BLOCK_WINDOW", "20"))  # Recent outcomes used for the block rate
+    SCHEDULER_SLOWDOWN_BLOCK_RATE: float = float(os.getenv("SCHEDULER_SLOWDOWN_BLOCK_RATE", "0.2"))  # Captcha/403 rate that triggers a slowdown
+    SCHEDULER_MAX_SLOWDOWN: float = float(os.getenv("SCHEDULER_MAX_SLOWDOWN", "8"))  # Largest slowdown factor
+    
+    # Per-platform overrides of the scheduler defaults
+    # Format: {"platform": {"concurrency": int, "min_interval": seconds, "rate": per second, "burst": int}}
+    SCHEDULER_PLATFORM_LIMITS: Dict[str, Dict[str, float]] = {
+        "amazon": {"concurrency": 2, "min_interval": 1.5, "rate": 0.5, "burst": 2},
+        "ebay": {"concurrency": 3, "min_interval": 1.0, "rate": 0.75, "burst": 3},
+        "cdiscount": {"concurrency": 1, "min_interval": 3.0, "rate": 0.25, "burst": 1},
+        "otto": {"concurrency": 2, "min_interval": 1.0, "rate": 0.5, "burst": 2},
+        "bol": {"concurrency": 2, "min_interval": 1.0, "rate": 0.5, "burst": 2},
+        "jd": {"concurrency": 2, "min_interval": 1.0, "rate": 0.5, "burst": 2},
+    }
+    
+    # Static Asset Cache Settings
+    ASSET_CACHE_ENABLED: bool = os.getenv("ASSET_CACHE_ENABLED", "True").lower() == "true"  # Serve scripts/stylesheets from a shared disk cache
+    ASSET_CACHE_DIR: str = os.getenv("ASSET_CACHE_DIR", "cache/assets")
+    ASSET_CACHE_MAX_SIZE_MB: int = int(os.getenv("ASSET_CACHE_MAX_SIZE_MB", "512"))  # LRU eviction above this size
+    ASSET_CACHE_MAX_ITEM_SIZE_MB: int = int(os.getenv("ASSET_CACHE_MAX_ITEM_SIZE_MB", "10"))  # Larger responses are not stored
+    ASSET_CACHE_DEFAULT_TTL: int = int(os.getenv("ASSET_CACHE_DEFAULT_TTL", "86400"))  # Seconds, for responses without max-age
+    
+    # Snapshot Archive Settings (raw HTML kept for offline re-extraction)
+    SNAPSHOT_ARCHIVE_ENABLED: bool = os.getenv("SNAPSHOT_ARCHIVE_ENABLED", "True").lower() == "true"
+    SNAPSHOT_ARCHIVE_DIR: str = os.getenv("SNAPSHOT_ARCHIVE_DIR", "archive/snapshots")
+    SNAPSHOT_RETENTION_DAYS: int = int(os.getenv("SNAPSHOT_RETENTION_DAYS", "30"))
+    SNAPSHOT_MAX_SIZE_MB: int = int(os.getenv("SNAPSHOT_MAX_SIZE_MB", "2048"))  # Oldest snapshots are pruned above this size
+    SNAPSHOT_ZSTD_LEVEL: int = int(os.getenv("SNAPSHOT_ZSTD_LEVEL", "10"))  # zstd compression level of archived snapshots
+    SNAPSHOT_REEXTRACT_WORKERS: int = int(os.getenv("SNAPSHOT_REEXTRACT_WORKERS", "0"))  # Worker processes for re-extraction (0 = CPU count)
+    
+    # API Response Capture Settings (product JSON from XHR/fetch calls)
+    API_CAPTURE_ENABLED: bool = os.getenv("API_CAPTURE_ENABLED", "True").lower() == "true"
+    API_CAPTURE_MAX_RESPONSES: int = int(os.getenv("API_CAPTURE_MAX_RESPONSES", "20"))  # Per page
+    API_CAPTURE_MAX_BYTES: int = int(os.getenv("API_CAPTURE_MAX_BYTES", "2097152"))  # Larger responses are ignored
+    
+    # HTTP Fetch Tier Settings
+    HTTP_TIER_ENABLED: bool = os.getenv("HTTP_TIER_ENABLED", "True").lower() == "true"  # Try plain HTTP before the browser
+    HTTP_TIER_TIMEOUT: float = float(os.getenv("HTTP_TIER_TIMEOUT", "15"))  # Seconds per HTTP tier request
+    HTTP_TIER_FAILURE_THRESHOLD: int = int(os.getenv("HTTP_TIER_FAILURE_THRESHOLD", "2"))  # Consecutive failures before a domain goes browser-first
+    HTTP_TIER_REPROBE_INTERVAL: int = int(os.getenv("HTTP_TIER_REPROBE_INTERVAL", "20"))  # Browser scrapes before re-trying HTTP for a domain
+    HTTP_TIER_MIN_HTML_LENGTH: int = int(os.getenv("HTTP_TIER_MIN_HTML_LENGTH", "5000"))  # Smaller documents are treated as JS shells
+    HTTP_TIER_MAX_CLIENTS: int = int(os.getenv("HTTP_TIER_MAX_CLIENTS", "32"))  # Pooled clients (one per proxy) kept open, least recently used closed first
+    HTTP_TIER_REQUIRED_FIELDS: List[str] = [f.strip() for f in os.getenv("HTTP_TIER_REQUIRED_FIELDS", "title,price,images").split(",") if f.strip()]
+    
+    # Platform Memo Settings (learned domain -> platform table in Mongo with an LRU in front)
+    PLATFORM_MEMO_ENABLED: bool = os.getenv("PLATFORM_MEMO_ENABLED", "True").lower() == "true"  # Remembered domains skip HTML platform analysis
+    PLATFORM_MEMO_TTL: int = int(os.getenv("PLATFORM_MEMO_TTL", "604800"))  # Seconds before a remembered platform is re-verified from the HTML
+    PLATFORM_MEMO_MIN_CONFIDENCE: float = float(os.getenv("PLATFORM_MEMO_MIN_CONFIDENCE", "0.6"))  # Weaker detections are not remembered
+    PLATFORM_MEMO_LRU_SIZE: int = int(os.getenv("PLATFORM_MEMO_LRU_SIZE", "10000"))  # Domains kept in memory
+    
+    # Early Platform Detection (response headers and the first HTML chunk of the main document)
+    EARLY_DETECTION_ENABLED: bool = os.getenv("EARLY_DETECTION_ENABLED", "True").lower() == "true"  # Pick readiness/scroll/JSON endpoint before the page renders
+    EARLY_DETECTION_HEAD_BYTES: int = int(os.getenv("EARLY_DETECTION_HEAD_BYTES", "16384"))  # Start of the document searched for platform markers
+    EARLY_DETECTION_JSON_TIMEOUT: float = float(os.getenv("EARLY_DETECTION_JSON_TIMEOUT", "5"))  # Seconds for a platform product JSON endpoint
     
     # Stealth Settings
-    ENABLE_STEALTH_MODE: bool = os.getenv("ENABLE_STEALTH_MODE", "True").lower() == "true"
-    ENABLE_HUMAN_BEHAVIOR: bool = os.getenv("ENABLE_HUMAN_BEHAVIOR", "True").lower() == "true"
+    ENABLE_STEALTH_MODE: bool = os.getenv("ENABLE_STEALTH_MODE", "True").lower() == "true"  # Register the evasion init script on every context
+    ENABLE_HUMAN_BEHAVIOR: bool = os.getenv("ENABLE_HUMAN_BEHAVIOR", "False").lower() == "true"  # Simulate mouse/scroll input before reading the page
+    STEALTH_HUMAN_BUDGET_MS: int = int(os.getenv("STEALTH_HUMAN_BUDGET_MS", "800"))  # Hard time budget for the simulation
     ENABLE_FINGERPRINT_EVASION: bool = os.getenv("ENABLE_FINGERPRINT_EVASION", "True").lower() == "true"
     ENABLE_COOKIE_MANAGEMENT: bool = os.getenv("ENABLE_COOKIE_MANAGEMENT", "True").lower() == "true"
+    COOKIE_STORE_DIR: str = os.getenv("COOKIE_STORE_DIR", "cache/storage_state")  # Per-domain cookies/localStorage of past scrapes
+    COOKIE_STATE_MAX_AGE: int = int(os.getenv("COOKIE_STATE_MAX_AGE", "86400"))  # Seconds before a stored state is no longer pre-loaded
+    COOKIE_STATE_REFRESH_INTERVAL: int = int(os.getenv("COOKIE_STATE_REFRESH_INTERVAL", "3600"))  # Minimum seconds between saves of a domain's state
+    COOKIE_STORE_PER_PROXY: bool = os.getenv("COOKIE_STORE_PER_PROXY", "True").lower() == "true"  # Keep separate states per proxy exit
     STEALTH_DELAY_MIN: int = int(os.getenv("STEALTH_DELAY_MIN", "1000"))
     STEALTH_DELAY_MAX: int = int(os.getenv("STEALTH_DELAY_MAX", "3000"))
     
@@ -324,9 +442,8 @@ class Settings:
     @classmethod
     def get_browser_for_domain(cls, domain: str) -> str:
         """Get the appropriate browser for a given domain"""
-        # Remove www. prefix for matching
-        clean_domain = domain.replace("www.", "")
-        return cls.PLATFORM_BROWSERS.get(clean_domain, cls.DEFAULT_BROWSER)
+        from app.domain_registry import domain_registry
+        return domain_registry.engine_for(domain) or cls.DEFAULT_BROWSER
     
     @classmethod
     def get_browser_config(cls, browser_name: str) -> Dict:
@@ -0,0 +1,156 @@
+from dataclasses import dataclass
+from typing import Optional, Dict, List, Iterable, Iterator
+from urllib.parse import urlparse
+from app.config import settings
+from app.logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Display names used in detection indicators (other platforms are capitalised)
+PLATFORM_NAMES = {
+    'amazon': 'Amazon',
+    'ebay': 'eBay',
+    'otto': 'Otto',
+    'bol': 'Bol.com',
+    'jd': 'JD.com',
+    'cdiscount': 'CDiscount',
+    'shopify': 'Shopify',
+    'bigcommerce': 'Bigcommerce',
+    'squarespace': 'Squarespace',
+}
+
+
+def normalize_host(url: str) -> str:
+    """
+    Get the lowercase host of a URL or bare domain, without port, trailing dot or www.
+
+    Args:
+        url: URL, host or host:port
+    """
+    host = (urlparse(url if '//' in url else f'//{url}').hostname or '').rstrip('.')
+    return host[4:] if host.startswith('www.') else host
+
+
+def iter_suffixes(host: str) -> Iterator[str]:
+    """Yield a host and each of its parent domains, longest first ("a.b.com", "b.com", "com")"""
+    while host:
+        yield host
+        dot = host.find('.')
+        if dot == -1:
+            return
+        host = host[dot + 1:]
+
+
+def match_suffix(url: str, domains: Iterable[str]) -> Optional[str]:
+    """
+    Find the longest of the given domains that a URL's host is, or is a subdomain of
+
+    Args:
+        url: URL or host
+        domains: Registered domains (a set is fastest)
+
+    Returns:
+        The matching domain, or None
+    """
+    if not isinstance(domains, (set, frozenset, dict)):
+        domains = {normalize_host(domain) for domain in domains}
+    for suffix in iter_suffixes(normalize_host(url)):
+        if suffix in domains:
+            return suffix
+    return None
+
+
+@dataclass(frozen=True)
+class MarketplaceDomain:
+    """One registered marketplace domain (its subdomains belong to it too)"""
+    domain: str
+    platform: str
+    engine: Optional[str] = None
+
+    @property
+    def platform_name(self) -> str:
+        return PLATFORM_NAMES.get(self.platform, self.platform.capitalize())
+
+
+class DomainRegistry:
+    """
+    Registry of marketplace domains, built once at import.
+
+    Domains come from MARKETPLACE_DOMAINS (by platform) plus MARKETPLACE_EXTRA_DOMAINS
+    ("domain=platform[:browser]") and are keyed by their exact name, so resolving a
+    host is one dict probe per label (host, then each parent domain) with the
+    longest registered suffix winning. URL platform detection, allowed-domain
+    validation and browser engine routing all read this one table.
+    """
+
+    def __init__(self, domains: Optional[Dict[str, List[str]]] = None, extra: Optional[List[str]] = None,
+                 engines: Optional[Dict[str, str]] = None):
+        self.engines = engines if engines is not None else settings.PLATFORM_BROWSERS
+        self._entries: Dict[str, MarketplaceDomain] = {}
+        for platform, platform_domains in (domains if domains is not None else settings.MARKETPLACE_DOMAINS).items():
+            for domain in platform_domains:
+                self.register(domain, platform)
+        for spec in (extra if extra is not None else settings.MARKETPLACE_EXTRA_DOMAINS):
+            domain, _, target = spec.partition('=')
+            platform, _, engine = target.partition(':')
+            if not domain.strip() or not platform.strip():
+                logger.warning(f"Ignoring marketplace domain entry {spec!r}, expected domain=platform[:browser]")
+                continue
+            self.register(domain, platform.strip().lower(), engine.strip().lower() or None)
+
+    def register(self, domain: str, platform: str, engine: Optional[str] = None) -> MarketplaceDomain:
+        """
+        Add (or replace) a marketplace domain
+
+        Args:
+            domain: Domain; its subdomains match too
+            platform: Platform of the domain
+            engine: Browser engine for the domain (the platform's PLATFORM_BROWSERS entry if None)
+        """
+        entry = MarketplaceDomain(domain=normalize_host(domain), platform=platform, engine=engine or self.engines.get(platform))
+        self._entries[entry.domain] = entry
+        return entry
+
+    def lookup(self, url: str) -> Optional[MarketplaceDomain]:
+        """
+        Get the marketplace domain a URL belongs to
+
+        Args:
+            url: URL or host
+
+        Returns:
+            The entry of the longest registered suffix of the host, or None
+        """
+        for suffix in iter_suffixes(normalize_host(url)):
+            entry = self._entries.get(suffix)
+            if entry:
+                return entry
+        return None
+
+    def platform_for(self, url: str) -> Optional[str]:
+        """Get the platform of a URL's marketplace domain"""
+        entry = self.lookup(url)
+        return entry.platform if entry else None
+
+    def engine_for(self, url: str) -> Optional[str]:
+        """Get the browser engine configured for a URL's marketplace domain"""
+        entry = self.lookup(url)
+        return entry.engine if entry else None
+
+    def is_allowed(self, url: str) -> bool:
+        """Check if a URL belongs to a registered marketplace domain"""
+        return self.lookup(url) is not None
+
+    def domains(self, platform: Optional[str] = None) -> List[str]:
+        """List the registered domains (of one platform)"""
+        return [d for d, entry in self._entries.items() if platform is None or entry.platform == platform]
+
+    def used_engines(self) -> List[str]:
+        """List the browser engines some marketplace domain is routed to"""
+        return sorted({entry.engine for entry in self._entries.values() if entry.engine})
+
+
+# Global domain registry instance
+domain_registry = DomainRegistry()
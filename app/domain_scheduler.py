@@ -0,0 +1,258 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, Callable, Awaitable
+from urllib.parse import urlparse
+from app.config import settings
+from app.logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Waits shorter than this are not reported to the task's progress listener
+REPORTED_WAIT_SECONDS = 1.0
+
+# Called with (domain, expected wait in seconds) when the current task has to queue
+WaitListener = Callable[[str, float], Awaitable[None]]
+
+# Progress listener and accumulated queue wait of the scraping task in the current asyncio task
+_wait_listener: ContextVar[Optional[WaitListener]] = ContextVar('scheduler_wait_listener', default=None)
+_task_wait: ContextVar[Optional[Dict[str, float]]] = ContextVar('scheduler_task_wait', default=None)
+
+
+class DomainState:
+    """Limits, token bucket and block-rate history for one domain"""
+
+    def __init__(self, domain: str, limits: Dict[str, float]):
+        self.domain = domain
+        self.concurrency = max(1, int(limits['concurrency']))
+        self.min_interval = float(limits['min_interval'])
+        self.rate = float(limits['rate'])
+        self.burst = max(1.0, float(limits['burst']))
+        self.tokens = self.burst
+        self.last_refill = time.monotonic()
+        self.next_start = 0.0
+        # Start time of the latest reservation and how far it moved next_start
+        self.last_start = None
+        self.last_advance = 0.0
+        self.active = 0
+        self.queued = 0
+        self.available = asyncio.Condition()
+        # Slowdown factor applied to spacing, rate and concurrency while the site pushes back
+        self.penalty = 1.0
+        self.outcomes = deque(maxlen=settings.SCHEDULER_BLOCK_WINDOW)
+        self.requests = 0
+        self.blocked = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def effective_concurrency(self) -> int:
+        return max(1, int(self.concurrency / self.penalty))
+
+    @property
+    def block_rate(self) -> float:
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def reserve_start(self) -> float:
+        """
+        Reserve the next start time allowed by the token bucket and the minimum spacing
+
+        Returns:
+            Monotonic time at which the request may go out
+        """
+        now = time.monotonic()
+        rate = self.rate / self.penalty
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * rate)
+        self.last_refill = now
+        # Tokens may go negative: later callers queue up behind the debt
+        self.tokens -= 1
+        token_wait = -self.tokens / rate if self.tokens < 0 and rate > 0 else 0.0
+        start_at = max(now + token_wait, self.next_start)
+        next_start = start_at + self.min_interval * self.penalty
+        self.last_start = start_at
+        self.last_advance = next_start - self.next_start
+        self.next_start = next_start
+        return start_at
+
+    def refund_start(self, start_at: float):
+        """
+        Give back the token and the spacing of a reservation whose request never went out
+
+        Args:
+            start_at: Start time returned by reserve_start
+        """
+        self.tokens = min(self.burst, self.tokens + 1)
+        if start_at == self.last_start:
+            # Still the latest reservation: undo what it added to the queue
+            self.next_start -= self.last_advance
+            self.last_start = None
+        else:
+            # Reserved before others: shift the queue end back by one interval
+            self.next_start -= self.min_interval * self.penalty
+
+    def record(self, blocked: bool):
+        self.outcomes.append(1 if blocked else 0)
+        if blocked:
+            self.blocked += 1
+
+        previous = self.penalty
+        block_rate = self.block_rate
+        if blocked and block_rate >= settings.SCHEDULER_SLOWDOWN_BLOCK_RATE:
+            self.penalty = min(settings.SCHEDULER_MAX_SLOWDOWN, self.penalty * 2)
+        elif not blocked and block_rate < settings.SCHEDULER_SLOWDOWN_BLOCK_RATE / 2:
+            self.penalty = max(1.0, self.penalty * 0.8)
+
+        if self.penalty > previous:
+            logger.warning(f"Slowing down {self.domain} to 1/{self.penalty:g} speed (block rate {block_rate:.0%})")
+        elif previous > 1.0 and self.penalty == 1.0:
+            logger.info(f"{self.domain} back to full speed")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'active': self.active,
+            'queued': self.queued,
+            'requests': self.requests,
+            'blocked': self.blocked,
+            'block_rate': round(self.block_rate, 3),
+            'slowdown': self.penalty,
+            'concurrency': self.effective_concurrency,
+            'min_interval': round(self.min_interval * self.penalty, 2),
+            'rate_per_second': round(self.rate / self.penalty, 3),
+            'avg_wait_ms': round(self.total_wait / self.requests * 1000) if self.requests else 0,
+            'max_wait_ms': round(self.max_wait * 1000),
+        }
+
+
+class DomainScheduler:
+    """
+    Politeness scheduler in front of the HTTP and browser fetch layers.
+
+    Every outgoing page fetch takes a slot for its domain: a concurrency cap,
+    a minimum spacing between request starts and a token bucket, all configured
+    per platform (SCHEDULER_PLATFORM_LIMITS). Captcha and 403/429 outcomes are
+    reported back, and domains whose block rate climbs are slowed down until it
+    drops again. Must be used on the browser engine loop.
+    """
+
+    def __init__(self):
+        self._domains: Dict[str, DomainState] = {}
+
+    def _get_domain(self, url: str) -> str:
+        domain = (urlparse(url).hostname or '').lower()
+        return domain[4:] if domain.startswith('www.') else domain
+
+    def get_limits(self, platform: Optional[str] = None) -> Dict[str, float]:
+        """
+        Get the scheduling limits for a platform
+
+        Args:
+            platform: Platform name hint (None for the defaults)
+
+        Returns:
+            Dictionary with concurrency, min_interval, rate and burst
+        """
+        limits = {
+            'concurrency': settings.SCHEDULER_DEFAULT_CONCURRENCY,
+            'min_interval': settings.SCHEDULER_DEFAULT_MIN_INTERVAL,
+            'rate': settings.SCHEDULER_DEFAULT_RATE,
+            'burst': settings.SCHEDULER_DEFAULT_BURST,
+        }
+        limits.update(settings.SCHEDULER_PLATFORM_LIMITS.get((platform or '').lower(), {}))
+        return limits
+
+    def _get_state(self, domain: str, platform: Optional[str]) -> DomainState:
+        state = self._domains.get(domain)
+        if state is None:
+            state = DomainState(domain, self.get_limits(platform))
+            self._domains[domain] = state
+        return state
+
+    def set_wait_listener(self, listener: Optional[WaitListener]):
+        """Report long queue waits of the current task to a listener (e.g. task progress)"""
+        _wait_listener.set(listener)
+        _task_wait.set({})
+
+    def task_wait_ms(self) -> Dict[str, int]:
+        """Get the queue wait per domain accumulated by the current task"""
+        return {domain: round(wait * 1000) for domain, wait in (_task_wait.get() or {}).items()}
+
+    @asynccontextmanager
+    async def slot(self, url: str, platform: Optional[str] = None):
+        """
+        Wait for a fetch slot for the URL's domain and hold it for the duration of the block
+
+        Args:
+            url: URL about to be fetched
+            platform: Platform name hint used to pick limits
+        """
+        if not settings.SCHEDULER_ENABLED:
+            yield
+            return
+
+        domain = self._get_domain(url)
+        state = self._get_state(domain, platform)
+        listener = _wait_listener.get()
+        start_time = time.monotonic()
+
+        state.queued += 1
+        try:
+            if state.active >= state.effective_concurrency and listener:
+                await listener(domain, 0.0)
+            async with state.available:
+                await state.available.wait_for(lambda: state.active < state.effective_concurrency)
+                state.active += 1
+        finally:
+            state.queued -= 1
+
+        sent = False
+        start_at = state.reserve_start()
+        try:
+            delay = start_at - time.monotonic()
+            if delay > 0:
+                if listener and delay >= REPORTED_WAIT_SECONDS:
+                    await listener(domain, delay)
+                await asyncio.sleep(delay)
+
+            waited = time.monotonic() - start_time
+            state.requests += 1
+            state.total_wait += waited
+            state.max_wait = max(state.max_wait, waited)
+            task_wait = _task_wait.get()
+            if task_wait is not None:
+                task_wait[domain] = task_wait.get(domain, 0.0) + waited
+            sent = True
+            yield
+        finally:
+            # A task cancelled while waiting for its start time did not use its token
+            if not sent:
+                state.refund_start(start_at)
+            state.active -= 1
+            async with state.available:
+                state.available.notify_all()
+
+    def record_outcome(self, url: str, blocked: bool, platform: Optional[str] = None):
+        """
+        Report whether a fetch was blocked (captcha, 403/429, challenge page)
+
+        Args:
+            url: Fetched URL
+            blocked: True if the site pushed back
+            platform: Platform name hint used to pick limits
+        """
+        if settings.SCHEDULER_ENABLED:
+            self._get_state(self._get_domain(url), platform).record(blocked)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-domain queue and slowdown statistics"""
+        return {
+            'enabled': settings.SCHEDULER_ENABLED,
+            'domains': {domain: state.get_stats() for domain, state in self._domains.items()},
+        }
+
+
+# Global domain scheduler instance
+domain_scheduler = DomainScheduler()
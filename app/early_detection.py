@@ -0,0 +1,254 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Mapping
+from app.config import settings
+from app.response_capture import parse_json_body
+from app.domain_scheduler import domain_scheduler
+from app.task_deadline import current_deadline
+from app.logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# What the fetch does after early detection
+ACTION_RENDER = 'render'  # Nothing known early - render, wait and scroll as usual
+ACTION_TARGETED = 'targeted'  # Platform known - readiness and scrolling use its predicates/anchors
+ACTION_JSON = 'json_endpoint'  # Product JSON fetched from the platform endpoint - no readiness wait
+
+# Response headers that give a platform away: (header name, value fragment or None, platform).
+# A name ending in "*" matches a header name prefix. "wordpress" is not a platform of its
+# own; it turns into WooCommerce when the head of the document mentions it.
+HEADER_SIGNALS = [
+    ('x-shopid', None, 'shopify'),
+    ('x-shopify-stage', None, 'shopify'),
+    ('x-sorting-hat-shopid', None, 'shopify'),
+    ('powered-by', 'shopify', 'shopify'),
+    ('x-bc-*', None, 'bigcommerce'),
+    ('server', 'squarespace', 'squarespace'),
+    ('set-cookie', 'woocommerce', 'woocommerce'),
+    ('link', 'api.w.org', 'wordpress'),
+]
+
+# Markers in the first HTML chunk (<head> assets and inline config), lowercase
+HEAD_SIGNALS = {
+    'shopify': ['cdn.shopify.com', 'shopify.shop', 'myshopify.com', 'shopify-digital-wallet'],
+    'woocommerce': ['woocommerce', 'wc-blocks', 'wc_add_to_cart_params'],
+    'bigcommerce': ['cdn11.bigcommerce.com', 'bigcommerce', 'stencil-utils'],
+    'squarespace': ['static1.squarespace.com', 'squarespace.com', 'squarespace_context'],
+}
+
+HEADER_CONFIDENCE = 0.9
+HEAD_CONFIDENCE = 0.6  # Plus 0.1 per further marker, at most HEADER_CONFIDENCE
+
+
+@dataclass
+class EarlyDetection:
+    """Platform evidence available as soon as the main document arrives"""
+    platform: Optional[str] = None
+    confidence: float = 0.0
+    indicators: List[str] = field(default_factory=list)
+    json_url: Optional[str] = None
+    api_responses: List[Dict[str, Any]] = field(default_factory=list)
+    skip_scroll: bool = False
+
+    @property
+    def action(self) -> str:
+        if self.api_responses:
+            return ACTION_JSON
+        return ACTION_TARGETED if self.platform else ACTION_RENDER
+
+
+# Early detection of the current task's last page fetch
+_task_detection: ContextVar[Optional[EarlyDetection]] = ContextVar('early_detection', default=None)
+
+
+class EarlyDetector:
+    """
+    Decides the fetch strategy from the main document's response headers and the
+    first EARLY_DETECTION_HEAD_BYTES of its HTML, before the page is waited on,
+    scrolled and serialised.
+
+    Storefront platforms announce themselves in headers (x-shopid, x-bc-*, the
+    WordPress REST link) and in the asset URLs of the <head>. Once the platform is
+    known the readiness wait and lazy-load scrolling use its own predicates, and
+    for platforms whose extractor names a product JSON endpoint (Shopify's
+    /products/<handle>.js, the WooCommerce Store API) the JSON is fetched directly:
+    the product data is then in hand without waiting for the page to render it.
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def detect(self, url: str, headers: Mapping[str, str], head_html: str, platform_hint: Optional[str] = None) -> EarlyDetection:
+        """
+        Detect the platform from response headers and the start of the document
+
+        Args:
+            url: Page URL
+            headers: Response headers (names in any case)
+            head_html: First bytes of the document
+            platform_hint: Platform already known from the URL or the platform memo
+
+        Returns:
+            EarlyDetection (json_url is set when the platform has a product JSON endpoint)
+        """
+        headers = {name.lower(): str(value).lower() for name, value in headers.items()}
+        head = head_html[:settings.EARLY_DETECTION_HEAD_BYTES].lower()
+
+        header_hits: Dict[str, List[str]] = {}
+        for name, fragment, platform in HEADER_SIGNALS:
+            if name.endswith('*'):
+                matched = next((h for h in headers if h.startswith(name[:-1])), None)
+            else:
+                matched = name if name in headers and (fragment is None or fragment in headers[name]) else None
+            if matched:
+                header_hits.setdefault(platform, []).append(f"header {matched}")
+
+        head_hits = {
+            platform: [marker for marker in markers if marker in head]
+            for platform, markers in HEAD_SIGNALS.items()
+        }
+        # A WordPress site is a WooCommerce store when the document loads WooCommerce
+        wordpress = header_hits.pop('wordpress', None)
+        if wordpress and head_hits['woocommerce']:
+            header_hits.setdefault('woocommerce', []).extend(wordpress)
+
+        detection = EarlyDetection()
+        if platform_hint:
+            detection.platform, detection.confidence = platform_hint, 1.0
+            detection.indicators.append(f"Platform known before fetch: {platform_hint}")
+        else:
+            scores = {}
+            for platform in set(header_hits) | {p for p, hits in head_hits.items() if hits}:
+                hits = head_hits.get(platform, [])
+                score = HEADER_CONFIDENCE if platform in header_hits else 0.0
+                if hits:
+                    score = max(score, min(HEAD_CONFIDENCE + 0.1 * (len(hits) - 1), HEADER_CONFIDENCE))
+                    if platform in header_hits:
+                        score = min(score + 0.05, 1.0)
+                scores[platform] = score
+            if scores:
+                platform = max(scores, key=scores.get)
+                detection.platform, detection.confidence = platform, round(scores[platform], 2)
+                detection.indicators = [f"Early {signal}" for signal in header_hits.get(platform, [])] + \
+                                       [f"Early head marker: {marker}" for marker in head_hits.get(platform, [])]
+
+        if detection.platform:
+            from app.extractors.factory import ExtractorFactory
+            extractor_class = ExtractorFactory.get_extractor_class(detection.platform)
+            detection.json_url = extractor_class.get_product_json_url(url)
+        return detection
+
+    async def inspect_page(self, page, response, url: str, platform_hint: Optional[str] = None) -> EarlyDetection:
+        """
+        Run early detection on a browser navigation and fetch the product JSON through the
+        page's context (same cookies and proxy)
+
+        Args:
+            page: Playwright page that navigated to the URL
+            response: Main document response returned by page.goto
+            url: Page URL
+            platform_hint: Platform already known from the URL or the platform memo
+
+        Returns:
+            EarlyDetection (also available as current() for the rest of the task)
+        """
+        start_time = time.time()
+        try:
+            headers = await response.all_headers()
+            body = await response.body()
+            detection = self.detect(url, headers, body[:settings.EARLY_DETECTION_HEAD_BYTES].decode('utf-8', errors='replace'), platform_hint)
+        except Exception as e:
+            logger.warning(f"Early platform detection failed for {url}: {e}")
+            detection = EarlyDetection(platform=platform_hint, confidence=1.0 if platform_hint else 0.0)
+
+        if detection.json_url:
+            try:
+                # Same per-domain limits and task budget as the HTTP tier's JSON fetch
+                async with domain_scheduler.slot(detection.json_url, detection.platform):
+                    deadline = current_deadline()
+                    timeout_ms = settings.EARLY_DETECTION_JSON_TIMEOUT * 1000
+                    json_response = await page.request.get(detection.json_url, timeout=deadline.remaining_ms(timeout_ms) if deadline else timeout_ms)
+                    body = await json_response.body()
+                if json_response.ok:
+                    self._add_json(detection, parse_json_body(body))
+                else:
+                    logger.info(f"Product JSON endpoint answered {json_response.status} for {url}")
+            except Exception as e:
+                logger.info(f"Product JSON endpoint failed for {url}: {e}")
+
+        self._finish(detection, url, platform_hint, start_time)
+        return detection
+
+    async def inspect_http(self, url: str, headers: Mapping[str, str], html: str, platform_hint: Optional[str] = None,
+                           proxy: Optional[str] = None, user_agent: Optional[str] = None) -> EarlyDetection:
+        """
+        Run early detection on an HTTP tier response and fetch the product JSON over HTTP
+
+        Args:
+            url: Page URL
+            headers: Response headers
+            html: Document HTML (only the first EARLY_DETECTION_HEAD_BYTES are read)
+            platform_hint: Platform already known from the URL or the platform memo
+            proxy: Proxy of the page request
+            user_agent: User agent of the page request
+
+        Returns:
+            EarlyDetection
+        """
+        from app.http_fetcher import http_fetcher
+
+        start_time = time.time()
+        detection = self.detect(url, headers, html, platform_hint)
+        if detection.json_url:
+            try:
+                self._add_json(detection, await http_fetcher.fetch_json(detection.json_url, proxy, user_agent, detection.platform))
+            except Exception as e:
+                logger.info(f"Product JSON endpoint failed for {url}: {e}")
+
+        self._finish(detection, url, platform_hint, start_time)
+        return detection
+
+    def current(self) -> Optional[EarlyDetection]:
+        """Early detection of the current task's last page fetch"""
+        return _task_detection.get()
+
+    def _add_json(self, detection: EarlyDetection, data: Any):
+        """Hand the product JSON to the extractor; skip scrolling if it already carries the rating"""
+        if not data:
+            return
+        detection.api_responses.append({'url': detection.json_url, 'data': data})
+        from app.extractors.factory import ExtractorFactory
+        rating_keys = ExtractorFactory.get_extractor_class(detection.platform).api_field_keys['rating']
+        product = data[0] if isinstance(data, list) and len(data) == 1 else data
+        detection.skip_scroll = isinstance(product, dict) and any(product.get(key) for key in rating_keys)
+
+    def _finish(self, detection: EarlyDetection, url: str, platform_hint: Optional[str], start_time: float):
+        _task_detection.set(detection)
+        key = detection.platform or 'unknown'
+        entry = self.stats.setdefault(key, {'detected': 0, 'hinted': 0, ACTION_RENDER: 0, ACTION_TARGETED: 0, ACTION_JSON: 0, 'total_ms': 0})
+        entry['hinted' if platform_hint else 'detected'] += 1
+        entry[detection.action] += 1
+        entry['total_ms'] += int((time.time() - start_time) * 1000)
+        if detection.platform and not platform_hint:
+            logger.info(f"Platform detected early for {url}: {detection.platform} "
+                        f"(confidence: {detection.confidence:.2f}, action: {detection.action})")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-platform early detection counts and chosen actions"""
+        return {
+            'enabled': settings.EARLY_DETECTION_ENABLED,
+            'platforms': {
+                platform: {
+                    **{k: v for k, v in entry.items() if k != 'total_ms'},
+                    'avg_ms': round(entry['total_ms'] / (entry['detected'] + entry['hinted']), 1),
+                }
+                for platform, entry in self.stats.items()
+            },
+        }
+
+
+# Global early detector instance
+early_detector = EarlyDetector()
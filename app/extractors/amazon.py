@@ -11,6 +11,19 @@ logger = get_logger(__name__)
 class AmazonExtractor(BaseExtractor):
     """Amazon-specific extractor for product information"""
     
+    # Lazy-load hints used by the browser before extraction
+    lazy_load_anchors = ['#averageCustomerReviews', '#customerReviews', '#reviewsMedley']
+    lazy_load_targets = ['#acrCustomerReviewText', '#acrPopover .a-icon-alt']
+    
+    # Compact DOM hints: the product columns, spec tables and the colorImages script
+    compact_selectors = [
+        '#centerCol', '#leftCol', '#rightCol', '#corePrice_feature_div', '#averageCustomerReviews',
+        '#main-image-container', '#feature-bullets', '#productFactsDesktop_feature_div', '#prodDetails',
+        '#productDetails_feature_div', '#detailBullets_feature_div', '#technicalSpecifications_feature_div',
+        '#aplus', '#aplus_feature_div', 'table.aplus-tech-spec-table', 'table.prodDetTable',
+    ]
+    compact_script_markers = ['colorImages']
+    
     def extract_title(self) -> Optional[str]:
         """Extract product title from Amazon page"""
         title = self.find_element_text('#productTitle')
@@ -1,8 +1,8 @@
-from typing import Optional, List, Dict, Any, Tuple
-from bs4 import BeautifulSoup
+from typing import Optional, List, Dict, Any, Tuple, Union
 import re
 from urllib.parse import urlparse, parse_qs
 from app.models import ProductInfo
+from app.utils.parsed_document import ParsedDocument
 from app.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -11,17 +11,59 @@ logger = get_logger(__name__)
 class BaseExtractor:
     """Base class for extracting product information from HTML content"""
     
-    def __init__(self, html_content: str, url: str):
+    # Browser hints for lazy-loaded reviews/ratings: containers to scroll into view,
+    # elements whose presence means the data has loaded, and script sources that
+    # mean ratings are fetched from an API (so no scrolling is needed at all)
+    lazy_load_anchors: List[str] = []
+    lazy_load_targets: List[str] = []
+    lazy_load_skip_scripts: List[str] = []
+    
+    # Containers and inline script markers collected by the browser in compact DOM mode
+    # (BROWSER_COMPACT_DOM); extractors without them always get the full page content
+    compact_selectors: List[str] = []
+    compact_script_markers: List[str] = []
+    
+    # Regexes for XHR/fetch URLs whose JSON carries product data (captured by the browser
+    # and handed over as api_responses), plus the keys used to read the generic fields
+    api_response_patterns: List[str] = []
+    api_responses: List[Dict[str, Any]] = []
+    api_field_keys: Dict[str, List[str]] = {
+        'title': ['title', 'name', 'productName', 'product_name', 'productTitle'],
+        'price': ['price', 'salePrice', 'sellingPrice', 'currentPrice', 'finalPrice', 'price_amount'],
+        'currency': ['currency', 'currencyCode', 'currency_code', 'priceCurrency'],
+        'description': ['description', 'shortDescription', 'short_description', 'body_html'],
+        'images': ['images', 'imageUrls', 'image_urls', 'media', 'image'],
+        'rating': ['rating', 'averageRating', 'average_rating', 'ratingValue', 'averageScore'],
+        'review_count': ['reviewCount', 'review_count', 'ratingCount', 'numberOfReviews', 'totalReviews', 'reviews_count'],
+    }
+    
+    def __init__(self, html_content: Union[str, ParsedDocument], url: str):
         """
         Initialize extractor with HTML content
         
         Args:
-            html_content: Raw HTML content from the page
+            html_content: Raw HTML content from the page, or its ParsedDocument (parsed once
+                          and shared with the structured data helpers)
             url: Original URL that was scraped
         """
-        self.html_content = html_content
+        self.document = ParsedDocument.of(html_content, url)
+        self.html_content = self.document.html_content
         self.url = url
-        self.soup = BeautifulSoup(html_content, 'html.parser')
+        self.soup = self.document.soup
+    
+    @classmethod
+    def get_product_json_url(cls, url: str) -> Optional[str]:
+        """
+        URL of the platform's product JSON endpoint for a product page, fetched by early
+        detection instead of waiting for the page to render (override per platform)
+        
+        Args:
+            url: Product page URL
+            
+        Returns:
+            Endpoint URL matching api_response_patterns, or None if the platform has none
+        """
+        return None
     
     def _extract_image_size_from_url(self, image_url: str) -> Tuple[str, int]:
         """
@@ -146,14 +188,20 @@ class BaseExtractor:
         product_info = ProductInfo()
         
         try:
+            # Structured data captured from the storefront's own API calls wins;
+            # HTML selectors only fill the fields it does not cover
+            api_data = self.extract_from_api_responses() if self.api_responses else {}
+            if api_data:
+                logger.info(f"Using captured API data for: {', '.join(sorted(api_data))}")
+            
             # Extract basic information
-            product_info.title = self.extract_title()
-            product_info.price = self.extract_price()
-            product_info.currency = self.extract_currency()
-            product_info.description = self.extract_description()
-            product_info.images = self.extract_images()
-            product_info.rating = self.extract_rating()
-            product_info.review_count = self.extract_review_count()
+            product_info.title = api_data.get('title') or self.extract_title()
+            product_info.price = api_data.get('price') or self.extract_price()
+            product_info.currency = api_data.get('currency') or self.extract_currency()
+            product_info.description = api_data.get('description') or self.extract_description()
+            product_info.images = api_data.get('images') or self.extract_images()
+            product_info.rating = api_data.get('rating') or self.extract_rating()
+            product_info.review_count = api_data.get('review_count') or self.extract_review_count()
             product_info.specifications = self.extract_specifications()
             
             logger.info(f"Extracted product info: title='{product_info.title[:50] if product_info.title else 'None'}...', price={product_info.price}")
@@ -163,6 +211,90 @@ class BaseExtractor:
         
         return product_info
     
+    def extract_from_api_responses(self) -> Dict[str, Any]:
+        """
+        Read product fields from captured XHR/fetch JSON (override for platform-specific formats)
+        
+        Returns:
+            Dictionary with any of title, price, currency, description, images, rating, review_count
+        """
+        result: Dict[str, Any] = {}
+        for response in self.api_responses:
+            node = self._find_api_product_node(response.get('data'))
+            if node is None:
+                continue
+            for field, value in self._read_api_product_node(node).items():
+                if value and field not in result:
+                    result[field] = value
+        return result
+    
+    def _find_api_product_node(self, data: Any, depth: int = 0) -> Optional[Dict[str, Any]]:
+        """Find the first JSON object that has both a name-like and a price-like key"""
+        if depth > 6:
+            return None
+        if isinstance(data, dict):
+            keys = set(data)
+            if keys & set(self.api_field_keys['title']) and keys & set(self.api_field_keys['price']):
+                return data
+            children = data.values()
+        elif isinstance(data, list):
+            children = data[:20]
+        else:
+            return None
+        for child in children:
+            if isinstance(child, (dict, list)):
+                node = self._find_api_product_node(child, depth + 1)
+                if node is not None:
+                    return node
+        return None
+    
+    def _read_api_product_node(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a product-like JSON object onto ProductInfo fields"""
+        def first(field: str) -> Any:
+            for key in self.api_field_keys[field]:
+                if node.get(key) not in (None, '', [], {}):
+                    return node[key]
+            return None
+        
+        def number(value: Any) -> Optional[float]:
+            if isinstance(value, dict):
+                value = next((value[k] for k in ('value', 'amount', 'current', 'average', 'formatted') if k in value), None)
+            if isinstance(value, bool) or value is None:
+                return None
+            if isinstance(value, (int, float)):
+                return float(value)
+            from app.utils import parse_price_with_regional_format, parse_url_domain
+            return parse_price_with_regional_format(str(value), parse_url_domain(self.url) if self.url else None)
+        
+        price_value = first('price')
+        currency = first('currency')
+        if currency is None and isinstance(price_value, dict):
+            currency = price_value.get('currency') or price_value.get('currencyCode')
+        
+        images = first('images')
+        if isinstance(images, (str, dict)):
+            images = [images]
+        image_urls = []
+        for image in images or []:
+            if isinstance(image, dict):
+                image = image.get('url') or image.get('src') or image.get('href')
+            if isinstance(image, str) and image:
+                image_urls.append('https:' + image if image.startswith('//') else image)
+        
+        title = first('title')
+        description = first('description')
+        rating = number(first('rating'))
+        review_count = number(first('review_count'))
+        return {
+            'title': title.strip() if isinstance(title, str) else None,
+            'price': number(price_value),
+            'currency': currency if isinstance(currency, str) else None,
+            'description': re.sub(r'\s+', ' ', re.sub(r'<[^>]+>', ' ', description)).strip() if isinstance(description, str) else None,
+            'images': image_urls,
+            'rating': rating if rating is not None and 0 < rating <= 5 else None,
+            'review_count': int(review_count) if review_count else None,
+        }
+    
     def extract_title(self) -> Optional[str]:
         """Extract product title - to be implemented by subclasses"""
         raise NotImplementedError("Subclasses must implement extract_title")
@@ -430,7 +562,7 @@ class BaseExtractor:
             logger.warning(f"Error detecting captcha: {e}")
             return False
     
-    def solve_captcha(self, page=None) -> bool:
+    async def solve_captcha(self, page=None) -> bool:
         """
         Solve captcha by interacting with the browser
         
@@ -453,12 +585,12 @@ class BaseExtractor:
                 return False
             
             # Try to solve CDiscount specific captcha (altcha)
-            if self._solve_altcha_captcha(page):
+            if await self._solve_altcha_captcha(page):
                 logger.info("Successfully solved altcha captcha")
                 return True
             
             # Try to solve generic checkbox captcha
-            if self._solve_checkbox_captcha(page):
+            if await self._solve_checkbox_captcha(page):
                 logger.info("Successfully solved checkbox captcha")
                 return True
             
@@ -469,7 +601,7 @@ class BaseExtractor:
             logger.error(f"Error solving captcha: {e}")
             return False
     
-    def _solve_altcha_captcha(self, page) -> bool:
+    async def _solve_altcha_captcha(self, page) -> bool:
         """
         Solve altcha captcha specifically
         
@@ -481,22 +613,19 @@ class BaseExtractor:
         """
         try:
             # Wait for altcha widget to be present
-            page.wait_for_selector('altcha-widget', timeout=10000)
+            await page.wait_for_selector('altcha-widget', timeout=10000)
             
             # Find and click the checkbox
             checkbox_selector = '#altcha_checkbox'
-            page.wait_for_selector(checkbox_selector, timeout=10000)
+            await page.wait_for_selector(checkbox_selector, timeout=10000)
             
             # Click the checkbox
-            page.click(checkbox_selector)
+            await page.click(checkbox_selector)
             logger.info("Clicked altcha checkbox")
             
-            # Wait a moment for the click to register
-            page.wait_for_timeout(1000)
-            
             # Wait for captcha to be solved (state changes from unverified to verified)
             try:
-                page.wait_for_function(
+                await page.wait_for_function(
                     """
                     () => {
                         const widget = document.querySelector('altcha-widget');
@@ -509,64 +638,20 @@ class BaseExtractor:
                 )
                 logger.info("Altcha captcha verified successfully")
                 
-                # Wait for page to potentially reload or redirect after captcha verification
-                # Wait for network idle to ensure all requests are complete
-                try:
-                    page.wait_for_load_state('networkidle', timeout=15000)
-                except Exception:
-                    pass
-                
-                # Wait for DOM content to be ready
-                try:
-                    page.wait_for_load_state('domcontentloaded', timeout=10000)
-                except Exception:
-                    pass
-                
-                # Additional wait for JavaScript execution
-                page.wait_for_timeout(3000)
-                
-                # Wait for any potential page transitions
-                try:
-                    page.wait_for_function(
-                        """
-                        () => {
-                            return new Promise((resolve) => {
-                                setTimeout(() => {
-                                    // Check if page is stable and no loading indicators
-                                    const isStable = !document.querySelector('[style*="animation"]') && 
-                                                   !document.querySelector('[class*="loading"]') &&
-                                                   !document.querySelector('[class*="spinner"]') &&
-                                                   document.readyState === 'complete';
-                                    resolve(isStable);
-                                }, 2000);
-                            });
-                        }
-                        """,
-                        timeout=20000
-                    )
-                except Exception:
-                    pass
-                
+                # The caller waits for the resulting page with the adaptive readiness check
                 return True
                 
             except Exception as e:
                 logger.warning(f"Altcha verification timeout: {e}")
-                # Sometimes the state doesn't change immediately, wait a bit more
-                page.wait_for_timeout(5000)
-                
-                # Still try to wait for page stability
-                try:
-                    page.wait_for_load_state('networkidle', timeout=10000)
-                except Exception:
-                    pass
-                
+                # The state attribute sometimes never flips even though the page redirects;
+                # let the caller's readiness check decide
                 return True
             
         except Exception as e:
             logger.warning(f"Error solving altcha captcha: {e}")
             return False
     
-    def _solve_checkbox_captcha(self, page) -> bool:
+    async def _solve_checkbox_captcha(self, page) -> bool:
         """
         Solve generic checkbox captcha
         
@@ -591,12 +676,12 @@ class BaseExtractor:
             
             for selector in checkbox_selectors:
                 try:
-                    if page.locator(selector).count() > 0:
-                        page.click(selector)
+                    if await page.locator(selector).count() > 0:
+                        await page.click(selector)
                         logger.info(f"Clicked checkbox captcha: {selector}")
                         
                         # Wait a bit for the captcha to process
-                        page.wait_for_timeout(3000)
+                        await page.wait_for_timeout(3000)
                         return True
                 except Exception:
                     continue
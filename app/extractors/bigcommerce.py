@@ -1,5 +1,4 @@
 from typing import Optional, List, Dict, Any
-from bs4 import BeautifulSoup
 import re
 import json
 from app.extractors.base import BaseExtractor
@@ -20,12 +19,19 @@ logger = get_logger(__name__)
 class BigcommerceExtractor(BaseExtractor):
     """Extractor for Bigcommerce-based e-commerce sites"""
     
+    # Lazy-load hints used by the browser before extraction
+    lazy_load_anchors = ['.productView-rating', '#product-reviews', '[data-test-id="product-rating"]']
+    lazy_load_targets = ['.productView-rating .rating-value', '[data-test-id="product-rating"]']
+    
+    # Price/stock JSON requested by Stencil themes when the product options render
+    api_response_patterns = [r'/remote/v1/product-attributes/', r'/api/storefront/products']
+    
     def __init__(self, html_content: str, url: str):
         super().__init__(html_content, url)
         self.platform = "bigcommerce"
         
         # Try to extract data from structured data first
-        self.structured_data_extractor = StructuredDataExtractor(html_content, url)
+        self.structured_data_extractor = StructuredDataExtractor(self.document, url)
         self.product_data = self.structured_data_extractor.extract_structured_product_data()
         
         if self.product_data:
@@ -39,11 +45,11 @@ class BigcommerceExtractor(BaseExtractor):
     def _extract_bigcommerce_data(self) -> Optional[Dict[str, Any]]:
         """Extract Bigcommerce-specific data from the page"""
         try:
-            soup = BeautifulSoup(self.html_content, 'html.parser')
+            soup = self.soup
             bc_data = {}
             
             # Look for Bigcommerce script tags with product data
-            scripts = soup.find_all('script')
+            scripts = self.document.scripts
             for script in scripts:
                 if script.string and 'window.product_attributes' in script.string:
                     try:
@@ -94,6 +100,21 @@ class BigcommerceExtractor(BaseExtractor):
             logger.warning(f"Error extracting Bigcommerce data: {e}")
             return None
     
+    def extract_from_api_responses(self) -> Dict[str, Any]:
+        """Read the price from captured product-attributes responses"""
+        for response in self.api_responses:
+            data = response.get('data')
+            price = data.get('data', {}).get('price') if isinstance(data, dict) and isinstance(data.get('data'), dict) else None
+            if not isinstance(price, dict):
+                continue
+            amount = price.get('with_tax') or price.get('without_tax')
+            if isinstance(amount, dict) and amount.get('value') is not None:
+                result = {'price': float(amount['value'])}
+                if amount.get('currency'):
+                    result['currency'] = amount['currency']
+                return result
+        return super().extract_from_api_responses()
+    
     def extract_title(self) -> Optional[str]:
         """Extract product title from Bigcommerce page"""
         # Try structured data first
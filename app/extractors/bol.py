@@ -14,6 +14,13 @@ from app.logging_config import get_logger
 class BolExtractor(BaseExtractor):
     """Bol.com product information extractor"""
     
+    # Lazy-load hints used by the browser before extraction
+    lazy_load_anchors = ['.pdp-header__rating', '#reviews', '[data-test="reviews"]']
+    lazy_load_targets = ['[data-test="rating"]', '.star-rating-experiment']
+    
+    # Product/offer JSON loaded by the product page
+    api_response_patterns = [r'bol\.com/[^?]*/api/[^?]*(?:product|offer|price)']
+    
     def extract_title(self) -> Optional[str]:
         """Extract product title"""
         title_selectors = [
@@ -16,6 +16,10 @@ from app.logging_config import get_logger
 class CDiscountExtractor(BaseExtractor):
     """CDiscount.com product information extractor"""
     
+    # Lazy-load hints used by the browser before extraction
+    lazy_load_anchors = ['.c-stars-rating', '#reviews', '#avis']
+    lazy_load_targets = ['span.c-stars-rating__label', 'span.c-stars-rating__text']
+    
     def extract_title(self) -> Optional[str]:
         """Extract product title"""
         title_selectors = [
@@ -19,6 +19,16 @@ from app.logging_config import get_logger
 class EbayExtractor(BaseExtractor):
     """eBay product information extractor"""
     
+    # Lazy-load hints used by the browser before extraction
+    lazy_load_anchors = ['div.ux-summary', '#rwid', '.fdbk-detail-list']
+    lazy_load_targets = ['div.ux-summary span.ux-summary__count span.ux-textspans']
+    
+    # Compact DOM hints: title, price, description iframe, image carousel, ratings and item specifics
+    compact_selectors = [
+        'h1.x-item-title__mainTitle', '.x-price-primary', 'iframe#desc_ifr', 'div.x-item-description-child',
+        'div.ux-image-carousel', '.ux-image', 'div.ux-summary', 'dl.ux-labels-values',
+    ]
+    
     def _extract_description_from_html(self, html_content: str) -> tuple[str, str]:
         """
         Extract description text and HTML from HTML content
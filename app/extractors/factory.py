@@ -1,5 +1,7 @@
-from typing import Optional
+import re
+from typing import Optional, Type, List, Dict, Any, Union
 from app.extractors.base import BaseExtractor
+from app.utils.parsed_document import ParsedDocument
 from app.extractors.generic import GenericExtractor
 from app.extractors.amazon import AmazonExtractor
 from app.extractors.shopify import ShopifyExtractor
@@ -34,28 +36,66 @@ class ExtractorFactory:
     }
     
     @classmethod
-    def create_extractor(cls, platform: Optional[str], html_content: str, url: str) -> BaseExtractor:
+    def create_extractor(cls, platform: Optional[str], html_content: Union[str, ParsedDocument], url: str, api_responses: Optional[List[Dict[str, Any]]] = None) -> BaseExtractor:
         """
         Create appropriate extractor based on detected platform
         
         Args:
             platform: Detected platform name
-            html_content: Raw HTML content from the page
+            html_content: Raw HTML content from the page, or its ParsedDocument; the extractor
+                          and its structured data helpers share one parse of it
             url: Original URL that was scraped
+            api_responses: Product JSON captured from the page's XHR/fetch calls
             
         Returns:
             BaseExtractor instance
         """
+        document = ParsedDocument.of(html_content, url)
         if platform and platform.lower() in cls._platform_extractors:
             extractor_class = cls._platform_extractors[platform.lower()]
-            extractor = extractor_class(html_content, url)
+            extractor = extractor_class(document, url)
             logger.info(f"Created {extractor_class.__name__} for platform: {platform}")
-            return extractor
         else:
             # Use generic extractor for unsupported platforms
-            extractor = GenericExtractor(html_content, url)
+            extractor = GenericExtractor(document, url)
             logger.info(f"Created GenericExtractor for platform: {platform or 'unknown'}")
-            return extractor
+        
+        # Only hand over responses this extractor knows how to read
+        if api_responses and extractor.api_response_patterns:
+            own_patterns = re.compile('|'.join(f'(?:{p})' for p in extractor.api_response_patterns), re.IGNORECASE)
+            extractor.api_responses = [r for r in api_responses if own_patterns.search(r.get('url', ''))]
+        return extractor
+    
+    @classmethod
+    def get_api_response_patterns(cls, platform: Optional[str]) -> List[str]:
+        """
+        Get the XHR/fetch URL patterns to capture for a platform
+        
+        Args:
+            platform: Platform name (None when the platform is not known before the page loads)
+            
+        Returns:
+            The platform extractor's patterns, or those of every extractor for unknown platforms
+        """
+        if platform and platform.lower() in cls._platform_extractors:
+            return cls._platform_extractors[platform.lower()].api_response_patterns
+        patterns: List[str] = []
+        for extractor_class in cls._platform_extractors.values():
+            patterns.extend(p for p in extractor_class.api_response_patterns if p not in patterns)
+        return patterns
+    
+    @classmethod
+    def get_extractor_class(cls, platform: Optional[str]) -> Type[BaseExtractor]:
+        """
+        Get the extractor class for a platform without instantiating it
+        
+        Args:
+            platform: Platform name
+            
+        Returns:
+            Extractor class (GenericExtractor for unsupported platforms)
+        """
+        return cls._platform_extractors.get((platform or '').lower(), GenericExtractor)
     
     @classmethod
     def get_supported_platforms(cls) -> list:
@@ -9,6 +9,10 @@ logger = get_logger(__name__)
 class GenericExtractor(BaseExtractor):
     """Generic extractor for unsupported platforms"""
     
+    # Lazy-load hints used by the browser before extraction
+    lazy_load_anchors = ['#reviews', '[id*="review"]', '[class*="review"]']
+    lazy_load_targets = ['[itemprop="ratingValue"]', '[data-rating]', '.star-rating']
+    
     def extract_title(self) -> Optional[str]:
         """Extract product title using common selectors"""
         common_selectors = [
@@ -1,3 +1,4 @@
+import re
 from typing import Optional, List, Dict, Any
 from app.extractors.base import BaseExtractor
 from app.models import ProductInfo
@@ -11,6 +12,33 @@ from app.logging_config import get_logger
 class JDExtractor(BaseExtractor):
     """JD.com product information extractor"""
     
+    # Lazy-load hints used by the browser before extraction
+    lazy_load_anchors = ['#comment', '#detail', '.comment-item']
+    lazy_load_targets = ['.comment-count', '.comment-item .comment-star']
+    
+    # Prices are loaded separately from the price service
+    api_response_patterns = [r'p\.3\.cn/prices/', r'/prices/mgets']
+    
+    def extract_from_api_responses(self) -> Dict[str, Any]:
+        """Read the price from captured price service responses ([{"id": "J_123", "p": "99.00"}])"""
+        # The price service also answers for recommended SKUs - only trust this page's SKU
+        sku_match = re.search(r'/(\d+)\.html', self.url or '')
+        if not sku_match:
+            return {}
+        sku_id = f"J_{sku_match.group(1)}"
+        for response in self.api_responses:
+            data = response.get('data')
+            entries = data if isinstance(data, list) else [data]
+            for entry in entries:
+                if isinstance(entry, dict) and entry.get('id') == sku_id and entry.get('p'):
+                    try:
+                        price = float(entry['p'])
+                    except (TypeError, ValueError):
+                        continue
+                    if price > 0:
+                        return {'price': price, 'currency': 'CNY'}
+        return {}
+    
     def extract_title(self) -> Optional[str]:
         """Extract product title"""
         return self.find_element_text('.sku-name')
@@ -14,6 +14,13 @@ from app.logging_config import get_logger
 class OttoExtractor(BaseExtractor):
     """Otto.de product information extractor"""
     
+    # Lazy-load hints used by the browser before extraction
+    lazy_load_anchors = ['.js_pdp_cr-rating', '#reviews', '.pdp_cr-rating']
+    lazy_load_targets = ['.js_pdp_cr-rating-score', '.pdp_cr-rating-score']
+    
+    # Product/variation JSON loaded by the product page
+    api_response_patterns = [r'otto\.de/[^?]*api/[^?]*(?:product|variation|price)']
+    
     def extract_title(self) -> Optional[str]:
         """Extract product title"""
         title_selectors = [
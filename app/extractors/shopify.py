@@ -3,7 +3,6 @@ import re
 import json
 import requests
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
 from app.extractors.base import BaseExtractor
 from app.utils import (
     map_currency_symbol_to_code, 
@@ -21,6 +20,21 @@ logger = get_logger(__name__)
 class ShopifyExtractor(BaseExtractor):
     """Shopify-specific extractor for product information"""
     
+    # Lazy-load hints used by the browser before extraction
+    lazy_load_anchors = ['#shopify-product-reviews', '.jdgm-widget', '.spr-container', '.stamped-main-widget', '.okeReviews']
+    lazy_load_targets = ['.spr-badge[data-rating]', '.jdgm-prev-badge[data-average-rating]', '[data-review-rating]', '[data-rating]']
+    lazy_load_skip_scripts = ['yotpo', 'trustpilot']
+    
+    # Product JSON fetched by themes (the .js endpoint reports prices in cents)
+    api_response_patterns = [r'/products/[^/?#]+\.js(?:\?|$)', r'/products/[^/?#]+\.json(?:\?|$)']
+    
+    @classmethod
+    def get_product_json_url(cls, url: str) -> Optional[str]:
+        """Product .js endpoint of the handle in the URL (also under /collections/... and locale prefixes)"""
+        parsed = urlparse(url)
+        match = re.search(r'/products/([^/?#.]+)', parsed.path)
+        return f"{parsed.scheme}://{parsed.netloc}/products/{match.group(1)}.js" if match else None
+    
     def __init__(self, html_content: str, url: str):
         """
         Initialize extractor with HTML content and extract all data from structured JSON
@@ -32,7 +46,7 @@ class ShopifyExtractor(BaseExtractor):
         super().__init__(html_content, url)
         
         # Use the structured data utility to extract product data
-        self.structured_data_extractor = StructuredDataExtractor(html_content, url)
+        self.structured_data_extractor = StructuredDataExtractor(self.document, url)
         self.product_data = self.structured_data_extractor.extract_structured_product_data()
         
         if self.product_data:
@@ -137,16 +151,14 @@ class ShopifyExtractor(BaseExtractor):
             Product data dictionary or None if no data found
         """
         try:
-            soup = BeautifulSoup(self.html_content, 'html.parser')
             all_product_data = []
             self.fallback_sources = []  # Track which sources were used
             
             # Method 1: Look for Shopify's ProductJson script tags (most reliable)
-            product_json_scripts = soup.find_all('script', id=re.compile(r'(ProductJson-.*|WH-ProductJson-.*)'))
-            for script in product_json_scripts:
-                if script.string:
+            for block in self.document.product_json_blocks:
+                if block:
                     try:
-                        data = json.loads(script.string)
+                        data = json.loads(block)
                         if isinstance(data, dict) and ('title' in data or 'variants' in data):
                             all_product_data.append(('ProductJson', data))
                             self.fallback_sources.append('ProductJson')
@@ -156,12 +168,11 @@ class ShopifyExtractor(BaseExtractor):
                         continue
             
             # Method 2: Look for other Shopify-specific script patterns
-            shopify_scripts = soup.find_all('script', string=re.compile(r'window\.Shopify\s*=\s*'))
-            for script in shopify_scripts:
-                if script.string:
+            for script_text in self.document.scripts_matching(r'window\.Shopify\s*=\s*'):
+                if script_text:
                     try:
                         # Extract the JSON part from window.Shopify = {...}
-                        match = re.search(r'window\.Shopify\s*=\s*({.*?});', script.string, re.DOTALL)
+                        match = re.search(r'window\.Shopify\s*=\s*({.*?});', script_text, re.DOTALL)
                         if match:
                             data = json.loads(match.group(1))
                             if isinstance(data, dict) and ('product' in data or 'currentProduct' in data):
@@ -175,7 +186,7 @@ class ShopifyExtractor(BaseExtractor):
                         continue
             
             # Method 3: Look for meta tags with product information
-            meta_product_data = self._extract_product_data_from_meta_tags(soup)
+            meta_product_data = self._extract_product_data_from_meta_tags()
             if meta_product_data:
                 all_product_data.append(('MetaTags', meta_product_data))
                 self.fallback_sources.append('MetaTags')
@@ -192,13 +203,10 @@ class ShopifyExtractor(BaseExtractor):
             logger.warning(f"Error extracting ProductJson fallback data: {e}")
             return None
     
-    def _extract_product_data_from_meta_tags(self, soup: BeautifulSoup) -> Optional[dict]:
+    def _extract_product_data_from_meta_tags(self) -> Optional[dict]:
         """
         Extract product data from meta tags as a fallback method.
         
-        Args:
-            soup: BeautifulSoup object of the HTML content
-            
         Returns:
             Dictionary with product data or None
         """
@@ -206,31 +214,27 @@ class ShopifyExtractor(BaseExtractor):
             meta_data = {}
             
             # Extract title from meta tags
-            title_meta = soup.find('meta', property='og:title') or soup.find('meta', attrs={'name': 'title'})
-            if title_meta and title_meta.get('content'):
-                meta_data['title'] = title_meta['content']
+            title = self.document.meta('og:title', 'title')
+            if title:
+                meta_data['title'] = title
             
             # Extract description from meta tags
-            desc_meta = soup.find('meta', property='og:description') or soup.find('meta', attrs={'name': 'description'})
-            if desc_meta and desc_meta.get('content'):
-                meta_data['description'] = desc_meta['content']
+            description = self.document.meta('og:description', 'description')
+            if description:
+                meta_data['description'] = description
             
             # Extract price from meta tags
-            price_meta = soup.find('meta', property='product:price:amount') or soup.find('meta', attrs={'name': 'price'})
-            if price_meta and price_meta.get('content'):
-                meta_data['price'] = price_meta['content']
+            price = self.document.meta('product:price:amount', 'price')
+            if price:
+                meta_data['price'] = price
             
             # Extract currency from meta tags
-            currency_meta = soup.find('meta', property='product:price:currency') or soup.find('meta', attrs={'name': 'currency'})
-            if currency_meta and currency_meta.get('content'):
-                meta_data['currency'] = currency_meta['content']
+            currency = self.document.meta('product:price:currency', 'currency')
+            if currency:
+                meta_data['currency'] = currency
             
             # Extract images from meta tags
-            image_metas = soup.find_all('meta', property='og:image')
-            images = []
-            for img_meta in image_metas:
-                if img_meta.get('content'):
-                    images.append(img_meta['content'])
+            images = self.document.meta_values('og:image')
             if images:
                 meta_data['images'] = images
             
@@ -350,10 +354,10 @@ class ShopifyExtractor(BaseExtractor):
             True if Yotpo is detected, False otherwise
         """
         try:
-            soup = BeautifulSoup(self.html_content, 'html.parser')
+            soup = self.soup
             
             # Method 1: Check for Yotpo script tags
-            yotpo_scripts = soup.find_all('script', src=re.compile(r'yotpo\.com|yotpo'))
+            yotpo_scripts = [src for src in self.document.script_srcs if 'yotpo' in src]
             if yotpo_scripts:
                 # logger.debug("Yotpo detected via script tags")
                 return True
@@ -374,9 +378,8 @@ class ShopifyExtractor(BaseExtractor):
                     return True
             
             # Method 3: Check for Yotpo in script content
-            scripts = soup.find_all('script')
-            for script in scripts:
-                if script.string and ('yotpo' in script.string.lower() or 'Yotpo' in script.string):
+            for script_text in self.document.inline_scripts:
+                if 'yotpo' in script_text.lower():
                     # logger.debug("Yotpo detected via script content")
                     return True
             
@@ -407,7 +410,7 @@ class ShopifyExtractor(BaseExtractor):
             Dictionary with rating and review count data
         """
         try:
-            soup = BeautifulSoup(self.html_content, 'html.parser')
+            soup = self.soup
             rating_data = {}
             
             # Extract rating from various Yotpo score classes
@@ -539,10 +542,10 @@ class ShopifyExtractor(BaseExtractor):
             True if Trustpilot is detected, False otherwise
         """
         try:
-            soup = BeautifulSoup(self.html_content, 'html.parser')
+            soup = self.soup
             
             # Method 1: Script or iframe references to Trustpilot domains
-            tp_scripts = soup.find_all('script', src=re.compile(r'trustpilot\.com|tp\.widget', re.IGNORECASE))
+            tp_scripts = [src for src in self.document.script_srcs if re.search(r'trustpilot\.com|tp\.widget', src, re.IGNORECASE)]
             if tp_scripts:
                 # logger.debug("Trustpilot detected via script tags")
                 return True
@@ -559,9 +562,8 @@ class ShopifyExtractor(BaseExtractor):
                 return True
             
             # Method 3: Check for Trustpilot mentions in script content
-            all_scripts = soup.find_all('script')
-            for script in all_scripts:
-                if script.string and re.search(r'trustpilot|widget\.trustpilot\.com', script.string, re.IGNORECASE):
+            for script_text in self.document.inline_scripts:
+                if re.search(r'trustpilot|widget\.trustpilot\.com', script_text, re.IGNORECASE):
                     # logger.debug("Trustpilot detected via script content")
                     return True
             
@@ -601,7 +603,7 @@ class ShopifyExtractor(BaseExtractor):
             Dictionary with Trustpilot data and API URL
         """
         try:
-            soup = BeautifulSoup(self.html_content, 'html.parser')
+            soup = self.soup
             rating_data: Dict[str, Any] = {}
             
             # Find div with class "trustpilot-widget" and required data attributes
@@ -702,6 +704,30 @@ class ShopifyExtractor(BaseExtractor):
             return {'widget_found': False, 'error': str(e)}
 
     
+    def extract_from_api_responses(self) -> Dict[str, Any]:
+        """Read product fields from captured /products/<handle>.js and .json responses"""
+        # Themes also fetch other products (recommendations, quick view) - only trust this handle
+        handle_match = re.search(r'/products/([^/?#.]+)', self.url or '')
+        if not handle_match:
+            return {}
+        for response in self.api_responses:
+            if f"/products/{handle_match.group(1)}." not in response.get('url', ''):
+                continue
+            data = response.get('data')
+            if not isinstance(data, dict):
+                continue
+            if isinstance(data.get('product'), dict):
+                # /products/<handle>.json - prices are decimal strings on the variants
+                product = dict(data['product'])
+                variants = product.get('variants') or [{}]
+                product['price'] = variants[0].get('price')
+                return {k: v for k, v in self._read_api_product_node(product).items() if v}
+            if isinstance(data.get('price'), int) and 'variants' in data:
+                # /products/<handle>.js - prices are integers in cents
+                product = dict(data, price=data['price'] / 100)
+                return {k: v for k, v in self._read_api_product_node(product).items() if v}
+        return {}
+    
     def extract_title(self) -> Optional[str]:
         """Extract product title from Shopify page"""
         if self.product_data and self.product_data.get('title'):
@@ -1369,7 +1395,7 @@ class ShopifyExtractor(BaseExtractor):
             Rating value as float or None if not found
         """
         try:
-            soup = BeautifulSoup(self.html_content, 'html.parser')
+            soup = self.soup
             rating = None
             
             # Combine default and custom selectors
@@ -1463,7 +1489,7 @@ class ShopifyExtractor(BaseExtractor):
             Review count as integer or None if not found
         """
         try:
-            soup = BeautifulSoup(self.html_content, 'html.parser')
+            soup = self.soup
             review_count = None
             
             # Combine default and custom selectors
@@ -1,5 +1,4 @@
 from typing import Optional, List, Dict, Any
-from bs4 import BeautifulSoup
 import re
 import json
 from app.extractors.base import BaseExtractor
@@ -20,12 +19,16 @@ logger = get_logger(__name__)
 class SquarespaceExtractor(BaseExtractor):
     """Extractor for Squarespace-based e-commerce sites"""
     
+    # Lazy-load hints used by the browser before extraction
+    lazy_load_anchors = ['.product-reviews', '.product-rating']
+    lazy_load_targets = ['[data-sqs-product-rating]', '.product-rating .rating']
+    
     def __init__(self, html_content: str, url: str):
         super().__init__(html_content, url)
         self.platform = "squarespace"
         
         # Try to extract data from structured data first
-        self.structured_data_extractor = StructuredDataExtractor(html_content, url)
+        self.structured_data_extractor = StructuredDataExtractor(self.document, url)
         self.product_data = self.structured_data_extractor.extract_structured_product_data()
         
         if self.product_data:
@@ -39,11 +42,11 @@ class SquarespaceExtractor(BaseExtractor):
     def _extract_squarespace_data(self) -> Optional[Dict[str, Any]]:
         """Extract Squarespace-specific data from the page"""
         try:
-            soup = BeautifulSoup(self.html_content, 'html.parser')
+            soup = self.soup
             sq_data = {}
             
             # Look for Squarespace script tags with product data
-            scripts = soup.find_all('script')
+            scripts = self.document.scripts
             for script in scripts:
                 if script.string and 'window.Squarespace' in script.string:
                     try:
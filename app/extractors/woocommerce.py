@@ -1,6 +1,7 @@
 from typing import Optional, List, Dict, Any
 from bs4 import BeautifulSoup
 import re
+from urllib.parse import urlparse
 from app.extractors.base import BaseExtractor
 from app.models import ProductInfo
 from app.logging_config import get_logger
@@ -12,12 +13,26 @@ logger = get_logger(__name__)
 class WooCommerceExtractor(BaseExtractor):
     """Extractor for WooCommerce-based e-commerce sites"""
     
+    # Lazy-load hints used by the browser before extraction
+    lazy_load_anchors = ['.woocommerce-product-rating', '#reviews', '.reviews_tab']
+    lazy_load_targets = ['.woocommerce-product-rating .star-rating', '.woocommerce-review-link']
+    
+    # WooCommerce Store API (block themes load product data from it)
+    api_response_patterns = [r'/wp-json/wc/store/(?:v\d+/)?products']
+    
+    @classmethod
+    def get_product_json_url(cls, url: str) -> Optional[str]:
+        """Store API lookup of the product slug in the URL (default /product/<slug>/ permalinks)"""
+        parsed = urlparse(url)
+        match = re.search(r'/product/([^/?#]+)', parsed.path)
+        return f"{parsed.scheme}://{parsed.netloc}/wp-json/wc/store/v1/products?slug={match.group(1)}" if match else None
+    
     def __init__(self, html_content: str, url: str):
         super().__init__(html_content, url)
         self.platform = "woocommerce"
         
         # Try to extract data from structured data first
-        self.structured_data_extractor = StructuredDataExtractor(html_content, url)
+        self.structured_data_extractor = StructuredDataExtractor(self.document, url)
         self.product_data = self.structured_data_extractor.extract_structured_product_data()
         
         if self.product_data:
@@ -25,6 +40,37 @@ class WooCommerceExtractor(BaseExtractor):
         else:
             logger.info("No structured JSON data found, will use HTML extraction")
     
+    def extract_from_api_responses(self) -> Dict[str, Any]:
+        """Read product fields from captured Store API responses (prices are in minor units)"""
+        # Related-product blocks query the Store API too - only trust this page's product
+        page_path = urlparse(self.url or '').path.rstrip('/')
+        slug_match = re.search(r'/product/([^/?#]+)', page_path)
+        page_slug = slug_match.group(1) if slug_match else None
+        
+        def is_page_product(entry: Any) -> bool:
+            if not isinstance(entry, dict) or not isinstance(entry.get('prices'), dict):
+                return False
+            if page_slug and entry.get('slug') == page_slug:
+                return True
+            permalink = entry.get('permalink')
+            return bool(page_path and permalink and urlparse(permalink).path.rstrip('/') == page_path)
+        
+        for response in self.api_responses:
+            data = response.get('data')
+            entries = data if isinstance(data, list) else [data]
+            data = next((entry for entry in entries if is_page_product(entry)), None)
+            if data is None:
+                continue
+            prices = data['prices']
+            product = dict(data)
+            try:
+                product['price'] = int(prices['price']) / (10 ** int(prices.get('currency_minor_unit', 2)))
+            except (KeyError, TypeError, ValueError):
+                product['price'] = None
+            product['currency'] = prices.get('currency_code')
+            return {k: v for k, v in self._read_api_product_node(product).items() if v}
+        return {}
+    
     def extract_title(self) -> Optional[str]:
         """Extract product title from WooCommerce page"""
         # Try structured data first
@@ -311,7 +357,7 @@ class WooCommerceExtractor(BaseExtractor):
         
         # Extract WooCommerce specific data
         # Check for WooCommerce JavaScript variables
-        scripts = self.soup.find_all('script')
+        scripts = self.document.scripts
         for script in scripts:
             if script.string:
                 script_content = script.string
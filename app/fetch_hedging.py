@@ -0,0 +1,179 @@
+import asyncio
+import contextvars
+import time
+from collections import deque
+from typing import Optional, Dict, Any, Callable, Awaitable, Deque, TypeVar
+from urllib.parse import urlparse
+from app.config import settings
+from app.logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+T = TypeVar('T')
+
+
+class FetchHedger:
+    """
+    Hedged fetches for slow domains.
+
+    A fetch that has not finished by the domain's HEDGE_PERCENTILE latency gets a
+    second attempt (on its own browser context and, if possible, another proxy);
+    whichever finishes first wins and the other is cancelled. Hedges are capped
+    at HEDGE_MAX_RATE of all fetches and HEDGE_MAX_IN_FLIGHT at a time, and
+    hedging pauses while the time spent on cancelled attempts exceeds
+    HEDGE_MAX_WASTE_RATIO of the time spent fetching.
+
+    Each attempt runs as its own asyncio task with a copy of the caller's context,
+    so per-task state (leased context, kept page, captured API responses) stays
+    separate; the caller adopts the winner's state.
+    """
+
+    def __init__(self):
+        self._latencies: Dict[str, Deque[float]] = {}
+        self.in_flight = 0
+        self.fetches = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.skipped_rate_cap = 0
+        self.skipped_waste_cap = 0
+        self.fetch_seconds = 0.0
+        self.wasted_seconds = 0.0
+
+    def _get_domain(self, url: str) -> str:
+        domain = (urlparse(url).hostname or '').lower()
+        return domain[4:] if domain.startswith('www.') else domain
+
+    def _record_latency(self, url: str, seconds: float):
+        domain = self._get_domain(url)
+        if domain not in self._latencies:
+            self._latencies[domain] = deque(maxlen=settings.HEDGE_LATENCY_WINDOW)
+        self._latencies[domain].append(seconds)
+        self.fetch_seconds += seconds
+
+    def _percentile(self, samples: Deque[float]) -> float:
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * settings.HEDGE_PERCENTILE))]
+
+    def hedge_delay(self, url: str) -> Optional[float]:
+        """
+        Get the seconds after which a fetch of a URL should be hedged
+
+        Args:
+            url: URL about to be fetched
+
+        Returns:
+            The domain's latency percentile (at least HEDGE_MIN_DELAY), or None if hedging
+            is off or the domain has too few samples
+        """
+        if not settings.HEDGE_ENABLED:
+            return None
+        samples = self._latencies.get(self._get_domain(url))
+        if not samples or len(samples) < settings.HEDGE_MIN_SAMPLES:
+            return None
+        return max(settings.HEDGE_MIN_DELAY, self._percentile(samples))
+
+    def _allow_hedge(self) -> bool:
+        if self.in_flight >= settings.HEDGE_MAX_IN_FLIGHT or self.hedges >= self.fetches * settings.HEDGE_MAX_RATE:
+            self.skipped_rate_cap += 1
+            return False
+        if self.fetch_seconds and self.wasted_seconds > self.fetch_seconds * settings.HEDGE_MAX_WASTE_RATIO:
+            self.skipped_waste_cap += 1
+            return False
+        return True
+
+    async def run(self, url: str, attempt: Callable[[bool], Awaitable[T]]) -> T:
+        """
+        Run a fetch, hedging it if it is slower than usual for its domain
+
+        Args:
+            url: URL being fetched
+            attempt: Coroutine function doing one attempt; called with hedge=True for the second one.
+                     It must release what it leased if it fails or is cancelled.
+
+        Returns:
+            Result of the attempt that finished first
+        """
+        if not settings.HEDGE_ENABLED:
+            return await attempt(False)
+
+        self.fetches += 1
+        delay = self.hedge_delay(url)
+        started = time.monotonic()
+        if delay is None:
+            result = await attempt(False)
+            self._record_latency(url, time.monotonic() - started)
+            return result
+
+        primary_context = contextvars.copy_context()
+        primary = asyncio.create_task(attempt(False), context=primary_context)
+        attempts = {primary: (primary_context, started)}
+        finished: Dict[asyncio.Task, float] = {}
+        hedge = None
+        winner = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if not done and self._allow_hedge():
+                logger.info(f"Fetch of {url} is slower than {delay:.1f}s, starting a hedged attempt")
+                self.hedges += 1
+                self.in_flight += 1
+                hedge_context = contextvars.copy_context()
+                hedge = asyncio.create_task(attempt(True), context=hedge_context)
+                attempts[hedge] = (hedge_context, time.monotonic())
+
+            pending = set(attempts)
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    finished[task] = time.monotonic()
+                winner = next((task for task in done if task.exception() is None), None)
+
+            if winner is None:
+                # Every attempt failed - report the primary's error
+                raise primary.exception()
+
+            winner_context, winner_started = attempts[winner]
+            for var, value in winner_context.items():
+                var.set(value)
+            self._record_latency(url, time.monotonic() - winner_started)
+            if winner is hedge:
+                self.hedge_wins += 1
+                logger.info(f"Hedged attempt won for {url}")
+            return winner.result()
+        finally:
+            # Every attempt but the winner is wasted work, whether it failed or was still running
+            losers = []
+            for task, (_, task_started) in attempts.items():
+                if task is winner:
+                    continue
+                if not task.done():
+                    task.cancel()
+                    losers.append(task)
+                self.wasted_seconds += finished.get(task, time.monotonic()) - task_started
+            if losers:
+                await asyncio.gather(*losers, return_exceptions=True)
+            if hedge is not None:
+                self.in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hedge rate, wasted work and per-domain hedge delays"""
+        return {
+            'enabled': settings.HEDGE_ENABLED,
+            'fetches': self.fetches,
+            'hedges': self.hedges,
+            'hedge_rate': round(self.hedges / self.fetches, 3) if self.fetches else 0.0,
+            'hedge_wins': self.hedge_wins,
+            'in_flight': self.in_flight,
+            'skipped_rate_cap': self.skipped_rate_cap,
+            'skipped_waste_cap': self.skipped_waste_cap,
+            'wasted_seconds': round(self.wasted_seconds, 1),
+            'waste_ratio': round(self.wasted_seconds / self.fetch_seconds, 3) if self.fetch_seconds else 0.0,
+            'hedge_delays': {
+                domain: round(max(settings.HEDGE_MIN_DELAY, self._percentile(samples)), 2)
+                for domain, samples in self._latencies.items() if len(samples) >= settings.HEDGE_MIN_SAMPLES
+            },
+        }
+
+
+# Global fetch hedger instance
+fetch_hedger = FetchHedger()
@@ -0,0 +1,328 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, AsyncIterator
+from urllib.parse import urlparse
+import httpx
+from app.config import settings
+from app.domain_scheduler import domain_scheduler
+from app.proxy_pool import proxy_pool, OUTCOME_BLOCKED, OUTCOME_FAILED
+from app.task_deadline import current_deadline
+from app.retry_policy import FetchError
+from app.logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+# HTTP/2 needs the h2 package (installed through httpx[http2] in requirements.txt)
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+TIER_HTTP = 'http'
+TIER_BROWSER = 'browser'
+
+DEFAULT_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+}
+
+# Pages that only render with JavaScript or that block non-browser clients
+JS_WALL_PATTERNS = re.compile(
+    r'please enable javascript|enable javascript to|javascript is (?:required|disabled)|'
+    r'you need to enable javascript|checking your browser|just a moment\.\.\.|'
+    r'cf-browser-verification|challenge-platform|_incapsula_resource|px-captcha|'
+    r'are you a robot',
+    re.IGNORECASE
+)
+
+# HTTP statuses that mean the site refuses plain HTTP clients rather than that the page is missing
+BLOCKED_STATUSES = {401, 403, 429, 503}
+
+
+@dataclass
+class HttpFetchResult:
+    """Result of a plain HTTP page fetch"""
+    url: str
+    status_code: int
+    html: str
+    elapsed: float
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class DomainTierStats:
+    """What the fetcher has learned about one domain"""
+    http_attempts: int = 0
+    http_successes: int = 0
+    consecutive_failures: int = 0
+    browser_runs_since_probe: int = 0
+    last_failure_reason: Optional[str] = None
+    updated_at: float = 0.0
+
+
+class HttpFetcher:
+    """
+    First fetch tier: pooled HTTP client that avoids launching a browser page
+    for sites whose product data is server-rendered.
+
+    The tier used for each domain is learned from outcomes: domains that keep
+    failing the completeness check go straight to the browser, and are
+    re-probed over HTTP every HTTP_TIER_REPROBE_INTERVAL browser scrapes.
+    """
+
+    def __init__(self):
+        # Pooled clients by proxy, least recently used first (at most HTTP_TIER_MAX_CLIENTS)
+        self._clients: 'OrderedDict[str, httpx.AsyncClient]' = OrderedDict()
+        # Requests in flight per client; evicted clients are closed once they drain
+        self._in_use: Dict[int, int] = {}
+        self._retired: Dict[int, httpx.AsyncClient] = {}
+        self.evicted_clients = 0
+        self.domain_stats: Dict[str, DomainTierStats] = {}
+
+    def _get_domain(self, url: str) -> str:
+        domain = urlparse(url).netloc.lower()
+        return domain[4:] if domain.startswith('www.') else domain
+
+    def _get_client(self, proxy: Optional[str] = None) -> httpx.AsyncClient:
+        """Get (or create) the pooled client for a proxy, evicting the least recently used one when full"""
+        key = proxy or 'direct'
+        client = self._clients.get(key)
+        if client is not None and not client.is_closed:
+            self._clients.move_to_end(key)
+        else:
+            client_options = {
+                'http2': HTTP2_AVAILABLE,
+                'follow_redirects': True,
+                'verify': False,
+                'timeout': httpx.Timeout(settings.HTTP_TIER_TIMEOUT, connect=10.0),
+                'limits': httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                'headers': DEFAULT_HEADERS,
+            }
+            try:
+                client = httpx.AsyncClient(proxy=proxy, **client_options)
+            except TypeError:
+                # httpx < 0.26 only accepts the older "proxies" argument
+                client = httpx.AsyncClient(proxies=proxy, **client_options)
+            self._clients[key] = client
+            self._clients.move_to_end(key)
+            while len(self._clients) > max(settings.HTTP_TIER_MAX_CLIENTS, 1):
+                _, evicted = self._clients.popitem(last=False)
+                self.evicted_clients += 1
+                self._retired[id(evicted)] = evicted
+                self._close_if_idle(evicted)
+        return client
+
+    @asynccontextmanager
+    async def _client(self, proxy: Optional[str] = None) -> AsyncIterator[httpx.AsyncClient]:
+        """Use the pooled client of a proxy; an evicted client stays open until its last request ends"""
+        client = self._get_client(proxy)
+        self._in_use[id(client)] = self._in_use.get(id(client), 0) + 1
+        try:
+            yield client
+        finally:
+            self._in_use[id(client)] -= 1
+            if not self._in_use[id(client)]:
+                del self._in_use[id(client)]
+            self._close_if_idle(client)
+
+    def _close_if_idle(self, client: httpx.AsyncClient):
+        """Close an evicted client that has no request in flight"""
+        if id(client) not in self._retired or self._in_use.get(id(client)):
+            return
+        del self._retired[id(client)]
+        asyncio.ensure_future(self._aclose(client))
+
+    async def _aclose(self, client: httpx.AsyncClient):
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing HTTP client: {e}")
+
+    def preferred_tier(self, url: str) -> str:
+        """
+        Decide which tier to try first for a URL
+
+        Args:
+            url: Product URL
+
+        Returns:
+            TIER_HTTP or TIER_BROWSER
+        """
+        if not settings.HTTP_TIER_ENABLED:
+            return TIER_BROWSER
+
+        stats = self.domain_stats.get(self._get_domain(url))
+        if stats is None or stats.consecutive_failures < settings.HTTP_TIER_FAILURE_THRESHOLD:
+            return TIER_HTTP
+
+        # Periodically re-probe domains that were moved to the browser tier
+        if stats.browser_runs_since_probe >= settings.HTTP_TIER_REPROBE_INTERVAL:
+            return TIER_HTTP
+        return TIER_BROWSER
+
+    async def fetch(self, url: str, proxy: Optional[str] = None, user_agent: Optional[str] = None, platform: Optional[str] = None) -> HttpFetchResult:
+        """
+        Fetch a page over HTTP
+
+        Args:
+            url: URL to fetch
+            proxy: Optional proxy
+            user_agent: Optional user agent
+            platform: Optional platform hint used to pick scheduling limits
+
+        Returns:
+            HttpFetchResult
+
+        Raises:
+            Exception if the request fails or the site blocks plain HTTP clients
+        """
+        from app.browser_pool import DEFAULT_USER_AGENT
+
+        async with self._client(proxy) as client, domain_scheduler.slot(url, platform):
+            start_time = time.time()
+            # Never wait longer than the scraping task has left
+            deadline = current_deadline()
+            timeout = min(settings.HTTP_TIER_TIMEOUT, deadline.remaining()) if deadline else httpx.USE_CLIENT_DEFAULT
+            try:
+                response = await client.get(url, headers={'User-Agent': user_agent or DEFAULT_USER_AGENT}, timeout=timeout)
+            except httpx.TransportError:
+                proxy_pool.record(proxy, url, OUTCOME_FAILED)
+                raise
+
+        if response.status_code in BLOCKED_STATUSES:
+            domain_scheduler.record_outcome(url, True, platform)
+            proxy_pool.record(proxy, url, OUTCOME_BLOCKED)
+            raise FetchError(f"HTTP tier blocked with status {response.status_code}", status=response.status_code)
+        if response.status_code >= 500:
+            proxy_pool.record(proxy, url, OUTCOME_FAILED)
+        if response.status_code >= 400:
+            raise FetchError(f"Failed to load page: {response.status_code}", status=response.status_code)
+        proxy_pool.record(proxy, url, None, time.time() - start_time)
+
+        html = response.text
+        logger.info(f"HTTP tier fetched {url} in {time.time() - start_time:.2f}s "
+                    f"({response.http_version}, length: {len(html)})")
+        return HttpFetchResult(url=str(response.url), status_code=response.status_code,
+                               html=html, elapsed=time.time() - start_time, headers=dict(response.headers))
+
+    async def fetch_json(self, url: str, proxy: Optional[str] = None, user_agent: Optional[str] = None, platform: Optional[str] = None) -> Any:
+        """
+        Fetch a JSON endpoint of a storefront (e.g. a platform's product endpoint)
+
+        Args:
+            url: Endpoint URL
+            proxy: Optional proxy
+            user_agent: Optional user agent
+            platform: Optional platform hint used to pick scheduling limits
+
+        Returns:
+            Parsed JSON
+
+        Raises:
+            Exception if the request fails or the answer is not JSON
+        """
+        from app.browser_pool import DEFAULT_USER_AGENT
+
+        async with self._client(proxy) as client, domain_scheduler.slot(url, platform):
+            deadline = current_deadline()
+            timeout = min(settings.EARLY_DETECTION_JSON_TIMEOUT, deadline.remaining()) if deadline else settings.EARLY_DETECTION_JSON_TIMEOUT
+            response = await client.get(url, headers={
+                'User-Agent': user_agent or DEFAULT_USER_AGENT,
+                'Accept': 'application/json, text/javascript, */*;q=0.1',
+            }, timeout=timeout)
+        if response.status_code >= 400:
+            raise FetchError(f"JSON endpoint answered {response.status_code}", status=response.status_code)
+        return response.json()
+
+    def looks_like_js_wall(self, html: str) -> bool:
+        """
+        Check if a page needs JavaScript to render or is a bot challenge
+
+        Args:
+            html: Page HTML
+
+        Returns:
+            True if the browser tier is required
+        """
+        if len(html) < settings.HTTP_TIER_MIN_HTML_LENGTH:
+            return True
+        # Challenge pages are short; only scan the head of large documents
+        return bool(JS_WALL_PATTERNS.search(html[:20000]))
+
+    def record_http_result(self, url: str, success: bool, reason: Optional[str] = None):
+        """Record the outcome of an HTTP tier attempt for a domain"""
+        stats = self.domain_stats.setdefault(self._get_domain(url), DomainTierStats())
+        stats.http_attempts += 1
+        stats.browser_runs_since_probe = 0
+        stats.updated_at = time.time()
+        if success:
+            stats.http_successes += 1
+            stats.consecutive_failures = 0
+        else:
+            stats.consecutive_failures += 1
+            stats.last_failure_reason = reason
+
+    def seed_tier(self, url: str, tier: str):
+        """
+        Start a domain without local history on a tier learned earlier (e.g. by another process)
+
+        Args:
+            url: Product URL
+            tier: TIER_HTTP or TIER_BROWSER
+        """
+        domain = self._get_domain(url)
+        if tier != TIER_BROWSER or domain in self.domain_stats:
+            return
+        self.domain_stats[domain] = DomainTierStats(
+            consecutive_failures=settings.HTTP_TIER_FAILURE_THRESHOLD,
+            last_failure_reason='remembered as browser-only',
+            updated_at=time.time()
+        )
+
+    def record_browser_run(self, url: str):
+        """Record that a domain was scraped with the browser tier"""
+        stats = self.domain_stats.get(self._get_domain(url))
+        if stats:
+            stats.browser_runs_since_probe += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-domain tier statistics"""
+        return {
+            'enabled': settings.HTTP_TIER_ENABLED,
+            'http2': HTTP2_AVAILABLE,
+            'pooled_clients': len(self._clients),
+            'evicted_clients': self.evicted_clients,
+            'domains': {
+                domain: {
+                    'preferred_tier': TIER_BROWSER if stats.consecutive_failures >= settings.HTTP_TIER_FAILURE_THRESHOLD else TIER_HTTP,
+                    'http_attempts': stats.http_attempts,
+                    'http_successes': stats.http_successes,
+                    'consecutive_failures': stats.consecutive_failures,
+                    'last_failure_reason': stats.last_failure_reason,
+                }
+                for domain, stats in self.domain_stats.items()
+            },
+        }
+
+    async def close(self):
+        """Close all pooled clients"""
+        for client in list(self._clients.values()) + list(self._retired.values()):
+            await self._aclose(client)
+        self._clients.clear()
+        self._retired.clear()
+
+
+# Global HTTP fetcher instance
+http_fetcher = HttpFetcher()
@@ -0,0 +1,203 @@
+import time
+from typing import Optional, Dict, Any, List
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
+from app.config import settings
+from app.logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# True when the review/rating data is already on the page, so scrolling cannot help
+DATA_PRESENT_JS = """
+(cfg) => {
+    const populated = (selector) => {
+        try {
+            const el = document.querySelector(selector);
+            return !!(el && ((el.textContent || '').trim() || el.getAttributeNames().some((n) => n.startsWith('data-') && el.getAttribute(n))));
+        } catch (e) {
+            return false;
+        }
+    };
+    if (cfg.targets.some(populated)) {
+        return 'target';
+    }
+    const ratingJsonLd = Array.from(document.querySelectorAll('script[type="application/ld+json"]'))
+        .some((script) => /"aggregateRating"/.test(script.textContent || ''));
+    if (ratingJsonLd) {
+        return 'json_ld';
+    }
+    const sources = Array.from(document.scripts).map((script) => (script.src || '').toLowerCase());
+    if (cfg.skipScripts.some((name) => sources.some((src) => src.includes(name)))) {
+        return 'script';
+    }
+    return null;
+}
+"""
+
+# Scroll the first matching anchor (or the page bottom) into view and mark the time
+SCROLL_TO_ANCHOR_JS = """
+(selector) => {
+    const el = selector ? document.querySelector(selector) : null;
+    if (selector && !el) {
+        return false;
+    }
+    if (el) {
+        el.scrollIntoView({ block: 'center' });
+    } else {
+        window.scrollTo(0, document.body.scrollHeight);
+    }
+    window.__scraperScrolledAt = performance.now();
+    return true;
+}
+"""
+
+# Resolves once a target element appears, or once neither the network nor the DOM
+# has changed for quietMs since the scroll
+AWAIT_LAZY_CONTENT_JS = """
+(cfg) => {
+    const populated = (selector) => {
+        try {
+            const el = document.querySelector(selector);
+            return !!(el && ((el.textContent || '').trim() || el.getAttributeNames().some((n) => n.startsWith('data-') && el.getAttribute(n))));
+        } catch (e) {
+            return false;
+        }
+    };
+    if (cfg.targets.some(populated)) {
+        return 'target';
+    }
+    const now = performance.now();
+    let lastActivity = window.__scraperScrolledAt || 0;
+    const resources = performance.getEntriesByType('resource');
+    if (resources.length) {
+        const last = resources[resources.length - 1];
+        lastActivity = Math.max(lastActivity, last.responseEnd || last.startTime);
+    }
+    if (window.__scraperReadiness) {
+        lastActivity = Math.max(lastActivity, window.__scraperReadiness.lastMutation);
+    }
+    return now - lastActivity >= cfg.quietMs ? 'quiet' : false;
+}
+"""
+
+
+class LazyLoader:
+    """Triggers lazy-loaded reviews/ratings by scrolling only where it is needed"""
+
+    def __init__(self):
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    async def trigger(self, page: Page, platform: Optional[str] = None) -> Optional[bool]:
+        """
+        Scroll to the platform's review/rating anchors until the awaited data appears
+
+        Args:
+            page: Playwright page object
+            platform: Platform name hint used to pick anchors and targets
+
+        Returns:
+            True if a lazy_load_targets element appeared after scrolling, False if none did
+            (the data may still have loaded under another selector),
+            None if scrolling was skipped because the data was already present
+        """
+        from app.extractors.factory import ExtractorFactory
+        extractor_class = ExtractorFactory.get_extractor_class(platform)
+        anchors: List[str] = extractor_class.lazy_load_anchors
+        cfg = {
+            'targets': extractor_class.lazy_load_targets,
+            'skipScripts': extractor_class.lazy_load_skip_scripts,
+            'quietMs': settings.BROWSER_READY_QUIET_MS,
+        }
+        key = platform or 'generic'
+
+        present = await page.evaluate(DATA_PRESENT_JS, cfg)
+        if present:
+            logger.info(f"Skipping lazy-load scroll, rating data already available via {present} ({key})")
+            self._record(key, 'skipped')
+            return None
+
+        start_time = time.time()
+        scrolled_to_anchor = False
+        # Anchors first; a single jump to the bottom if none of them exist on the page
+        for anchor in anchors + [None]:
+            if anchor is None and scrolled_to_anchor:
+                break
+            try:
+                if not await page.evaluate(SCROLL_TO_ANCHOR_JS, anchor):
+                    continue
+                scrolled_to_anchor = scrolled_to_anchor or anchor is not None
+                handle = await page.wait_for_function(
+                    AWAIT_LAZY_CONTENT_JS,
+                    arg=cfg,
+                    polling=settings.BROWSER_READY_POLL_INTERVAL,
+                    timeout=settings.BROWSER_SCROLL_WAIT_TIMEOUT
+                )
+                if await handle.json_value() == 'target':
+                    elapsed_ms = int((time.time() - start_time) * 1000)
+                    logger.info(f"Lazy-loaded rating data appeared after {elapsed_ms}ms ({key})")
+                    self._record(key, 'scrolled', target_appeared=True)
+                    return True
+            except PlaywrightTimeoutError:
+                continue
+            except Exception as e:
+                logger.warning(f"Lazy-load scroll to {anchor or 'page bottom'} failed: {e}")
+
+        self._record(key, 'scrolled', target_appeared=False)
+        return False
+
+    async def trigger_full_scroll(self, page: Page):
+        """
+        Scroll to multiple positions to trigger lazy loading of content like reviews and ratings.
+        Different sites trigger lazy loading at different scroll positions.
+        """
+        page_height = await page.evaluate("document.body.scrollHeight")
+
+        # Scroll to multiple positions to trigger lazy loading
+        scroll_positions = [0.25, 0.5, 0.75, 0.9, 1.0]  # 25%, 50%, 75%, 90%, 100%
+
+        for position in scroll_positions:
+            scroll_y = int(page_height * position)
+            try:
+                await page.evaluate(f"window.scrollTo({{ top: {scroll_y}, behavior: 'smooth' }});")
+                # Wait for lazy loading to trigger
+                await page.wait_for_timeout(1500)
+            except Exception:
+                logger.warning(f"Scroll timeout at {position * 100}% position")
+                continue
+
+        # Scroll back to top
+        try:
+            await page.evaluate("window.scrollTo({ top: 0, behavior: 'smooth' });")
+            await page.wait_for_timeout(1000)
+        except Exception:
+            logger.warning("Scroll back to top timeout")
+
+    def _record(self, platform: str, outcome: str, target_appeared: bool = False):
+        entry = self.stats.setdefault(platform, {'skipped': 0, 'scrolled': 0, 'target_appeared': 0})
+        entry[outcome] += 1
+        if target_appeared:
+            entry['target_appeared'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get per-platform scroll statistics
+
+        target_appeared counts scrolls after which one of the extractor's lazy_load_targets
+        selectors got populated. It is not a measure of whether the extracted rating or
+        review count changed: data that loads under another selector, or only once the
+        network goes quiet, is not counted.
+        """
+        return {
+            platform: {
+                'skipped': entry['skipped'],
+                'scrolled': entry['scrolled'],
+                'target_appeared': entry['target_appeared'],
+                'target_rate': round(entry['target_appeared'] / entry['scrolled'], 3) if entry['scrolled'] else None,
+            }
+            for platform, entry in self.stats.items()
+        }
+
+
+# Global lazy loader instance
+lazy_loader = LazyLoader()
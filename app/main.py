@@ -83,6 +83,10 @@ async def lifespan(app: FastAPI):
         # Start scheduler service
         start_scheduler()
         logger.info("Scheduler service started")
+        
+        # Warm up the browser pool
+        from app.browser_pool import browser_pool
+        browser_pool.start()
             
     except Exception as e:
         logger.error(f"Failed to initialize database connections: {e}")
@@ -112,6 +116,18 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error stopping scheduler service: {e}")
     
+    # Close pooled HTTP clients and browsers
+    try:
+        from app.browser_pool import browser_pool
+        from app.http_fetcher import http_fetcher
+        from app.asset_cache import asset_cache
+        if browser_pool.running:
+            browser_pool.run(http_fetcher.close)
+            browser_pool.run(asset_cache.flush)
+        browser_pool.shutdown()
+    except Exception as e:
+        logger.error(f"Error shutting down browser pool: {e}")
+    
     # Clean up Windows asyncio resources
     cleanup_windows_asyncio()
 
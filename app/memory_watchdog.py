@@ -0,0 +1,249 @@
+import asyncio
+import os
+import re
+from typing import Optional, Dict, Any, List, Set
+from app.config import settings
+from app.logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+# psutil is in requirements.txt; if it cannot be imported (e.g. no wheel for the platform) only page-count
+# recycling is done and /stats reports psutil_available: false
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    psutil = None
+    PSUTIL_AVAILABLE = False
+
+# Playwright launches every browser with a temporary profile directory named like this
+PLAYWRIGHT_PROFILE_RE = re.compile(r'playwright_(?:chromium|firefox|webkit)dev_profile|ms-playwright')
+
+MB = 1024 * 1024
+
+
+def _command_line(process) -> str:
+    try:
+        return ' '.join(process.cmdline())
+    except Exception:
+        return ''
+
+
+class MemoryWatchdog:
+    """
+    Samples the memory of pooled browsers and cleans up leaked browser processes.
+
+    Each pooled browser is identified by the root process that appeared when it
+    was launched; its RSS is that process plus all its children (renderers,
+    GPU and content processes). Browsers over BROWSER_MAX_RSS_MB, or with one
+    renderer over BROWSER_MAX_RENDERER_RSS_MB, are marked for recycling and
+    relaunched once their open contexts finish. Browser processes that outlive
+    a failed close, or a previous crashed run, are killed.
+    """
+
+    def __init__(self):
+        self.launch_lock = asyncio.Lock()
+        self.samples = 0
+        self.memory_recycles = 0
+        self.orphans_killed = 0
+        self.last_total_rss_mb = 0.0
+        self.peak_total_rss_mb = 0.0
+        self._warned = False
+
+    @property
+    def enabled(self) -> bool:
+        if not PSUTIL_AVAILABLE and not self._warned:
+            self._warned = True
+            logger.warning("psutil is not installed - browser memory watchdog disabled (page-count recycling still applies)")
+        return settings.BROWSER_MEMORY_WATCHDOG_ENABLED and PSUTIL_AVAILABLE
+
+    # ------------------------------------------------------------------
+    # Process lookup (blocking - run via asyncio.to_thread from the engine loop)
+    # ------------------------------------------------------------------
+
+    def child_pids(self) -> Set[int]:
+        """Get the PIDs of every process below this one (Playwright drivers and browsers)"""
+        if not self.enabled:
+            return set()
+        try:
+            return {child.pid for child in psutil.Process().children(recursive=True)}
+        except Exception:
+            return set()
+
+    def find_browser_pid(self, before: Set[int]) -> Optional[int]:
+        """
+        Find the root process of a browser that was launched after a child_pids() snapshot
+
+        Args:
+            before: PIDs that existed before the launch
+
+        Returns:
+            PID of the new browser's main process, or None if it cannot be told apart
+        """
+        if not self.enabled:
+            return None
+        try:
+            new = [child for child in psutil.Process().children(recursive=True) if child.pid not in before]
+            new_pids = {child.pid for child in new}
+            roots = [child for child in new if child.ppid() not in new_pids and PLAYWRIGHT_PROFILE_RE.search(_command_line(child))]
+            return roots[0].pid if len(roots) == 1 else None
+        except Exception as e:
+            logger.debug(f"Could not identify browser process: {e}")
+            return None
+
+    def tree_memory(self, pid: int) -> Optional[Dict[str, Any]]:
+        """
+        Measure a browser process tree
+
+        Args:
+            pid: Browser main process
+
+        Returns:
+            Dictionary with rss_mb, browser_rss_mb, renderer_count and max_renderer_rss_mb,
+            or None if the process is gone
+        """
+        if not self.enabled:
+            return None
+        try:
+            root = psutil.Process(pid)
+            root_rss = root.memory_info().rss
+            child_rss = []
+            for child in root.children(recursive=True):
+                try:
+                    child_rss.append(child.memory_info().rss)
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+            return {
+                'rss_mb': round((root_rss + sum(child_rss)) / MB, 1),
+                'browser_rss_mb': round(root_rss / MB, 1),
+                'renderer_count': len(child_rss),
+                'max_renderer_rss_mb': round(max(child_rss, default=0) / MB, 1),
+            }
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+
+    def kill_tree(self, pid: int) -> bool:
+        """
+        Kill a browser process and its children
+
+        Args:
+            pid: Browser main process
+
+        Returns:
+            True if anything was killed
+        """
+        if not self.enabled:
+            return False
+        try:
+            root = psutil.Process(pid)
+            processes = root.children(recursive=True) + [root]
+        except psutil.NoSuchProcess:
+            return False
+        for process in processes:
+            try:
+                process.kill()
+            except psutil.NoSuchProcess:
+                pass
+            except Exception as e:
+                logger.warning(f"Failed to kill browser process {process.pid}: {e}")
+        psutil.wait_procs(processes, timeout=3)
+        return True
+
+    def kill_orphans(self, known_pids: Set[int]) -> int:
+        """
+        Kill Playwright browser processes that no driver owns anymore
+
+        A browser root whose parent is init (or this process, when it runs as PID 1
+        in a container) was left behind by a close that failed or a crashed run.
+
+        Args:
+            known_pids: Root PIDs of the pool's live browsers
+
+        Returns:
+            Number of browser trees killed
+        """
+        if not self.enabled:
+            return 0
+        own_pid = os.getpid()
+        uid = os.getuid() if hasattr(os, 'getuid') else None
+        killed = 0
+        for process in psutil.process_iter(['pid', 'ppid', 'uids']):
+            try:
+                info = process.info
+                if info['pid'] in known_pids or info['ppid'] not in (1, own_pid):
+                    continue
+                if uid is not None and info['uids'] and info['uids'].real != uid:
+                    continue
+                if not PLAYWRIGHT_PROFILE_RE.search(_command_line(process)):
+                    continue
+                logger.warning(f"Killing orphaned browser process {info['pid']}")
+                if self.kill_tree(info['pid']):
+                    killed += 1
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        self.orphans_killed += killed
+        return killed
+
+    def sample(self, browsers: List[Any]) -> int:
+        """
+        Measure every pooled browser and mark the ones over the memory limits for recycling
+
+        Args:
+            browsers: PooledBrowser instances
+
+        Returns:
+            Number of browsers newly marked for recycling
+        """
+        if not self.enabled:
+            return 0
+        self.samples += 1
+        marked = 0
+        total_rss = 0.0
+        for pooled_browser in browsers:
+            if not pooled_browser.pid:
+                continue
+            memory = self.tree_memory(pooled_browser.pid)
+            if memory is None:
+                continue
+            pooled_browser.memory = memory
+            total_rss += memory['rss_mb']
+            over_limit = (
+                memory['rss_mb'] > settings.BROWSER_MAX_RSS_MB or
+                memory['max_renderer_rss_mb'] > settings.BROWSER_MAX_RENDERER_RSS_MB
+            )
+            if over_limit and not pooled_browser.over_memory:
+                pooled_browser.over_memory = True
+                marked += 1
+                self.memory_recycles += 1
+                logger.warning(f"Pooled {pooled_browser.engine} browser {pooled_browser.browser_id} uses "
+                               f"{memory['rss_mb']:.0f} MB (largest renderer {memory['max_renderer_rss_mb']:.0f} MB), "
+                               f"recycling once its contexts finish")
+        self.last_total_rss_mb = round(total_rss, 1)
+        self.peak_total_rss_mb = max(self.peak_total_rss_mb, self.last_total_rss_mb)
+        return marked
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get watchdog statistics"""
+        stats = {
+            'enabled': self.enabled,
+            'psutil_available': PSUTIL_AVAILABLE,
+            'max_rss_mb': settings.BROWSER_MAX_RSS_MB,
+            'max_renderer_rss_mb': settings.BROWSER_MAX_RENDERER_RSS_MB,
+            'samples': self.samples,
+            'total_browser_rss_mb': self.last_total_rss_mb,
+            'peak_browser_rss_mb': self.peak_total_rss_mb,
+            'memory_recycles': self.memory_recycles,
+            'orphans_killed': self.orphans_killed,
+        }
+        if self.enabled:
+            try:
+                stats['host_available_mb'] = round(psutil.virtual_memory().available / MB)
+                stats['service_rss_mb'] = round(psutil.Process().memory_info().rss / MB, 1)
+            except Exception:
+                pass
+        return stats
+
+
+# Global memory watchdog instance
+memory_watchdog = MemoryWatchdog()
@@ -42,6 +42,21 @@ class ProductInfo(BaseModel):
     specifications: Dict[str, Any] = {}
 
 
+class SnapshotReextractRequest(BaseModel):
+    url: Optional[str] = Field(None, description="Only re-extract snapshots of this URL")
+    platform: Optional[str] = Field(None, description="Only re-extract snapshots of this platform")
+    since: Optional[datetime] = Field(None, description="Only re-extract snapshots fetched at or after this time")
+    latest_only: bool = Field(True, description="Only use the newest snapshot of each URL")
+    limit: Optional[int] = Field(None, description="Maximum number of snapshots to re-extract")
+    workers: Optional[int] = Field(None, description="Worker processes (defaults to SNAPSHOT_REEXTRACT_WORKERS / CPU count)")
+    include_products: bool = Field(True, description="Return the extracted products, not just the summary")
+
+
+class PlatformMemoOverrideRequest(BaseModel):
+    platform: str = Field(..., description="Platform to use for the domain (e.g. 'shopify', 'woocommerce')")
+    fetch_tier: Optional[str] = Field(None, description="Fetch tier to start with ('http' or 'browser')")
+
+
 class TaskStatusResponse(BaseModel):
     task_id: str
     status: TaskStatus
@@ -0,0 +1,201 @@
+import asyncio
+import time
+from typing import Optional, Dict, Any
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
+from app.config import settings
+from app.logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Signals that mean product data is on the page for any platform
+GENERIC_READY_SIGNALS = {
+    'selectors': [
+        '[itemprop="price"]',
+        'meta[property="product:price:amount"]',
+        'meta[property="og:price:amount"]',
+    ],
+    'globals': [],
+    'json_ld': True,
+}
+
+# Extra per-platform signals: a populated price element or a JS data object
+PLATFORM_READY_SIGNALS = {
+    'amazon': {
+        'selectors': ['#corePrice_feature_div .a-offscreen', '.a-price .a-offscreen', '.a-price-whole'],
+    },
+    'ebay': {
+        'selectors': ['.x-price-primary'],
+    },
+    'otto': {
+        'selectors': ['.pdp_price__price-parts'],
+    },
+    'bol': {
+        'selectors': ['[data-test="price"]', '.promo-price'],
+    },
+    'jd': {
+        'selectors': ['.p-price .price'],
+    },
+    'cdiscount': {
+        'selectors': ['.c-price[itemprop="price"]', '.c-price--promo', '#DisplayPrice'],
+    },
+    'shopify': {
+        'selectors': ['[data-product-json]', 'script[type="application/json"][data-product-json]'],
+        'globals': ['ShopifyAnalytics.meta.product'],
+    },
+    'woocommerce': {
+        'selectors': ['.summary .price .amount', '.product .price .woocommerce-Price-amount'],
+    },
+    'bigcommerce': {
+        'selectors': ['[data-product-price-with-tax]', '[data-product-price-without-tax]', '.productView-price .price'],
+        'globals': ['BCData.product_attributes'],
+    },
+    'squarespace': {
+        'selectors': ['.product-price', '[data-product-price]'],
+        'globals': ['Static.SQUARESPACE_CONTEXT.product'],
+    },
+}
+
+# Runs inside the page on every poll. The first call installs a MutationObserver that
+# records the time of the last DOM change, so quiescence is measured by the page itself.
+READY_PREDICATE_JS = """
+(cfg) => {
+    const w = window;
+    if (!w.__scraperReadiness) {
+        w.__scraperReadiness = { lastMutation: performance.now() };
+        const observer = new MutationObserver(() => { w.__scraperReadiness.lastMutation = performance.now(); });
+        observer.observe(document.documentElement, { childList: true, subtree: true, characterData: true });
+    }
+    const quietFor = performance.now() - w.__scraperReadiness.lastMutation;
+
+    const populated = (selector) => {
+        try {
+            const el = document.querySelector(selector);
+            return !!(el && (el.textContent || el.getAttribute('content') || '').trim());
+        } catch (e) {
+            return false;
+        }
+    };
+    const defined = (path) => {
+        try {
+            return path.split('.').reduce((obj, key) => (obj == null ? undefined : obj[key]), w) != null;
+        } catch (e) {
+            return false;
+        }
+    };
+    const productJsonLd = () => Array.from(document.querySelectorAll('script[type="application/ld+json"]'))
+        .some((script) => /"@type"\\s*:\\s*\\[?\\s*"Product"/.test(script.textContent || ''));
+
+    const dataReady = cfg.selectors.some(populated) || cfg.globals.some(defined) || (cfg.jsonLd && productJsonLd());
+    if (dataReady) {
+        return quietFor >= cfg.quietMs ? 'data' : false;
+    }
+    // No data signal yet - accept a fully loaded page that has stopped changing for longer
+    return document.readyState === 'complete' && quietFor >= cfg.fallbackQuietMs ? 'quiet' : false;
+}
+"""
+
+
+class PageReadiness:
+    """Waits until a page holds the product data we need instead of sleeping for fixed times"""
+
+    def __init__(self):
+        self.stats: Dict[str, Dict[str, Any]] = {}
+
+    def get_signals(self, platform: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Build the readiness signals for a platform
+
+        Args:
+            platform: Platform name hint (None for generic pages)
+
+        Returns:
+            Dictionary with selectors, globals and json_ld flag
+        """
+        platform_signals = PLATFORM_READY_SIGNALS.get((platform or '').lower(), {})
+        return {
+            'selectors': platform_signals.get('selectors', []) + GENERIC_READY_SIGNALS['selectors'],
+            'globals': platform_signals.get('globals', []) + GENERIC_READY_SIGNALS['globals'],
+            'json_ld': GENERIC_READY_SIGNALS['json_ld'],
+        }
+
+    async def wait_until_ready(self, page: Page, platform: Optional[str] = None, budget_ms: Optional[int] = None) -> bool:
+        """
+        Wait until product data is present and the DOM is quiet, within a hard budget
+
+        Args:
+            page: Playwright page object
+            platform: Platform name hint used to pick ready predicates
+            budget_ms: Hard time budget in milliseconds (uses config default if None)
+
+        Returns:
+            True if the page became ready, False if the budget ran out
+        """
+        if budget_ms is None:
+            budget_ms = settings.BROWSER_PAGE_COMPLETION_TIMEOUT
+
+        signals = self.get_signals(platform)
+        cfg = {
+            'selectors': signals['selectors'],
+            'globals': signals['globals'],
+            'jsonLd': signals['json_ld'],
+            'quietMs': settings.BROWSER_READY_QUIET_MS,
+            'fallbackQuietMs': settings.BROWSER_READY_FALLBACK_QUIET_MS,
+        }
+
+        start_time = time.time()
+        deadline = start_time + budget_ms / 1000.0
+        reason = 'budget'
+
+        while True:
+            remaining_ms = int((deadline - time.time()) * 1000)
+            if remaining_ms <= 0:
+                break
+            try:
+                handle = await page.wait_for_function(
+                    READY_PREDICATE_JS,
+                    arg=cfg,
+                    polling=settings.BROWSER_READY_POLL_INTERVAL,
+                    timeout=remaining_ms
+                )
+                reason = await handle.json_value()
+                break
+            except PlaywrightTimeoutError:
+                break
+            except Exception as e:
+                # Usually a navigation/redirect destroyed the execution context - poll the new document
+                logger.debug(f"Readiness check interrupted, retrying: {e}")
+                await asyncio.sleep(settings.BROWSER_READY_POLL_INTERVAL / 1000.0)
+
+        elapsed_ms = int((time.time() - start_time) * 1000)
+        self._record(platform, reason, elapsed_ms)
+
+        if reason == 'budget':
+            logger.warning(f"Page readiness budget of {budget_ms}ms exhausted (platform: {platform or 'generic'})")
+            return False
+
+        logger.info(f"Page ready in {elapsed_ms}ms via {reason} signal (platform: {platform or 'generic'})")
+        return True
+
+    def _record(self, platform: Optional[str], reason: str, elapsed_ms: int):
+        entry = self.stats.setdefault(platform or 'generic', {'data': 0, 'quiet': 0, 'budget': 0, 'total_ms': 0, 'count': 0})
+        entry[reason] = entry.get(reason, 0) + 1
+        entry['total_ms'] += elapsed_ms
+        entry['count'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-platform readiness statistics"""
+        return {
+            platform: {
+                'ready_by_data': entry['data'],
+                'ready_by_quiet': entry['quiet'],
+                'budget_exhausted': entry['budget'],
+                'avg_wait_ms': round(entry['total_ms'] / entry['count']) if entry['count'] else 0,
+            }
+            for platform, entry in self.stats.items()
+        }
+
+
+# Global page readiness instance
+page_readiness = PageReadiness()
@@ -0,0 +1,475 @@
+import html
+import re
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple, Set
+from app.logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Platform detection indicators for HTML analysis
+PLATFORM_INDICATORS: Dict[str, Dict[str, List[str]]] = {
+    'shopify': {
+        'patterns': [
+            r'Shopify\.theme',
+            r'shopify-section',
+            r'shopify\.analytics',
+            r'shopify\.checkout',
+            r'Shopify\.routes',
+            r'Shopify\.locale',
+            r'shop\.myshopify\.com',
+            r'window\.Shopify',
+            r'Shopify\.money_format',
+            r'Shopify\.country',
+            r'ShopifyAnalytics',
+            r'cdn\.shopify\.com',
+            r'shopifycloud\.com',
+        ],
+        'meta_tags': [
+            'shopify-digital-wallet',
+            'shopify-checkout-api-token',
+            'shopify-platform',
+        ],
+        'script_sources': [
+            'cdn.shopify.com',
+            'shopifycloud.com',
+            'monorail-edge.shopifysvc.com',
+        ],
+        'css_classes': [
+            'shopify-section',
+            'shopify-block',
+            'shopify-payment-button',
+        ],
+    },
+    'bigcommerce': {
+        'patterns': [
+            r'window\.product_attributes',
+            r'window\.BCData',
+            r'window\.product',
+            r'BigCommerce',
+            r'bigcommerce',
+            r'BC\.',
+            r'bc\.',
+        ],
+        'meta_tags': [
+            'bigcommerce-platform',
+            'bc-platform',
+        ],
+        'script_sources': [
+            'cdn.bigcommerce.com',
+            'bigcommerce.com',
+            'api.bigcommerce.com',
+        ],
+        'css_classes': [
+            'productView',
+            'productView-title',
+            'productView-price',
+            'productView-description',
+            'productView-image',
+        ],
+    },
+    'squarespace': {
+        'patterns': [
+            r'squarespace',
+            r'static1\.squarespace\.com',
+            r'assets\.squarespace\.com',
+            r'sqsp\.net',
+            r'squarespace-cdn',
+            r'Squarespace',
+            r'SQUARESPACE_ROLLUPS',
+            r'squarespace\.com',
+            r'Y\.Squarespace',
+        ],
+        'meta_tags': [
+            'squarespace-platform-preview',
+            'generator.*squarespace',
+        ],
+        'script_sources': [
+            'squarespace.com',
+            'squarespacestatus.com',
+            'static1.squarespace.com',
+            'assets.squarespace.com',
+        ],
+        'css_classes': [
+            'squarespace',
+            'sqs-',
+            'sqsrte-',
+        ],
+    },
+    'woocommerce': {
+        'patterns': [
+            r'wp-content\/plugins\/woocommerce',
+            r'woocommerce\.js',
+            r'wc-ajax',
+            r'wc_add_to_cart_params',
+            r'wc_single_product_params',
+            r'woocommerce_params',
+            r'wc_cart_fragments_params',
+            r'wc_cart_hash',
+            r'woocommerce-cart',
+            r'woocommerce-checkout',
+            r'add-to-cart',
+            r'WooCommerce',
+            r'woocommerce\.min\.js',
+            r'woocommerce\.css',
+            r'woocommerce\.min\.css',
+        ],
+        'meta_tags': [
+            'woocommerce-enabled',
+            'generator.*woocommerce',
+            'woocommerce-version',
+        ],
+        'script_sources': [
+            'wp-content/plugins/woocommerce',
+            'woocommerce/assets',
+            'woocommerce.js',
+            'woocommerce.min.js',
+        ],
+    },
+    'wordpress': {
+        'patterns': [
+            r'wp-content',
+            r'wp-includes',
+            r'wp-admin',
+            r'wordpress',
+            r'wp_nonce',
+            r'wpdb',
+            r'wp-json',
+            r'rest_route',
+            r'wp_ajax',
+            r'WordPress',
+        ],
+        'meta_tags': [
+            'generator.*wordpress',
+            'generator.*WordPress',
+        ],
+        'script_sources': [
+            'wp-includes',
+            'wp-content',
+            'wp-admin',
+        ],
+        'css_classes': [
+            'wp-',
+            'wordpress',
+            'wp-block',
+        ],
+    },
+    'magento': {
+        'patterns': [
+            r'magento',
+            r'mage\/cookies',
+            r'skin\/frontend',
+            r'Mage\.Cookies',
+            r'MAGENTO_ROOT',
+            r'Magento',
+            r'mage\/js',
+            r'checkout\/cart',
+            r'customer\/account',
+            r'Mage\.apply',
+            r'magentosite',
+        ],
+        'meta_tags': [
+            'magento',
+            'generator.*magento',
+        ],
+        'script_sources': [
+            'magento',
+            'mage/',
+        ],
+        'css_classes': [
+            'magento',
+            'catalog-product',
+            'checkout-cart',
+            'page-layout-',
+            'cms-',
+        ],
+    },
+    'webflow': {
+        'patterns': [
+            r'webflow',
+            r'assets\.website-files\.com',
+            r'uploads-ssl\.webflow\.com',
+            r'Webflow',
+            r'w-node-',
+            r'w-embed',
+            r'webflow\.js',
+            r'wf-active',
+            r'wf-loading',
+        ],
+        'meta_tags': [
+            'webflow-platform',
+            'generator.*webflow',
+        ],
+        'script_sources': [
+            'webflow.com',
+            'assets.website-files.com',
+            'uploads-ssl.webflow.com',
+        ],
+        'css_classes': [
+            'w-node-',
+            'w-embed',
+            'w-form',
+            'w-button',
+            'w-tab',
+            'w-slider',
+        ],
+    },
+    'wix': {
+        'patterns': [
+            r'wixstatic\.com',
+            r'parastorage\.com',
+            r'static\.wixstatic\.com',
+            r'wix-code-public-path',
+            r'Wix\.com',
+            r'WixSite',
+            r'SITE_CONTAINER',
+            r'wix\.com',
+            r'wixapps\.net',
+            r'wix_typography',
+        ],
+        'meta_tags': [
+            'wix-platform',
+            'generator.*wix',
+        ],
+        'script_sources': [
+            'wix.com',
+            'wixstatic.com',
+            'parastorage.com',
+            'wixapps.net',
+        ],
+        'css_classes': [
+            'wixui-',
+            'SITE_CONTAINER',
+            'mesh-layout',
+            'wix-ads',
+        ],
+    },
+}
+
+# Opening <meta> and <script> tags (attribute values may contain '>'); comments are
+# matched only to be skipped, like script bodies (see SCRIPT_END_RE)
+TAG_RE = re.compile(r'''<!--.*?(?:-->|$)|<(meta|script)\b((?:[^>"']|"[^"]*"|'[^']*')*)>''', re.IGNORECASE | re.DOTALL)
+SCRIPT_END_RE = re.compile(r'</script', re.IGNORECASE)
+ATTRIBUTE_RE = re.compile(r'''([^\s=/>"']+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>"']+)))?''')
+
+# Backslash escapes of punctuation, the only regex syntax a literal pattern may contain
+ESCAPED_PUNCTUATION_RE = re.compile(r'\\([^\w\s])')
+REGEX_SYNTAX_RE = re.compile(r'[.^$*+?{}\[\]|()\\]')
+
+
+def _as_literal(pattern: str) -> Optional[str]:
+    """Lowercase literal text of a pattern, or None if it uses regex syntax"""
+    unescaped = ESCAPED_PUNCTUATION_RE.sub('', pattern)
+    if REGEX_SYNTAX_RE.search(unescaped):
+        return None
+    return ESCAPED_PUNCTUATION_RE.sub(r'\1', pattern).lower()
+
+
+def _can_hide(hiding: str, literal: str) -> bool:
+    """Check if a match of one literal can cover the start of another (so the combined scan skips it)"""
+    if literal in hiding and literal != hiding:
+        return True
+    # A match of a literal can also overlap the next occurrence of itself
+    return any(literal.startswith(hiding[i:]) for i in range(1 if literal == hiding else 0, len(hiding)))
+
+
+def _trie_pattern(literals: List[str]) -> str:
+    """
+    Build one regex matching any of the literals, nested by common prefix
+
+    Python's regex engine tries alternatives one after another at every position,
+    so a flat alternation of ~80 literals costs ~80 checks per character; the trie
+    form only follows the branch of the next character.
+    """
+    trie: Dict[str, Any] = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and '' not in node:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        # Optional when a literal ends here, so longer literals are preferred
+        return group + '?' if '' in node else group
+
+    return build(trie)
+
+
+class PlatformDetector:
+    """
+    Detects the e-commerce platform from page HTML in one pass.
+
+    All indicator patterns are compiled once into a single prefix-trie regex and
+    the lowercased page is scanned once, counting every indicator; only indicators
+    a longer match may have covered are recounted exactly. Meta tags and external
+    script sources come from one regex pass over the opening <meta>/<script> tags
+    instead of a BeautifulSoup tree.
+    """
+
+    def __init__(self, indicators: Optional[Dict[str, Dict[str, List[str]]]] = None):
+        self._lock = threading.Lock()
+        self.indicators = indicators if indicators is not None else PLATFORM_INDICATORS
+        self.detections = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._compile()
+
+    def _compile(self):
+        # Distinct literals across all platforms (matching is case-insensitive)
+        self._literals: Dict[str, str] = {}
+        self._regexes: Dict[str, re.Pattern] = {}
+        for config in self.indicators.values():
+            for pattern in config.get('patterns', []):
+                literal = _as_literal(pattern)
+                if literal is None:
+                    self._regexes[pattern] = re.compile(pattern, re.IGNORECASE)
+                else:
+                    self._literals[pattern] = literal
+
+        literals = sorted(set(self._literals.values()))
+        self._scan_re = re.compile(_trie_pattern(literals)) if literals else None
+        # Literals whose occurrences a match of another literal (or of themselves) may
+        # have covered - these are counted exactly once that literal was seen
+        self._hidden_by: Dict[str, Set[str]] = {
+            hiding: {literal for literal in literals if _can_hide(hiding, literal)}
+            for hiding in literals
+        }
+        self._meta_res = {
+            pattern: re.compile(pattern, re.IGNORECASE)
+            for config in self.indicators.values() for pattern in config.get('meta_tags', [])
+        }
+
+    def _count_patterns(self, html_content: str) -> Dict[str, int]:
+        lowered = html_content.lower()
+        counts: Dict[str, int] = {}
+        if self._scan_re is not None:
+            for literal in self._scan_re.findall(lowered):
+                counts[literal] = counts.get(literal, 0) + 1
+            recount: Set[str] = set()
+            for literal in counts:
+                recount |= self._hidden_by[literal]
+            for literal in recount:
+                counts[literal] = lowered.count(literal)
+        return {
+            pattern: counts.get(literal, 0) for pattern, literal in self._literals.items()
+        } | {
+            pattern: len(regex.findall(html_content)) for pattern, regex in self._regexes.items()
+        }
+
+    def _scan_tags(self, html_content: str) -> Tuple[List[str], List[str]]:
+        meta_texts = []
+        script_sources = []
+        position = 0
+        while True:
+            match = TAG_RE.search(html_content, position)
+            if match is None:
+                break
+            position = match.end()
+            if match.group(1) is None:
+                continue
+            attributes = {}
+            for name, double, single, bare in ATTRIBUTE_RE.findall(match.group(2)):
+                attributes[name.lower()] = html.unescape(double or single or bare)
+            if match.group(1).lower() == 'meta':
+                meta_texts.append(' '.join([
+                    attributes.get('content', ''),
+                    attributes.get('name', ''),
+                    attributes.get('property', ''),
+                    attributes.get('http-equiv', ''),
+                ]))
+            else:
+                if attributes.get('src'):
+                    script_sources.append(attributes['src'])
+                # Markup inside a script body is not a tag
+                script_end = SCRIPT_END_RE.search(html_content, position)
+                position = script_end.end() if script_end else len(html_content)
+        return meta_texts, script_sources
+
+    def detect(self, html_content: str) -> Tuple[Optional[str], float, List[str]]:
+        """
+        Detect the platform from HTML content
+
+        Args:
+            html_content: Page HTML
+
+        Returns:
+            Tuple of (platform, confidence, indicators)
+        """
+        start_time = time.perf_counter()
+        pattern_counts = self._count_patterns(html_content)
+        meta_texts, script_sources = self._scan_tags(html_content)
+
+        scores = {}
+        all_indicators = {}
+        for platform, config in self.indicators.items():
+            score = 0
+            indicators = []
+
+            # 1. HTML patterns (anywhere in the page) - most reliable
+            for pattern in config.get('patterns', []):
+                match_count = pattern_counts[pattern]
+                if match_count:
+                    score += min(0.4 * match_count, 0.8)
+                    indicators.append(f"HTML pattern '{pattern}' found {match_count} time(s)")
+
+            # 2. Meta tags (content, name, property, http-equiv) - very reliable
+            for meta_pattern in config.get('meta_tags', []):
+                if any(self._meta_res[meta_pattern].search(text) for text in meta_texts):
+                    score += 0.6
+                    indicators.append(f"Meta tag pattern: {meta_pattern}")
+
+            # 3. External script sources - reliable
+            for script_pattern in config.get('script_sources', []):
+                for src in script_sources:
+                    if script_pattern in src:
+                        score += 0.5
+                        indicators.append(f"External script: {script_pattern}")
+
+            if score > 0:
+                scores[platform] = min(score, 1.0)
+                all_indicators[platform] = indicators
+
+        # WooCommerce is WordPress-based: prefer it when detected with decent confidence,
+        # drop it when the WordPress score is much higher
+        if 'wordpress' in scores and 'woocommerce' in scores:
+            if scores['woocommerce'] >= 0.3:
+                scores.pop('wordpress', None)
+                all_indicators.pop('wordpress', None)
+            elif scores['wordpress'] > scores['woocommerce'] * 2:
+                scores.pop('woocommerce', None)
+                all_indicators.pop('woocommerce', None)
+
+        self._record(time.perf_counter() - start_time)
+        if not scores:
+            return None, 0.0, ["No platform indicators found"]
+
+        best_platform = max(scores, key=scores.get)
+        return best_platform, scores[best_platform], all_indicators[best_platform]
+
+    def _record(self, seconds: float):
+        with self._lock:
+            self.detections += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get detection count and timing"""
+        return {
+            'detections': self.detections,
+            'avg_ms': round(self.total_seconds / self.detections * 1000, 3) if self.detections else None,
+            'max_ms': round(self.max_seconds * 1000, 3),
+            'patterns': len(self._literals) + len(self._regexes),
+            'distinct_literals': len(set(self._literals.values())),
+        }
+
+
+# Global platform detector instance
+platform_detector = PlatformDetector()
@@ -0,0 +1,270 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Optional, Dict, Any, List, Tuple
+from urllib.parse import urlparse
+from app.config import settings
+from app.logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Where a remembered platform came from
+SOURCE_DETECTED = 'detected'
+SOURCE_OVERRIDE = 'override'  # Set through the admin endpoint, never re-verified
+
+# Seconds a domain without an entry is remembered as unknown before Mongo is asked again
+MISS_CACHE_SECONDS = 300
+
+
+@dataclass
+class PlatformMemoEntry:
+    """Platform (and fetch tier) remembered for one storefront domain"""
+    domain: str
+    platform: str
+    confidence: float
+    source: str = SOURCE_DETECTED
+    fetch_tier: Optional[str] = None
+    verified_at: float = 0.0
+    detections: int = 0
+
+    def is_stale(self, now: Optional[float] = None) -> bool:
+        """Check if the platform is due for re-verification from the page HTML"""
+        if self.source == SOURCE_OVERRIDE:
+            return False
+        return (now or time.time()) - self.verified_at > settings.PLATFORM_MEMO_TTL
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PlatformMemoEntry':
+        return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
+
+
+class PlatformMemo:
+    """
+    Learned domain -> platform table.
+
+    A storefront domain does not change platform between requests, so confident
+    detections are stored in Mongo (collection domain_platforms) with an LRU of
+    PLATFORM_MEMO_LRU_SIZE domains in front. Remembered domains skip HTML analysis
+    until the entry is older than PLATFORM_MEMO_TTL, when the next scrape detects
+    again and refreshes it. The platform and the fetch tier that last worked are
+    known before the page is fetched, so per-platform scheduling, readiness and
+    the HTTP/browser tier choice apply from the first request of a new process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache: 'OrderedDict[str, Tuple[Optional[PlatformMemoEntry], float]]' = OrderedDict()
+        self._collection_checked = False
+        self.lru_hits = 0
+        self.mongo_hits = 0
+        self.misses = 0
+        self.remembered = 0
+        self.changed = 0
+
+    def get_domain(self, url: str) -> str:
+        """Domain key of a URL or bare domain (without www.)"""
+        domain = (urlparse(url if '//' in url else f'//{url}').hostname or url).lower()
+        return domain[4:] if domain.startswith('www.') else domain
+
+    def _collection(self):
+        """Mongo collection of the memo, or None while Mongo is unavailable"""
+        try:
+            from app.utils.task_management import task_manager
+            if not task_manager.mongodb_available or task_manager.mongodb.database is None:
+                return None
+            collection = task_manager.mongodb.database.domain_platforms
+            if not self._collection_checked:
+                collection.create_index('domain', unique=True)
+                self._collection_checked = True
+            return collection
+        except Exception as e:
+            logger.warning(f"Platform memo collection unavailable: {e}")
+            return None
+
+    def _cache_put(self, domain: str, entry: Optional[PlatformMemoEntry]):
+        with self._lock:
+            self._cache[domain] = (entry, time.time())
+            self._cache.move_to_end(domain)
+            while len(self._cache) > settings.PLATFORM_MEMO_LRU_SIZE:
+                self._cache.popitem(last=False)
+
+    def _save(self, entry: PlatformMemoEntry):
+        self._cache_put(entry.domain, entry)
+        collection = self._collection()
+        if collection is None:
+            return
+        try:
+            collection.replace_one({'domain': entry.domain}, entry.to_dict(), upsert=True)
+        except Exception as e:
+            logger.warning(f"Failed to store platform memo for {entry.domain}: {e}")
+
+    def lookup(self, url: str) -> Optional[PlatformMemoEntry]:
+        """
+        Get the remembered platform of a URL's domain
+
+        Args:
+            url: Product URL (or bare domain)
+
+        Returns:
+            The entry (check is_stale() before trusting it), or None if the domain is unknown
+        """
+        if not settings.PLATFORM_MEMO_ENABLED:
+            return None
+        domain = self.get_domain(url)
+        with self._lock:
+            cached = self._cache.get(domain)
+            if cached and (cached[0] is not None or time.time() - cached[1] < MISS_CACHE_SECONDS):
+                self._cache.move_to_end(domain)
+                if cached[0] is None:
+                    self.misses += 1
+                else:
+                    self.lru_hits += 1
+                return cached[0]
+
+        entry = None
+        collection = self._collection()
+        if collection is not None:
+            try:
+                document = collection.find_one({'domain': domain}, {'_id': 0})
+                entry = PlatformMemoEntry.from_dict(document) if document else None
+            except Exception as e:
+                logger.warning(f"Failed to read platform memo for {domain}: {e}")
+                return None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.mongo_hits += 1
+        self._cache_put(domain, entry)
+        return entry
+
+    def remember(self, url: str, platform: Optional[str], confidence: float):
+        """
+        Store a detection of a domain's platform (only confident ones are kept)
+
+        Args:
+            url: Scraped URL
+            platform: Detected platform
+            confidence: Detection confidence
+        """
+        if not settings.PLATFORM_MEMO_ENABLED or not platform or confidence < settings.PLATFORM_MEMO_MIN_CONFIDENCE:
+            return
+        current = self.lookup(url)
+        if current and current.source == SOURCE_OVERRIDE:
+            return
+        domain = self.get_domain(url)
+        if current and current.platform != platform:
+            logger.info(f"Platform of {domain} changed from {current.platform} to {platform} on re-verification")
+            with self._lock:
+                self.changed += 1
+        with self._lock:
+            self.remembered += 1
+        self._save(PlatformMemoEntry(
+            domain=domain,
+            platform=platform,
+            confidence=round(confidence, 3),
+            fetch_tier=current.fetch_tier if current and current.platform == platform else None,
+            verified_at=time.time(),
+            detections=(current.detections if current else 0) + 1,
+        ))
+
+    def record_tier(self, url: str, fetch_tier: str):
+        """Remember the fetch tier that produced a product for a known domain"""
+        entry = self.lookup(url)
+        if entry is None or entry.fetch_tier == fetch_tier:
+            return
+        self._save(PlatformMemoEntry(**{**entry.to_dict(), 'fetch_tier': fetch_tier}))
+
+    def override(self, domain: str, platform: str, fetch_tier: Optional[str] = None) -> PlatformMemoEntry:
+        """
+        Pin the platform of a domain (detections no longer replace it)
+
+        Args:
+            domain: Domain or URL
+            platform: Platform to use for the domain
+            fetch_tier: Optional fetch tier to start with
+
+        Returns:
+            The stored entry
+        """
+        entry = PlatformMemoEntry(
+            domain=self.get_domain(domain),
+            platform=platform,
+            confidence=1.0,
+            source=SOURCE_OVERRIDE,
+            fetch_tier=fetch_tier,
+            verified_at=time.time(),
+        )
+        self._save(entry)
+        logger.info(f"Platform of {entry.domain} overridden to {platform}")
+        return entry
+
+    def forget(self, domain: str) -> bool:
+        """
+        Drop the entry of a domain so its platform is detected again
+
+        Returns:
+            True if an entry existed
+        """
+        key = self.get_domain(domain)
+        with self._lock:
+            cached = self._cache.pop(key, None)
+        existed = bool(cached and cached[0])
+        collection = self._collection()
+        if collection is not None:
+            try:
+                existed = collection.delete_one({'domain': key}).deleted_count > 0 or existed
+            except Exception as e:
+                logger.warning(f"Failed to delete platform memo for {key}: {e}")
+        return existed
+
+    def list_entries(self, domain: Optional[str] = None, platform: Optional[str] = None, limit: int = 100) -> List[PlatformMemoEntry]:
+        """
+        List remembered domains, most recently verified first
+
+        Args:
+            domain: Only entries whose domain contains this text
+            platform: Only entries of this platform
+            limit: Maximum number of entries
+        """
+        collection = self._collection()
+        if collection is not None:
+            query: Dict[str, Any] = {}
+            if domain:
+                query['domain'] = {'$regex': re.escape(domain.lower())}
+            if platform:
+                query['platform'] = platform
+            documents = collection.find(query, {'_id': 0}).sort('verified_at', -1).limit(limit)
+            return [PlatformMemoEntry.from_dict(document) for document in documents]
+
+        # Without Mongo only the cached entries are known
+        with self._lock:
+            entries = [entry for entry, _ in self._cache.values() if entry is not None]
+        entries = [e for e in entries if (not domain or domain.lower() in e.domain) and (not platform or e.platform == platform)]
+        return sorted(entries, key=lambda e: e.verified_at, reverse=True)[:limit]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get lookup hit rates and write counts"""
+        with self._lock:
+            lookups = self.lru_hits + self.mongo_hits + self.misses
+            return {
+                'enabled': settings.PLATFORM_MEMO_ENABLED,
+                'cached_domains': sum(1 for entry, _ in self._cache.values() if entry is not None),
+                'lru_hits': self.lru_hits,
+                'mongo_hits': self.mongo_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.lru_hits + self.mongo_hits) / lookups, 3) if lookups else 0.0,
+                'remembered': self.remembered,
+                'changed_on_reverification': self.changed,
+            }
+
+
+# Global platform memo instance
+platform_memo = PlatformMemo()
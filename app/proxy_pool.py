@@ -0,0 +1,320 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+from urllib.parse import urlparse
+from app.config import settings
+from app.storage_state_store import get_proxy_identity
+from app.logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Outcomes reported for a fetch through a proxy
+OUTCOME_OK = 'ok'
+OUTCOME_BLOCKED = 'blocked'  # captcha, 403/429, challenge page
+OUTCOME_FAILED = 'failed'    # connection error, timeout, 5xx
+
+# Weight of the newest sample in the latency moving average
+LATENCY_EWMA_ALPHA = 0.3
+
+# Samples on a domain before its own numbers replace the proxy's overall numbers in the score
+MIN_DOMAIN_SAMPLES = 3
+
+# Seconds after which a probe of an ejected proxy that never reported back is given up
+PROBE_TIMEOUT = 120
+
+
+@dataclass
+class ProxyStats:
+    """Outcome counts and latency of one proxy (overall or on one domain)"""
+    requests: int = 0
+    successes: int = 0
+    blocked: int = 0
+    failures: int = 0
+    latency: Optional[float] = None
+
+    def record(self, outcome: Optional[str], latency: Optional[float] = None):
+        if outcome is not None:
+            self.requests += 1
+            if outcome == OUTCOME_OK:
+                self.successes += 1
+            elif outcome == OUTCOME_BLOCKED:
+                self.blocked += 1
+            else:
+                self.failures += 1
+        if latency is not None:
+            self.latency = latency if self.latency is None else (
+                LATENCY_EWMA_ALPHA * latency + (1 - LATENCY_EWMA_ALPHA) * self.latency
+            )
+
+    def score(self) -> float:
+        """Smoothed success rate, discounted by the block rate and latency (higher is better)"""
+        success_rate = (self.successes + 1) / (self.requests + 2)
+        block_rate = self.blocked / self.requests if self.requests else 0.0
+        latency_factor = 1.0 / (1.0 + (self.latency or 0.0) / settings.PROXY_LATENCY_REFERENCE)
+        return success_rate * (1.0 - block_rate) * latency_factor
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'success_rate': round(self.successes / self.requests, 3) if self.requests else None,
+            'block_rate': round(self.blocked / self.requests, 3) if self.requests else None,
+            'failures': self.failures,
+            'avg_latency_ms': round(self.latency * 1000) if self.latency is not None else None,
+        }
+
+
+class CircuitBreaker:
+    """
+    Ejects a proxy after PROXY_CIRCUIT_FAILURES consecutive failures.
+
+    The first ejection lasts PROXY_CIRCUIT_COOLDOWN seconds and doubles with every
+    ejection in a row (up to PROXY_CIRCUIT_MAX_COOLDOWN). After the cooldown one
+    probe request is let through: success closes the circuit, failure ejects again.
+    """
+
+    def __init__(self):
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.open_until = 0.0
+        self.probe_started = 0.0
+
+    def is_open(self, now: float) -> bool:
+        return self.open_until > now
+
+    def allows(self, now: float) -> bool:
+        """Check if a request may go out (closed, or cooled down and no probe in flight)"""
+        if self.is_open(now):
+            return False
+        return not self.probe_started or now - self.probe_started > PROBE_TIMEOUT
+
+    def on_acquire(self, now: float):
+        # The first request after a cooldown is the probe
+        if self.consecutive_failures >= settings.PROXY_CIRCUIT_FAILURES and not self.is_open(now):
+            self.probe_started = now
+
+    def record(self, success: bool, now: float) -> bool:
+        """
+        Record an outcome
+
+        Returns:
+            True if the circuit just opened
+        """
+        probe_failed = bool(self.probe_started) and not success
+        self.probe_started = 0.0
+        if success:
+            self.consecutive_failures = 0
+            self.ejections = max(0, self.ejections - 1)
+            return False
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= settings.PROXY_CIRCUIT_FAILURES or probe_failed:
+            cooldown = min(settings.PROXY_CIRCUIT_MAX_COOLDOWN, settings.PROXY_CIRCUIT_COOLDOWN * 2 ** self.ejections)
+            self.ejections += 1
+            self.open_until = now + cooldown
+            return True
+        return False
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            'open': self.is_open(now),
+            'reopens_in_seconds': round(self.open_until - now, 1) if self.is_open(now) else 0,
+            'ejections': self.ejections,
+            'consecutive_failures': self.consecutive_failures,
+        }
+
+
+class ProxyEndpoint:
+    """One proxy exit with its overall and per-domain health"""
+
+    def __init__(self, proxy: str):
+        self.proxy = proxy
+        self.label = get_proxy_identity(proxy)
+        self.stats = ProxyStats()
+        # Connection failures eject the proxy everywhere, blocks only on the domain that blocks it
+        self.circuit = CircuitBreaker()
+        self.domain_stats: Dict[str, ProxyStats] = {}
+        self.domain_circuits: Dict[str, CircuitBreaker] = {}
+
+    def allows(self, domain: str, now: float) -> bool:
+        domain_circuit = self.domain_circuits.get(domain)
+        return self.circuit.allows(now) and (domain_circuit is None or domain_circuit.allows(now))
+
+    def reopens_at(self, domain: str) -> float:
+        domain_circuit = self.domain_circuits.get(domain)
+        return max(self.circuit.open_until, domain_circuit.open_until if domain_circuit else 0.0)
+
+    def score(self, domain: str) -> float:
+        domain_stats = self.domain_stats.get(domain)
+        if domain_stats and domain_stats.requests >= MIN_DOMAIN_SAMPLES:
+            return domain_stats.score()
+        return self.stats.score()
+
+
+class ProxyPool:
+    """
+    Health-scored pool of the configured proxies (PROXY_LIST and Decodo).
+
+    Every fetch reports its outcome and latency per proxy and per domain. New
+    tasks get the healthiest proxy for their domain; proxies that keep failing
+    are ejected by a circuit breaker with exponential cooldown. A domain sticks
+    to its proxy for PROXY_STICKY_TTL seconds, so the consent and clearance
+    cookies stored for that exit stay valid, and retries move to the healthiest
+    alternative.
+    """
+
+    def __init__(self, proxies: Optional[List[str]] = None):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, ProxyEndpoint] = {
+            proxy: ProxyEndpoint(proxy) for proxy in (proxies if proxies is not None else self._configured_proxies())
+        }
+        self._sticky: Dict[str, Tuple[str, float]] = {}
+        self.acquisitions = 0
+        self.sticky_hits = 0
+        self.moves = 0
+
+    def _configured_proxies(self) -> List[str]:
+        proxies = [p.strip() for p in settings.PROXY_LIST if p.strip()]
+        if settings.DECODO_USERNAME and settings.DECODO_PASSWORD and settings.DECODO_ENDPOINT:
+            from app.utils.proxy_management import DecodoProxyManager
+            decodo = DecodoProxyManager(
+                username=settings.DECODO_USERNAME,
+                password=settings.DECODO_PASSWORD,
+                proxy_endpoint=settings.DECODO_ENDPOINT,
+                proxy_type=settings.DECODO_PROXY_TYPE
+            )
+            if settings.DECODO_STICKY_SESSIONS > 0:
+                # Each session keeps its exit IP, so each is scored as its own proxy
+                proxies.extend(decodo.get_session_proxy(f"s{i}") for i in range(settings.DECODO_STICKY_SESSIONS))
+            else:
+                proxies.append(decodo.get_proxy())
+        return proxies
+
+    def _get_domain(self, url: str) -> str:
+        domain = (urlparse(url).hostname or '').lower()
+        return domain[4:] if domain.startswith('www.') else domain
+
+    def is_managed(self, proxy: Optional[str]) -> bool:
+        """Check if a proxy belongs to the pool (proxies passed in by API callers are not tracked)"""
+        return bool(proxy) and proxy in self._endpoints
+
+    def acquire(self, url: str, exclude: Iterable[str] = ()) -> Optional[str]:
+        """
+        Pick the proxy for a fetch of a URL
+
+        Args:
+            url: URL about to be fetched
+            exclude: Proxies that already failed for this task
+
+        Returns:
+            Proxy string, or None if no proxies are configured
+        """
+        if not self._endpoints:
+            return None
+        domain = self._get_domain(url)
+        excluded = set(exclude)
+        now = time.time()
+        with self._lock:
+            self.acquisitions += 1
+            candidates = [e for p, e in self._endpoints.items() if p not in excluded and e.allows(domain, now)]
+
+            # Keep the domain on its proxy while that proxy is healthy
+            sticky = self._sticky.get(domain)
+            if sticky and sticky[1] > now:
+                endpoint = self._endpoints.get(sticky[0])
+                if endpoint in candidates:
+                    self.sticky_hits += 1
+                    return self._take(endpoint, domain, now)
+
+            if excluded:
+                self.moves += 1
+            if not candidates:
+                # Everything is ejected - use the proxy that recovers first rather than going direct
+                remaining = [e for p, e in self._endpoints.items() if p not in excluded] or list(self._endpoints.values())
+                endpoint = min(remaining, key=lambda e: e.reopens_at(domain))
+                logger.warning(f"All proxies are ejected for {domain}, using {endpoint.label}")
+                return endpoint.proxy
+
+            if settings.ROTATE_PROXIES and len(candidates) > 1:
+                # Spread load, favouring healthy proxies strongly
+                weights = [e.score(domain) ** 2 + 1e-6 for e in candidates]
+                endpoint = random.choices(candidates, weights=weights)[0]
+            else:
+                endpoint = max(candidates, key=lambda e: e.score(domain))
+            return self._take(endpoint, domain, now)
+
+    def _take(self, endpoint: ProxyEndpoint, domain: str, now: float) -> str:
+        endpoint.circuit.on_acquire(now)
+        if domain in endpoint.domain_circuits:
+            endpoint.domain_circuits[domain].on_acquire(now)
+        if settings.PROXY_STICKY_TTL > 0:
+            self._sticky[domain] = (endpoint.proxy, now + settings.PROXY_STICKY_TTL)
+        return endpoint.proxy
+
+    def record(self, proxy: Optional[str], url: str, outcome: Optional[str], latency: Optional[float] = None):
+        """
+        Report how a fetch through a proxy went
+
+        Args:
+            proxy: Proxy that was used
+            url: Fetched URL
+            outcome: OUTCOME_OK, OUTCOME_BLOCKED, OUTCOME_FAILED, or None to only record latency
+            latency: Seconds the fetch took
+        """
+        endpoint = self._endpoints.get(proxy) if proxy else None
+        if endpoint is None:
+            return
+        domain = self._get_domain(url)
+        now = time.time()
+        with self._lock:
+            endpoint.stats.record(outcome, latency)
+            endpoint.domain_stats.setdefault(domain, ProxyStats()).record(outcome, latency)
+            if outcome is None:
+                return
+
+            if outcome == OUTCOME_FAILED:
+                opened = endpoint.circuit.record(False, now)
+                scope = 'all domains'
+            else:
+                endpoint.circuit.record(True, now)
+                circuit = endpoint.domain_circuits.setdefault(domain, CircuitBreaker())
+                opened = circuit.record(outcome == OUTCOME_OK, now)
+                scope = domain
+
+            if outcome != OUTCOME_OK:
+                # Let the next task of this domain pick again
+                sticky = self._sticky.get(domain)
+                if sticky and sticky[0] == proxy:
+                    del self._sticky[domain]
+            if opened:
+                reopens_in = endpoint.reopens_at(domain) - now
+                logger.warning(f"Ejected proxy {endpoint.label} for {scope} for {reopens_in:.0f}s after repeated {outcome} fetches")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-proxy health statistics (without credentials)"""
+        now = time.time()
+        with self._lock:
+            proxies = {
+                endpoint.label: {
+                    **endpoint.stats.to_dict(),
+                    'circuit': endpoint.circuit.to_dict(now),
+                    'ejected_domains': [d for d, c in endpoint.domain_circuits.items() if c.is_open(now)],
+                    'domains': {d: s.to_dict() for d, s in endpoint.domain_stats.items()},
+                }
+                for endpoint in self._endpoints.values()
+            }
+            sticky = {d: self._endpoints[p].label for d, (p, expires) in self._sticky.items() if expires > now}
+        return {
+            'size': len(proxies),
+            'acquisitions': self.acquisitions,
+            'sticky_hits': self.sticky_hits,
+            'retry_moves': self.moves,
+            'sticky_domains': sticky,
+            'proxies': proxies,
+        }
+
+
+# Global proxy pool instance
+proxy_pool = ProxyPool()
@@ -0,0 +1,228 @@
+import re
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, FrozenSet, List
+from urllib.parse import urlsplit
+from app.config import settings
+from app.logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Resource types that never carry product data
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'media', 'font'})
+
+# Static asset extensions, matched against the URL path only (never the query string)
+BLOCKED_PATH_PATTERN = r'\.(?:jpe?g|png|gif|webp|avif|svg|bmp|ico|tiff?|woff2?|ttf|otf|eot|mp4|webm|m4v|mp3|ogg)$'
+
+# Image CDN resize parameters - only applied to requests that cannot be documents, scripts or data
+IMAGE_QUERY_RE = re.compile(r'(?:^|&)(?:width|height|crop)=')
+IMAGE_QUERY_EXEMPT_TYPES = frozenset({'document', 'script', 'stylesheet', 'xhr', 'fetch', 'websocket', 'eventsource'})
+
+# Analytics, advertising, session-recording and chat-widget hosts (matched by domain suffix).
+# Review widgets (Yotpo, Trustpilot, Judge.me, ...) are deliberately not listed: extractors read them.
+TRACKER_DOMAINS = frozenset({
+    # Analytics / tag managers
+    'google-analytics.com', 'analytics.google.com', 'googletagmanager.com', 'googletagservices.com',
+    'segment.io', 'cdn.segment.com', 'api.segment.io', 'mixpanel.com', 'amplitude.com',
+    'heap.io', 'heapanalytics.com', 'quantserve.com', 'scorecardresearch.com', 'chartbeat.com',
+    'newrelic.com', 'nr-data.net', 'sentry.io', 'sentry-cdn.com', 'datadoghq-browser-agent.com',
+    'omtrdc.net', 'demdex.net', 'everesttech.net', 'adobedtm.com',
+    # Session recording / heatmaps
+    'hotjar.com', 'hotjar.io', 'clarity.ms', 'fullstory.com', 'mouseflow.com', 'crazyegg.com',
+    'luckyorange.com', 'luckyorange.net', 'contentsquare.net', 'quantummetric.com',
+    # Advertising / retargeting pixels
+    'doubleclick.net', 'googlesyndication.com', 'googleadservices.com', 'adservice.google.com',
+    'connect.facebook.net', 'facebook.net', 'bat.bing.com', 'analytics.tiktok.com', 'ads-twitter.com',
+    'static.ads-twitter.com', 'ct.pinterest.com', 's.pinimg.com', 'sc-static.net', 'snap.licdn.com',
+    'px.ads.linkedin.com', 'criteo.com', 'criteo.net', 'taboola.com', 'outbrain.com', 'adnxs.com',
+    'amazon-adsystem.com', 'adsrvr.org', 'rubiconproject.com', 'pubmatic.com', 'casalemedia.com',
+    'rlcdn.com', 'tapad.com',
+    # Chat widgets / marketing popups
+    'intercom.io', 'intercomcdn.com', 'widget.intercom.io', 'zopim.com', 'zdassets.com',
+    'livechatinc.com', 'tawk.to', 'drift.com', 'driftt.com', 'crisp.chat', 'tidio.co', 'tidiochat.com',
+    'gorgias.chat', 'hs-scripts.com', 'hs-analytics.net', 'hsforms.net', 'static.klaviyo.com',
+    'privy.com', 'justuno.com', 'onesignal.com',
+})
+
+# Per-platform tuning: extra hosts to block, hosts that must never be blocked,
+# and resource types to let through for that platform
+PLATFORM_RULES: Dict[str, Dict[str, List[str]]] = {
+    'amazon': {
+        'block_domains': ['fls-na.amazon.com', 'fls-eu.amazon.com', 'unagi.amazon.com', 'unagi-na.amazon.com'],
+    },
+    'ebay': {
+        'block_domains': ['svcs.ebay.com/ufeservice', 'rover.ebay.com'],
+    },
+    'shopify': {
+        'block_domains': ['monorail-edge.shopifysvc.com', 'shop.app'],
+    },
+}
+
+
+class ResourceCounters:
+    """Request counters for one scraping task"""
+
+    def __init__(self):
+        self.allowed_requests = 0
+        self.allowed_bytes = 0
+        self.blocked_requests = 0
+        self.blocked_by_reason: Dict[str, int] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'allowed_requests': self.allowed_requests,
+            'allowed_bytes': self.allowed_bytes,
+            'blocked_requests': self.blocked_requests,
+            'blocked_by_reason': dict(self.blocked_by_reason),
+        }
+
+
+class ResourceRules:
+    """Compiled blocking rules for one platform"""
+
+    def __init__(self, block_types: FrozenSet[str], block_domains: FrozenSet[str], allow_domains: FrozenSet[str]):
+        self.block_types = block_types
+        self.allow_domains = allow_domains
+        # Entries with a path ("svcs.ebay.com/ufeservice") are matched as host suffix + path prefix
+        self.block_domains = frozenset(d for d in block_domains if '/' not in d)
+        self.block_host_paths = tuple(tuple(d.split('/', 1)) for d in block_domains if '/' in d)
+        self.block_path_re = re.compile(BLOCKED_PATH_PATTERN, re.IGNORECASE)
+
+    @staticmethod
+    def _matches_suffix(host: str, domains: FrozenSet[str]) -> bool:
+        """Check host and each parent domain against a suffix set - O(number of labels)"""
+        if not domains:
+            return False
+        while True:
+            if host in domains:
+                return True
+            dot = host.find('.')
+            if dot == -1:
+                return False
+            host = host[dot + 1:]
+
+    def classify(self, resource_type: str, url: str) -> Optional[str]:
+        """
+        Decide whether a request should be blocked
+
+        Args:
+            resource_type: Playwright resource type
+            url: Request URL
+
+        Returns:
+            Block reason, or None if the request should be allowed
+        """
+        if resource_type == 'document':
+            return None
+
+        parts = urlsplit(url)
+        host = (parts.hostname or '').lower()
+
+        if self._matches_suffix(host, self.allow_domains):
+            return None
+        if resource_type in self.block_types:
+            return 'type'
+        if self._matches_suffix(host, self.block_domains):
+            return 'tracker'
+        for suffix, path_prefix in self.block_host_paths:
+            if (host == suffix or host.endswith('.' + suffix)) and parts.path.lstrip('/').startswith(path_prefix):
+                return 'tracker'
+        if self.block_path_re.search(parts.path):
+            return 'extension'
+        if resource_type not in IMAGE_QUERY_EXEMPT_TYPES and parts.query and IMAGE_QUERY_RE.search(parts.query):
+            return 'image_params'
+        return None
+
+
+# Counters for the scraping task running in the current asyncio task
+_task_counters: ContextVar[Optional[ResourceCounters]] = ContextVar('resource_counters', default=None)
+
+
+class ResourceBlocker:
+    """Routes page requests through compiled per-platform blocking rules"""
+
+    def __init__(self):
+        self._rules: Dict[str, ResourceRules] = {}
+        self.totals = ResourceCounters()
+
+    def get_rules(self, platform: Optional[str] = None) -> ResourceRules:
+        """
+        Get the compiled rules for a platform (compiled once and cached)
+
+        Args:
+            platform: Platform name hint
+
+        Returns:
+            ResourceRules instance
+        """
+        key = (platform or 'generic').lower()
+        rules = self._rules.get(key)
+        if rules is None:
+            platform_rules = PLATFORM_RULES.get(key, {})
+            block_types = BLOCKED_RESOURCE_TYPES - frozenset(platform_rules.get('allow_types', []))
+            block_domains = set(platform_rules.get('block_domains', [])) | set(settings.RESOURCE_BLOCK_EXTRA_DOMAINS)
+            if settings.RESOURCE_BLOCK_TRACKERS:
+                block_domains |= TRACKER_DOMAINS
+            allow_domains = frozenset(platform_rules.get('allow_domains', [])) | frozenset(settings.RESOURCE_ALLOW_DOMAINS)
+            rules = ResourceRules(frozenset(block_types), frozenset(block_domains), allow_domains)
+            self._rules[key] = rules
+        return rules
+
+    def task_counters(self) -> ResourceCounters:
+        """Get (or start) the counters for the current scraping task"""
+        counters = _task_counters.get()
+        if counters is None:
+            counters = ResourceCounters()
+            _task_counters.set(counters)
+        return counters
+
+    async def attach(self, page, platform: Optional[str] = None):
+        """
+        Install the blocking route and byte counting on a page
+
+        Args:
+            page: Playwright page object
+            platform: Platform name hint used to pick rules
+        """
+        rules = self.get_rules(platform)
+        counters = self.task_counters()
+        totals = self.totals
+
+        async def handle_route(route):
+            request = route.request
+            reason = rules.classify(request.resource_type, request.url)
+            if reason:
+                counters.blocked_requests += 1
+                counters.blocked_by_reason[reason] = counters.blocked_by_reason.get(reason, 0) + 1
+                totals.blocked_requests += 1
+                totals.blocked_by_reason[reason] = totals.blocked_by_reason.get(reason, 0) + 1
+                await route.abort()
+            else:
+                counters.allowed_requests += 1
+                totals.allowed_requests += 1
+                # Let routes installed earlier (the asset cache) handle the request
+                await route.fallback()
+
+        def on_response(response):
+            try:
+                size = int(response.headers.get('content-length') or 0)
+            except ValueError:
+                size = 0
+            counters.allowed_bytes += size
+            totals.allowed_bytes += size
+
+        await page.route("**/*", handle_route)
+        page.on("response", on_response)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get blocking totals across all tasks"""
+        return {
+            'tracker_blocking': settings.RESOURCE_BLOCK_TRACKERS,
+            'tracker_domains': len(TRACKER_DOMAINS),
+            **self.totals.to_dict(),
+        }
+
+
+# Global resource blocker instance
+resource_blocker = ResourceBlocker()
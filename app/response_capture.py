@@ -0,0 +1,170 @@
+import asyncio
+import json
+import re
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, List, Pattern
+from app.config import settings
+from app.logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Only script-initiated requests can carry product API data
+CAPTURED_RESOURCE_TYPES = frozenset({'xhr', 'fetch'})
+
+# Seconds to wait for in-flight response bodies before the extractor runs
+DRAIN_TIMEOUT = 2.0
+
+# JSONP wrapper: callback({...});
+JSONP_RE = re.compile(r'^\s*[\w$.]+\s*\((.*)\)\s*;?\s*$', re.DOTALL)
+
+
+def parse_json_body(body: bytes) -> Any:
+    """Parse a JSON (or JSONP) response body"""
+    text = body.decode('utf-8', errors='replace')
+    if text.lstrip()[:1] not in ('{', '['):
+        match = JSONP_RE.match(text)
+        if match:
+            text = match.group(1)
+    return json.loads(text)
+
+
+class CaptureBuffer:
+    """JSON responses captured for one scraping task"""
+
+    def __init__(self):
+        self.responses: List[Dict[str, Any]] = []
+        self.pending: set = set()
+        self.skipped = 0
+
+
+# Capture buffer of the scraping task running in the current asyncio task
+_task_buffer: ContextVar[Optional[CaptureBuffer]] = ContextVar('response_capture_buffer', default=None)
+
+
+class ResponseCapture:
+    """
+    Records product JSON that storefronts load over XHR/fetch while a page renders.
+
+    URL patterns come from the extractor class of the platform (api_response_patterns),
+    so each extractor declares which API calls it knows how to read. When the platform
+    is not known from the URL, the patterns of every extractor are used.
+    """
+
+    def __init__(self):
+        self._patterns: Dict[str, Optional[Pattern]] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def get_pattern(self, platform: Optional[str] = None) -> Optional[Pattern]:
+        """
+        Get the compiled URL pattern for a platform (compiled once and cached)
+
+        Args:
+            platform: Platform name hint
+
+        Returns:
+            Compiled regex, or None if the platform has no API patterns
+        """
+        key = (platform or 'generic').lower()
+        if key not in self._patterns:
+            from app.extractors.factory import ExtractorFactory
+            patterns = ExtractorFactory.get_api_response_patterns(platform)
+            self._patterns[key] = re.compile('|'.join(f'(?:{p})' for p in patterns), re.IGNORECASE) if patterns else None
+        return self._patterns[key]
+
+    def task_buffer(self) -> CaptureBuffer:
+        """Get (or start) the capture buffer for the current scraping task"""
+        buffer = _task_buffer.get()
+        if buffer is None:
+            buffer = CaptureBuffer()
+            _task_buffer.set(buffer)
+        return buffer
+
+    def reset(self):
+        """Drop responses captured by an earlier attempt of the current task"""
+        _task_buffer.set(CaptureBuffer())
+
+    async def attach(self, page, platform: Optional[str] = None):
+        """
+        Start recording matching JSON responses of a page
+
+        Args:
+            page: Playwright page object
+            platform: Platform name hint used to pick URL patterns
+        """
+        if not settings.API_CAPTURE_ENABLED:
+            return
+        pattern = self.get_pattern(platform)
+        if pattern is None:
+            return
+
+        buffer = self.task_buffer()
+        entry = self.stats.setdefault((platform or 'generic').lower(), {'captured': 0, 'skipped': 0})
+
+        async def read_response(response):
+            try:
+                data = parse_json_body(await response.body())
+            except Exception:
+                entry['skipped'] += 1
+                return
+            buffer.responses.append({'url': response.url, 'data': data})
+            entry['captured'] += 1
+
+        def on_response(response):
+            if response.request.resource_type not in CAPTURED_RESOURCE_TYPES or response.status != 200:
+                return
+            if not pattern.search(response.url):
+                return
+            headers = response.headers
+            if 'json' not in headers.get('content-type', '') and 'javascript' not in headers.get('content-type', ''):
+                return
+            try:
+                too_large = int(headers.get('content-length') or 0) > settings.API_CAPTURE_MAX_BYTES
+            except ValueError:
+                too_large = False
+            if too_large or len(buffer.responses) + len(buffer.pending) >= settings.API_CAPTURE_MAX_RESPONSES:
+                buffer.skipped += 1
+                entry['skipped'] += 1
+                return
+            task = asyncio.ensure_future(read_response(response))
+            buffer.pending.add(task)
+            task.add_done_callback(buffer.pending.discard)
+
+        page.on("response", on_response)
+
+    def add(self, responses: List[Dict[str, Any]]):
+        """
+        Hand over product JSON fetched outside the page (e.g. a platform product endpoint)
+
+        Args:
+            responses: List of {'url': ..., 'data': ...} dictionaries
+        """
+        self.task_buffer().responses.extend(responses)
+
+    async def drain(self) -> List[Dict[str, Any]]:
+        """
+        Wait briefly for in-flight response bodies and return what the current task captured
+
+        Returns:
+            List of {'url': ..., 'data': ...} dictionaries, in arrival order
+        """
+        buffer = _task_buffer.get()
+        if buffer is None:
+            return []
+        if buffer.pending:
+            await asyncio.wait(list(buffer.pending), timeout=DRAIN_TIMEOUT)
+        if buffer.responses:
+            logger.info(f"Captured {len(buffer.responses)} product API responses")
+        return list(buffer.responses)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-platform capture counts"""
+        return {
+            'enabled': settings.API_CAPTURE_ENABLED,
+            'platforms': dict(self.stats),
+        }
+
+
+# Global response capture instance
+response_capture = ResponseCapture()
@@ -0,0 +1,194 @@
+import asyncio
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Tuple
+from app.config import settings
+from app.logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Failure classes
+ERROR_DNS = 'dns'
+ERROR_TLS = 'tls'
+ERROR_PROXY = 'proxy'              # proxy auth (407) or proxy/tunnel connection failure
+ERROR_CONNECTION = 'connection'    # reset/refused by the site
+ERROR_BLOCKED = 'blocked'          # 403/429
+ERROR_CAPTCHA = 'captcha'
+ERROR_TIMEOUT = 'timeout'
+ERROR_SERVER = 'server_error'      # 5xx
+ERROR_EMPTY_BODY = 'empty_body'
+ERROR_NOT_FOUND = 'not_found'      # 404/410
+ERROR_CLIENT = 'client_error'      # other 4xx
+ERROR_UNKNOWN = 'unknown'
+
+# Pages shorter than this (in characters) are treated as empty responses
+EMPTY_BODY_THRESHOLD = 512
+
+# Message patterns of Playwright (Chromium/Firefox/WebKit) and httpx errors, checked in order
+ERROR_PATTERNS = [
+    (ERROR_DNS, re.compile(r'ERR_NAME_NOT_RESOLVED|NS_ERROR_UNKNOWN_HOST|name or service not known|nodename nor servname|'
+                           r'getaddrinfo failed|temporary failure in name resolution|could not resolve host', re.IGNORECASE)),
+    (ERROR_PROXY, re.compile(r'ERR_PROXY|ERR_TUNNEL_CONNECTION_FAILED|NS_ERROR_PROXY|ProxyError|proxy authentication|\b407\b', re.IGNORECASE)),
+    (ERROR_TLS, re.compile(r'ERR_CERT|ERR_SSL|SSL_ERROR|certificate verify failed|SSLError|tlsv1', re.IGNORECASE)),
+    (ERROR_TIMEOUT, re.compile(r'timeout|timed out|ERR_TIMED_OUT', re.IGNORECASE)),
+    (ERROR_EMPTY_BODY, re.compile(r'ERR_EMPTY_RESPONSE', re.IGNORECASE)),
+    (ERROR_CONNECTION, re.compile(r'ERR_CONNECTION_|NS_ERROR_NET_RESET|NS_ERROR_CONNECTION_REFUSED|ConnectError|'
+                                  r'RemoteProtocolError|connection reset|connection refused', re.IGNORECASE)),
+]
+
+
+class FetchError(Exception):
+    """Raised when a page fetch gets an unusable response (carries the HTTP status or failure class)"""
+
+    def __init__(self, message: str, status: Optional[int] = None, error_class: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.error_class = error_class
+
+
+@dataclass(frozen=True)
+class RetryStrategy:
+    """How to retry one class of failure"""
+    max_retries: int = 2
+    rotate_proxy: bool = False
+    switch_engine: bool = False
+    backoff: bool = False
+    escalate: bool = True     # HTTP tier failures of this class move on to the browser tier
+    hopeless: bool = False    # Remember the URL and fail fast for RETRY_HOPELESS_TTL once given up
+
+
+RETRY_STRATEGIES: Dict[str, RetryStrategy] = {
+    ERROR_NOT_FOUND: RetryStrategy(max_retries=0, hopeless=True),
+    ERROR_CLIENT: RetryStrategy(max_retries=0),
+    ERROR_DNS: RetryStrategy(max_retries=1, rotate_proxy=True, escalate=False, hopeless=True),
+    ERROR_TLS: RetryStrategy(max_retries=1, rotate_proxy=True),
+    ERROR_PROXY: RetryStrategy(max_retries=2, rotate_proxy=True),
+    ERROR_CONNECTION: RetryStrategy(max_retries=2, rotate_proxy=True, backoff=True),
+    ERROR_BLOCKED: RetryStrategy(max_retries=2, rotate_proxy=True, switch_engine=True, backoff=True),
+    ERROR_CAPTCHA: RetryStrategy(max_retries=1, rotate_proxy=True, switch_engine=True),
+    ERROR_TIMEOUT: RetryStrategy(max_retries=2, rotate_proxy=True, backoff=True),
+    ERROR_SERVER: RetryStrategy(max_retries=2, backoff=True),
+    ERROR_EMPTY_BODY: RetryStrategy(max_retries=1, switch_engine=True, backoff=True),
+    ERROR_UNKNOWN: RetryStrategy(max_retries=2, backoff=True),
+}
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Classify a fetch failure
+
+    Args:
+        error: Exception raised by the HTTP tier or the browser
+
+    Returns:
+        One of the ERROR_* classes
+    """
+    if isinstance(error, FetchError) and error.error_class:
+        return error.error_class
+    status = getattr(error, 'status', None)
+    if isinstance(status, int) and status >= 400:
+        if status in (404, 410):
+            return ERROR_NOT_FOUND
+        if status in (403, 429):
+            return ERROR_BLOCKED
+        if status == 407:
+            return ERROR_PROXY
+        return ERROR_SERVER if status >= 500 else ERROR_CLIENT
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return ERROR_TIMEOUT
+
+    text = f"{type(error).__name__}: {error}"
+    for error_class, pattern in ERROR_PATTERNS:
+        if pattern.search(text):
+            return error_class
+    return ERROR_UNKNOWN
+
+
+class RetryPolicy:
+    """
+    Per-class retry strategies and outcome counts.
+
+    Fetch failures are classified (DNS, TLS, proxy, 403/429, captcha, timeout,
+    5xx, empty body, 404, ...) and each class has its own strategy: how many
+    retries it gets, whether to rotate the proxy, switch the browser engine or
+    back off with jitter, whether the HTTP tier escalates to the browser, and
+    whether the URL is remembered as hopeless so later tasks fail fast.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hopeless: Dict[str, Tuple[str, float]] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.fast_failures = 0
+
+    def strategy(self, error_class: str) -> RetryStrategy:
+        """Get the retry strategy of a failure class"""
+        return RETRY_STRATEGIES.get(error_class, RETRY_STRATEGIES[ERROR_UNKNOWN])
+
+    def backoff_delay(self, attempt: int) -> float:
+        """
+        Exponential backoff with full jitter
+
+        Args:
+            attempt: Zero-based attempt that just failed
+
+        Returns:
+            Seconds to wait before the next attempt
+        """
+        return random.uniform(0, min(settings.RETRY_BACKOFF_MAX, settings.RETRY_BACKOFF_BASE * 2 ** attempt))
+
+    def record(self, error_class: str, action: str):
+        """
+        Count what happened to a failure
+
+        Args:
+            error_class: Failure class
+            action: failed, retried, recovered, escalated or gave_up
+        """
+        with self._lock:
+            entry = self.stats.setdefault(error_class, {'failed': 0, 'retried': 0, 'recovered': 0, 'escalated': 0, 'gave_up': 0})
+            entry[action] = entry.get(action, 0) + 1
+
+    def give_up(self, url: str, error_class: str):
+        """Count a URL that ran out of retries, remembering it if its failure class is hopeless"""
+        self.record(error_class, 'gave_up')
+        if self.strategy(error_class).hopeless and settings.RETRY_HOPELESS_TTL > 0:
+            with self._lock:
+                self._hopeless[url] = (error_class, time.time() + settings.RETRY_HOPELESS_TTL)
+
+    def check_hopeless(self, url: str):
+        """
+        Fail fast for a URL that recently gave up with a hopeless failure (e.g. 404)
+
+        Raises:
+            FetchError with the remembered failure class
+        """
+        with self._lock:
+            entry = self._hopeless.get(url)
+            if entry and entry[1] <= time.time():
+                del self._hopeless[url]
+                entry = None
+            if entry:
+                self.fast_failures += 1
+        if entry:
+            raise FetchError(f"Giving up on {url}: it failed with {entry[0]} recently", error_class=entry[0])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-class retry outcomes"""
+        now = time.time()
+        with self._lock:
+            self._hopeless = {url: entry for url, entry in self._hopeless.items() if entry[1] > now}
+            return {
+                'classes': {error_class: dict(entry) for error_class, entry in self.stats.items()},
+                'hopeless_urls': len(self._hopeless),
+                'fast_failures': self.fast_failures,
+            }
+
+
+# Global retry policy instance
+retry_policy = RetryPolicy()
@@ -10,11 +10,11 @@ from fastapi import HTTPException, Request, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 import json
-from urllib.parse import urlparse
 import ipaddress
 from fastapi.responses import JSONResponse
 
 from app.config import settings
+from app.domain_registry import match_suffix, domain_registry
 from app.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -27,11 +27,7 @@ SECURITY_CONFIG = {
     "BLOCKED_IPS_TTL": 3600,  # 1 hour
     "SUSPICIOUS_ACTIVITY_TTL": 1800,  # 30 minutes
     "MAX_URL_LENGTH": 2048,
-    "ALLOWED_DOMAINS": [
-        "amazon.com", "amazon.co.uk", "amazon.de", "amazon.fr", "amazon.it", "amazon.es",
-        "ebay.com", "ebay.co.uk", "ebay.de", "ebay.fr", "ebay.it", "ebay.es", "ebay.nl",
-        "bol.com", "cdiscount.com", "otto.de", "jd.com"
-    ],
+    "ALLOWED_DOMAINS": domain_registry.domains(),  # Marketplace domains (MARKETPLACE_DOMAINS + MARKETPLACE_EXTRA_DOMAINS)
     "BLOCKED_USER_AGENTS": [
         "bot", "crawler", "spider", "scraper", "curl", "wget", "python-requests"
     ],
@@ -119,15 +115,8 @@ class SecurityManager:
     def validate_url(self, url: str, allowed_domains: List[str]) -> bool:
         """Validate URL against allowed domains"""
         try:
-            parsed = urlparse(url)
-            domain = parsed.netloc.lower()
-            
-            # Remove port if present
-            if ":" in domain:
-                domain = domain.split(":")[0]
-            
-            # Check if domain is in allowed list
-            return any(domain.endswith(allowed_domain) for allowed_domain in allowed_domains)
+            # The host must be an allowed domain or one of its subdomains
+            return match_suffix(url, allowed_domains) is not None
         except Exception:
             return False
     
@@ -1,17 +1,25 @@
-import threading
-import time
-import re
+import asyncio
 from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 from app.models import ProductInfo, TaskStatusResponse, TaskStatus, TaskPriority
-from app.utils import generate_task_id, proxy_manager, user_agent_manager, is_valid_url
+from app.utils import generate_task_id, user_agent_manager, is_valid_url
 from app.utils.credit_utils import can_perform_action, deduct_credits
 from app.utils.task_management import (
     create_task, start_task, update_task_progress, 
-    complete_task, fail_task, get_task_status, TaskType, TaskStatus as TMStatus
+    complete_task, fail_task, cancel_task, get_task_status, TaskType, TaskStatus as TMStatus
 )
 from app.config import settings
-from bs4 import BeautifulSoup
+from app.browser_pool import browser_pool
+from app.http_fetcher import http_fetcher, TIER_HTTP, TIER_BROWSER, JS_WALL_PATTERNS
+from app.domain_scheduler import domain_scheduler
+from app.proxy_pool import proxy_pool, OUTCOME_OK, OUTCOME_BLOCKED
+from app.retry_policy import retry_policy, classify_error, ERROR_CAPTCHA
+from app.platform_detector import platform_detector
+from app.platform_memo import platform_memo
+from app.domain_registry import domain_registry
+from app.early_detection import early_detector
+from app.snapshot_archive import snapshot_archive
+from app.task_deadline import task_deadlines, current_deadline, Deadline, DeadlineExceeded, TaskCancelled
 from app.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -20,272 +28,6 @@ logger = get_logger(__name__)
 class ScrapingService:
     """Main service for orchestrating scraping operations"""
     
-    def __init__(self):
-        # Platform detection indicators for HTML analysis
-        self.platform_indicators = {
-                            'shopify': {
-                    'patterns': [
-                        r'Shopify\.theme',
-                        r'shopify-section',
-                        r'shopify\.analytics',
-                        r'shopify\.checkout',
-                        r'Shopify\.routes',
-                        r'Shopify\.locale',
-                        r'shop\.myshopify\.com',
-                        r'window\.Shopify',
-                        r'Shopify\.money_format',
-                        r'Shopify\.country',
-                        r'ShopifyAnalytics',
-                        r'cdn\.shopify\.com',
-                        r'shopifycloud\.com',
-                    ],
-                    'meta_tags': [
-                        'shopify-digital-wallet',
-                        'shopify-checkout-api-token',
-                        'shopify-platform',
-                    ],
-                    'script_sources': [
-                        'cdn.shopify.com',
-                        'shopifycloud.com',
-                        'monorail-edge.shopifysvc.com',
-                    ],
-                    'css_classes': [
-                        'shopify-section',
-                        'shopify-block',
-                        'shopify-payment-button',
-                    ],
-                },
-                'bigcommerce': {
-                    'patterns': [
-                        r'window\.product_attributes',
-                        r'window\.BCData',
-                        r'window\.product',
-                        r'BigCommerce',
-                        r'bigcommerce',
-                        r'BC\.',
-                        r'bc\.',
-                    ],
-                    'meta_tags': [
-                        'bigcommerce-platform',
-                        'bc-platform',
-                    ],
-                    'script_sources': [
-                        'cdn.bigcommerce.com',
-                        'bigcommerce.com',
-                        'api.bigcommerce.com',
-                    ],
-                    'css_classes': [
-                        'productView',
-                        'productView-title',
-                        'productView-price',
-                        'productView-description',
-                        'productView-image',
-                    ],
-                },
-                'squarespace': {
-                    'patterns': [
-                        r'window\.Squarespace',
-                        r'window\.SQ',
-                        r'window\.SQUARESpace_CONTEXT',
-                        r'Squarespace',
-                        r'SQ\.',
-                        r'sq\.',
-                    ],
-                    'meta_tags': [
-                        'squarespace-platform',
-                        'sq-platform',
-                    ],
-                    'script_sources': [
-                        'cdn.squarespace.com',
-                        'squarespace.com',
-                        'api.squarespace.com',
-                    ],
-                    'css_classes': [
-                        'sqs-product',
-                        'product-title',
-                        'product-price',
-                        'product-description',
-                        'product-image',
-                    ],
-                },
-            'woocommerce': {
-                'patterns': [
-                    r'wp-content\/plugins\/woocommerce',
-                    r'woocommerce\.js',
-                    r'wc-ajax',
-                    r'wc_add_to_cart_params',
-                    r'wc_single_product_params',
-                    r'woocommerce_params',
-                    r'wc_cart_fragments_params',
-                    r'wc_cart_hash',
-                    r'woocommerce-cart',
-                    r'woocommerce-checkout',
-                    r'add-to-cart',
-                    r'WooCommerce',
-                    r'woocommerce\.min\.js',
-                    r'woocommerce\.css',
-                    r'woocommerce\.min\.css',
-                ],
-                'meta_tags': [
-                    'woocommerce-enabled',
-                    'generator.*woocommerce',
-                    'woocommerce-version',
-                ],
-                'script_sources': [
-                    'wp-content/plugins/woocommerce',
-                    'woocommerce/assets',
-                    'woocommerce.js',
-                    'woocommerce.min.js',
-                ],
-            },
-            'wordpress': {
-                'patterns': [
-                    r'wp-content',
-                    r'wp-includes',
-                    r'wp-admin',
-                    r'wordpress',
-                    r'wp_nonce',
-                    r'wpdb',
-                    r'wp-json',
-                    r'rest_route',
-                    r'wp_ajax',
-                    r'WordPress',
-                ],
-                'meta_tags': [
-                    'generator.*wordpress',
-                    'generator.*WordPress',
-                ],
-                'script_sources': [
-                    'wp-includes',
-                    'wp-content',
-                    'wp-admin',
-                ],
-                'css_classes': [
-                    'wp-',
-                    'wordpress',
-                    'wp-block',
-                ],
-            },
-            'squarespace': {
-                'patterns': [
-                    r'squarespace',
-                    r'static1\.squarespace\.com',
-                    r'assets\.squarespace\.com',
-                    r'sqsp\.net',
-                    r'squarespace-cdn',
-                    r'Squarespace',
-                    r'SQUARESPACE_ROLLUPS',
-                    r'squarespace\.com',
-                    r'Y\.Squarespace',
-                ],
-                'meta_tags': [
-                    'squarespace-platform-preview',
-                    'generator.*squarespace',
-                ],
-                'script_sources': [
-                    'squarespace.com',
-                    'squarespacestatus.com',
-                    'static1.squarespace.com',
-                    'assets.squarespace.com',
-                ],
-                'css_classes': [
-                    'squarespace',
-                    'sqs-',
-                    'sqsrte-',
-                ],
-            },
-            'magento': {
-                'patterns': [
-                    r'magento',
-                    r'mage\/cookies',
-                    r'skin\/frontend',
-                    r'Mage\.Cookies',
-                    r'MAGENTO_ROOT',
-                    r'Magento',
-                    r'mage\/js',
-                    r'checkout\/cart',
-                    r'customer\/account',
-                    r'Mage\.apply',
-                    r'magentosite',
-                ],
-                'meta_tags': [
-                    'magento',
-                    'generator.*magento',
-                ],
-                'script_sources': [
-                    'magento',
-                    'mage/',
-                ],
-                'css_classes': [
-                    'magento',
-                    'catalog-product',
-                    'checkout-cart',
-                    'page-layout-',
-                    'cms-',
-                ],
-            },
-            'webflow': {
-                'patterns': [
-                    r'webflow',
-                    r'assets\.website-files\.com',
-                    r'uploads-ssl\.webflow\.com',
-                    r'Webflow',
-                    r'w-node-',
-                    r'w-embed',
-                    r'webflow\.js',
-                    r'wf-active',
-                    r'wf-loading',
-                ],
-                'meta_tags': [
-                    'webflow-platform',
-                    'generator.*webflow',
-                ],
-                'script_sources': [
-                    'webflow.com',
-                    'assets.website-files.com',
-                    'uploads-ssl.webflow.com',
-                ],
-                'css_classes': [
-                    'w-node-',
-                    'w-embed',
-                    'w-form',
-                    'w-button',
-                    'w-tab',
-                    'w-slider',
-                ],
-            },
-            'wix': {
-                'patterns': [
-                    r'wixstatic\.com',
-                    r'parastorage\.com',
-                    r'static\.wixstatic\.com',
-                    r'wix-code-public-path',
-                    r'Wix\.com',
-                    r'WixSite',
-                    r'SITE_CONTAINER',
-                    r'wix\.com',
-                    r'wixapps\.net',
-                    r'wix_typography',
-                ],
-                'meta_tags': [
-                    'wix-platform',
-                    'generator.*wix',
-                ],
-                'script_sources': [
-                    'wix.com',
-                    'wixstatic.com',
-                    'parastorage.com',
-                    'wixapps.net',
-                ],
-                'css_classes': [
-                    'wixui-',
-                    'SITE_CONTAINER',
-                    'mesh-layout',
-                    'wix-ads',
-                ],
-            }
-        }
-    
     # ============================================================================
     # PUBLIC API METHODS
     # ============================================================================
@@ -299,7 +41,7 @@ class ScrapingService:
         target_language: Optional[str] = None
     ) -> TaskStatusResponse:
         """
-        Start a scraping task asynchronously using threads
+        Start a scraping task asynchronously on the browser engine
         
         Args:
             url: Product URL to scrape
@@ -375,18 +117,16 @@ class ScrapingService:
             detail=detail
         )
         
-        # Start scraping in a separate thread
-        thread = threading.Thread(
-            target=self._execute_scraping_task_thread,
-            args=(actual_task_id, url, user_id, proxy, user_agent, target_language),
-            daemon=True
+        # Run scraping as a coroutine on the browser engine loop
+        browser_pool.submit(
+            self._execute_scraping_task,
+            actual_task_id, url, user_id, proxy, user_agent, target_language
         )
-        thread.start()
         
-        logger.info(f"Started scraping task {actual_task_id} for {url} by user {user_id} in thread")
+        logger.info(f"Submitted scraping task {actual_task_id} for {url} by user {user_id} to browser pool")
         return response
 
-    def _execute_scraping_task_thread(
+    async def _execute_scraping_task(
         self,
         task_id: str,
         url: str,
@@ -396,7 +136,10 @@ class ScrapingService:
         target_language: Optional[str] = None
     ):
         """
-        Execute the actual scraping task in a separate thread
+        Execute the actual scraping task on the browser engine loop
+        
+        Blocking work (database calls, parsing, AI requests) is moved off the loop
+        with asyncio.to_thread so other pages keep making progress.
         
         Args:
             task_id: The task ID to execute
@@ -407,214 +150,116 @@ class ScrapingService:
             target_language: Target language for content extraction
         """
         logger.info(f"Starting execute_scraping_task for task_id: {task_id}, url: {url}")
+        deadline = task_deadlines.start(task_id)
+        outcome = 'completed'
         try:
-            # Validate URL
-            if not is_valid_url(url):
-                raise ValueError(f"Invalid URL format: {url}")
-            
-            # Check user's credit
-            credit_check = can_perform_action(user_id, "scraping")
-            if credit_check.get("error"):
-                raise ValueError(f"Credit check failed: {credit_check['error']}")
-            
-            if not credit_check.get("can_perform", False):
-                reason = credit_check.get("reason", "Insufficient credits")
-                current_credits = credit_check.get("current_credits", 0)
-                required_credits = credit_check.get("required_credits", 1)
-                raise ValueError(f"Credit check failed: {reason}. Current credits: {current_credits}, Required: {required_credits}")
-            
-            logger.info(f"Credit check passed for user {user_id}. Can perform scraping action.")
-            
-            # Update task status in MongoDB
-            update_task_progress(task_id, 1, "Starting scraping process")
-            
-            # Get proxy and user agent if not provided
-            if not proxy and settings.ROTATE_PROXIES:
-                proxy = proxy_manager.get_proxy()
-            
-            if not user_agent and settings.ROTATE_USER_AGENTS:
-                user_agent = user_agent_manager.get_user_agent()
-            
-            # First, get HTML content using browser manager with retry logic
-            update_task_progress(task_id, 2, "Fetching page content")
-            from app.browser_manager import browser_manager
-            
-            # Use timeout logic to prevent blocking
-            start_time = time.time()
-            timeout_seconds = settings.BROWSER_PAGE_FETCH_TIMEOUT / 1000.0
-            
-            try:
-                html_content = browser_manager.get_page_content_with_retry(url, proxy, user_agent, True)
+            async with deadline.scope():
+                # Validate URL
+                if not is_valid_url(url):
+                    raise ValueError(f"Invalid URL format: {url}")
                 
-                # Check if we exceeded timeout
-                if time.time() - start_time > timeout_seconds:
-                    raise Exception(f"Page content fetching timed out after {timeout_seconds} seconds")
-                    
-            except Exception as e:
-                if time.time() - start_time > timeout_seconds:
-                    raise Exception(f"Page content fetching timed out after {timeout_seconds} seconds")
-                else:
-                    raise e
-            
-            # Detect platform based on URL and content
-            update_task_progress(task_id, 3, "Detecting e-commerce platform")
-            platform, platform_confidence, platform_indicators = self._detect_platform_smart(url, html_content)
-            
-            # Create appropriate extractor based on detected platform
-            update_task_progress(task_id, 4, "Creating platform-specific extractor")
-            from app.extractors.factory import ExtractorFactory
-            from app.extractors.cdiscount import CDiscountExtractor
-            extractor = ExtractorFactory.create_extractor(platform, html_content, url)
-            
-            logger.info(f"Extractor created successfully: {type(extractor).__name__}")
-            
-            # Check for captcha and solve if needed
-            update_task_progress(task_id, 5, "Checking for captcha")
-            
-            # Use platform-specific captcha detection if available
-            captcha_detected = False
-            
-            # Use direct type checking instead of hasattr
-            if isinstance(extractor, CDiscountExtractor) and platform == 'cdiscount':
-                logger.info("Using CDiscount-specific captcha detection")
-                captcha_detected = extractor.detect_cdiscount_captcha()
-            else:
-                logger.info("Using generic captcha detection")
-                captcha_detected = extractor.detect_captcha()
-            
-            if captcha_detected:
-                logger.info(f"Captcha detected on {url}, attempting to solve...")
-                update_task_progress(task_id, 6, "Solving captcha")
+                # Check user's credit
+                credit_check = await asyncio.to_thread(can_perform_action, user_id, "scraping")
+                if credit_check.get("error"):
+                    raise ValueError(f"Credit check failed: {credit_check['error']}")
                 
-                # Get a fresh page for captcha solving
-                page = browser_manager.create_page(user_agent)
-                try:
-                    # Navigate to the URL again
-                    page.goto(url, wait_until='domcontentloaded', timeout=120000)
+                if not credit_check.get("can_perform", False):
+                    reason = credit_check.get("reason", "Insufficient credits")
+                    current_credits = credit_check.get("current_credits", 0)
+                    required_credits = credit_check.get("required_credits", 1)
+                    raise ValueError(f"Credit check failed: {reason}. Current credits: {current_credits}, Required: {required_credits}")
+                
+                logger.info(f"Credit check passed for user {user_id}. Can perform scraping action.")
+                
+                # Update task status in MongoDB
+                await asyncio.to_thread(update_task_progress, task_id, 1, "Starting scraping process")
+                
+                # Get proxy and user agent if not provided
+                if not proxy and settings.ROTATE_PROXIES:
+                    proxy = proxy_pool.acquire(url)
+                
+                if not user_agent and settings.ROTATE_USER_AGENTS:
+                    user_agent = user_agent_manager.get_user_agent()
+                
+                # Fetch the page and extract product information with the cheapest tier that works
+                platform, platform_confidence, platform_indicators, product_info, fetch_tier = await self._fetch_and_extract(
+                    task_id, url, deadline, proxy, user_agent
+                )
+                
+                # Update task progress before saving to database
+                await asyncio.to_thread(update_task_progress, task_id, 8, "Saving product to database and detecting category")
+                
+                # Once the save starts the task runs to completion
+                async with deadline.protect("save"):
+                    # Update task with results
+                    product_id, short_id = await asyncio.to_thread(self._save_product_to_supabase, user_id, product_info, url, platform, target_language, task_id)
                     
-                    # Wait a bit for the page to fully load before solving captcha
-                    page.wait_for_timeout(3000)
+                    # Complete the task in MongoDB with product_id and short_id
+                    from app.browser_manager import browser_manager
+                    await asyncio.to_thread(complete_task, task_id, {
+                        "product_id": product_id,
+                        "short_id": short_id,
+                        "fetch_tier": fetch_tier,
+                        "resource_blocking": browser_manager.get_resource_counters() if fetch_tier == TIER_BROWSER else None,
+                        "queue_wait_ms": domain_scheduler.task_wait_ms()
+                    })
                     
-                    # Solve the captcha
-                    captcha_solved = extractor.solve_captcha(page)
+                    logger.info(f"Successfully scraped product from {url}")
                     
-                    if captcha_solved:
-                        logger.info("Captcha solved successfully, waiting for page to stabilize...")
-                        
-                        # Wait longer for the page to process after captcha solving
-                        page.wait_for_timeout(10000)  # Wait 10 seconds for page to process
-                        
-                        # Additional waiting for page to fully process after captcha solving
-                        try:
-                            # Wait for network idle to ensure all requests are complete
-                            page.wait_for_load_state('networkidle', timeout=30000)
-                        except Exception:
-                            pass
-                        
-                        # Wait for DOM content to be ready
-                        try:
-                            page.wait_for_load_state('domcontentloaded', timeout=20000)
-                        except Exception:
-                            pass
-                        
-                        # Additional wait for JavaScript execution
-                        page.wait_for_timeout(5000)
-                        
-                        # Wait for page stability
-                        try:
-                            page.wait_for_function(
-                                """
-                                () => {
-                                    return new Promise((resolve) => {
-                                        setTimeout(() => {
-                                            // Check if page is stable and no loading indicators
-                                            const isStable = !document.querySelector('[style*="animation"]') && 
-                                                           !document.querySelector('[class*="loading"]') &&
-                                                           !document.querySelector('[class*="spinner"]') &&
-                                                           document.readyState === 'complete';
-                                            resolve(isStable);
-                                        }, 3000);
-                                    });
-                                }
-                                """,
-                                timeout=30000
-                            )
-                        except Exception:
-                            pass
-                        
-                        # Get updated HTML content after captcha solving and page stabilization
-                        html_content = page.content()
-                        
-                        # Recreate extractor with updated content
-                        extractor = ExtractorFactory.create_extractor(platform, html_content, url)
-                        
-                        # Keep the page open for a bit longer to ensure everything is processed
-                        page.wait_for_timeout(2000)
-                        
-                    else:
-                        logger.warning("Failed to solve captcha, proceeding with original content")
-                except Exception as captcha_error:
-                    logger.error(f"Error during captcha solving: {captcha_error}")
-                finally:
-                    page.close()
-            else:
-                logger.info("No captcha detected, proceeding with normal extraction")
-            
-            # Extract product information using the platform-specific extractor
-            update_task_progress(task_id, 7, "Extracting product information")
-            product_info = extractor.extract_product_info()
-            
-            # Update task progress before saving to database
-            update_task_progress(task_id, 8, "Saving product to database and detecting category")
-            
-            # Update task with results
-            product_id, short_id = self._save_product_to_supabase(user_id, product_info, url, platform, target_language, task_id)
-            
-            # Complete the task in MongoDB with product_id and short_id
-            complete_task(task_id, {
-                "product_id": product_id,
-                "short_id": short_id
-            })
-            
-            logger.info(f"Successfully scraped product from {url}")
-            
-            # Deduct credits on successful scraping
-            try:
-                success = deduct_credits(
-                    user_id=user_id, 
-                    action_name="scraping",
-                    reference_id=product_id,
-                    reference_type="product",
-                    description=f"Product scraping completed for {url}"
-                )
-                if success:
-                    logger.info(f"Successfully deducted credits for user {user_id} for scraping task {task_id}")
-                else:
-                    logger.warning(f"Failed to deduct credits for user {user_id} for scraping task {task_id}")
-            except Exception as credit_error:
-                logger.error(f"Error deducting credits for user {user_id} for scraping task {task_id}: {credit_error}")
-            
-            # Clean up browser resources in the same thread where they were created
+                    # Deduct credits on successful scraping
+                    try:
+                        success = await asyncio.to_thread(
+                            deduct_credits,
+                            user_id=user_id, 
+                            action_name="scraping",
+                            reference_id=product_id,
+                            reference_type="product",
+                            description=f"Product scraping completed for {url}"
+                        )
+                        if success:
+                            logger.info(f"Successfully deducted credits for user {user_id} for scraping task {task_id}")
+                        else:
+                            logger.warning(f"Failed to deduct credits for user {user_id} for scraping task {task_id}")
+                    except Exception as credit_error:
+                        logger.error(f"Error deducting credits for user {user_id} for scraping task {task_id}: {credit_error}")
+            
+            # Return the task's browser context to the pool
             try:
                 from app.browser_manager import browser_manager
-                browser_manager.cleanup()
-                logger.info(f"Browser cleanup completed for task {task_id}")
+                await browser_manager.release_context()
+                logger.info(f"Browser context released for task {task_id}")
             except Exception as cleanup_error:
-                logger.warning(f"Browser cleanup failed for task {task_id}: {cleanup_error}")
+                logger.warning(f"Browser context release failed for task {task_id}: {cleanup_error}")
+        
+        except TaskCancelled as e:
+            # The cancel endpoint already marked the task as cancelled
+            outcome = 'cancelled'
+            logger.info(str(e))
             
+            # Return the task's browser context to the pool
+            try:
+                from app.browser_manager import browser_manager
+                await browser_manager.release_context()
+                logger.info(f"Browser context released for cancelled task {task_id}")
+            except Exception as cleanup_error:
+                logger.warning(f"Browser context release failed for cancelled task {task_id}: {cleanup_error}")
+        
         except Exception as e:
+            outcome = 'deadline_exceeded' if isinstance(e, DeadlineExceeded) else 'failed'
             logger.error(f"Error in execute_scraping_task for task_id: {task_id}: {e}", exc_info=True)
             
             # Update task with error in MongoDB
-            fail_task(task_id, str(e))
+            await asyncio.to_thread(fail_task, task_id, str(e))
             
-            # Clean up browser resources even on error
+            # Return the task's browser context to the pool
             try:
                 from app.browser_manager import browser_manager
-                browser_manager.cleanup()
-                logger.info(f"Browser cleanup completed for failed task {task_id}")
+                await browser_manager.release_context()
+                logger.info(f"Browser context released for failed task {task_id}")
             except Exception as cleanup_error:
-                logger.warning(f"Browser cleanup failed for failed task {task_id}: {cleanup_error}")
+                logger.warning(f"Browser context release failed for failed task {task_id}: {cleanup_error}")
+        finally:
+            task_deadlines.finish(task_id, outcome)
         
         logger.info(f"Completed execute_scraping_task for task_id: {task_id}")
 
@@ -702,15 +347,13 @@ class ScrapingService:
             detail=detail
         )
         
-        # Start scraping in a separate thread
-        thread = threading.Thread(
-            target=self._execute_scraping_task_thread,
-            args=(actual_task_id, url, user_id, proxy, user_agent, target_language),
-            daemon=True
+        # Run scraping as a coroutine on the browser engine loop
+        browser_pool.submit(
+            self._execute_scraping_task,
+            actual_task_id, url, user_id, proxy, user_agent, target_language
         )
-        thread.start()
         
-        logger.info(f"Started scraping task {actual_task_id} for {url} by user {user_id} in thread")
+        logger.info(f"Submitted scraping task {actual_task_id} for {url} by user {user_id} to browser pool")
         return response
 
     def scrape_product(
@@ -732,11 +375,23 @@ class ScrapingService:
         Returns:
             TaskStatusResponse with product information
         """
+        # Browser work runs on the engine loop, so block until it finishes there
+        return browser_pool.run(self._scrape_product, url, proxy, user_agent, target_language)
+
+    async def _scrape_product(
+        self,
+        url: str,
+        proxy: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        target_language: Optional[str] = None
+    ) -> TaskStatusResponse:
+        """Coroutine behind scrape_product, runs on the browser engine loop"""
         # Create task in MongoDB first to get the actual task ID
         try:
             # Create the task in MongoDB and get the actual task ID
             logger.info(f"Creating MongoDB task for URL: {url}")
-            actual_task_id = create_task(
+            actual_task_id = await asyncio.to_thread(
+                create_task,
                 TaskType.SCRAPING,
                 url=url,
                 proxy=proxy,
@@ -749,12 +404,12 @@ class ScrapingService:
             
             # Start the task
             logger.info(f"Starting MongoDB task {actual_task_id}")
-            task_started = start_task(actual_task_id)
+            task_started = await asyncio.to_thread(start_task, actual_task_id)
             if not task_started:
                 raise Exception("Failed to start task in MongoDB")
             
             logger.info(f"Successfully created and started MongoDB task {actual_task_id}")
-            
+        
         except Exception as e:
             logger.error(f"Failed to create MongoDB task for URL {url}: {e}")
             # Continue with scraping even if MongoDB task creation fails
@@ -776,170 +431,130 @@ class ScrapingService:
             detail={}
         )
         
+        deadline = task_deadlines.start(actual_task_id)
+        outcome = 'completed'
         try:
-            # Validate URL
-            if not is_valid_url(url):
-                raise ValueError(f"Invalid URL format: {url}")
-            
-            # Check user's credit (for synchronous scraping, we'll use a default user_id)
-            # Note: In production, this should be passed as a parameter
-            default_user_id = "00000000-0000-0000-0000-000000000000"  # Placeholder
-            credit_check = can_perform_action(default_user_id, "scraping")
-            if credit_check.get("error"):
-                raise ValueError(f"Credit check failed: {credit_check['error']}")
-            
-            if not credit_check.get("can_perform", False):
-                reason = credit_check.get("reason", "Insufficient credits")
-                current_credits = credit_check.get("current_credits", 0)
-                required_credits = credit_check.get("required_credits", 1)
-                raise ValueError(f"Credit check failed: {reason}. Current credits: {current_credits}, Required: {required_credits}")
-            
-            logger.info(f"Credit check passed for user {default_user_id}. Can perform scraping action.")
-            
-            # Update task status in MongoDB
-            update_task_progress(actual_task_id, 1, "Starting scraping process")
-            
-            # Get proxy and user agent if not provided
-            if not proxy and settings.ROTATE_PROXIES:
-                proxy = proxy_manager.get_proxy()
-            
-            if not user_agent and settings.ROTATE_USER_AGENTS:
-                user_agent = user_agent_manager.get_user_agent()
-            
-            # First, get HTML content using browser manager
-            update_task_progress(actual_task_id, 2, "Fetching page content")
-            from app.browser_manager import browser_manager
-            html_content = browser_manager.get_page_content_with_retry(url, proxy, user_agent, True)
-            
-            # Detect platform based on URL and content
-            update_task_progress(actual_task_id, 3, "Detecting e-commerce platform")
-            platform, platform_confidence, platform_indicators = self._detect_platform_smart(url, html_content)
-            
-            # Create appropriate extractor based on detected platform
-            update_task_progress(actual_task_id, 4, "Creating platform-specific extractor")
-            from app.extractors.factory import ExtractorFactory
-            from app.extractors.cdiscount import CDiscountExtractor
-            extractor = ExtractorFactory.create_extractor(platform, html_content, url)
-            
-            logger.info(f"Extractor created successfully: {type(extractor).__name__}")
-            logger.info(f"About to start captcha detection for platform: {platform}")
-            
-            # Check for captcha and solve if needed
-            update_task_progress(actual_task_id, 5, "Checking for captcha")
-            logger.info("Starting captcha detection process...")
-            
-            # Use platform-specific captcha detection if available
-            captcha_detected = False
-            
-            # Debug: Check extractor type and available methods
-            logger.info(f"Extractor type: {type(extractor).__name__}")
-            logger.info(f"Platform: {platform}")
-            logger.info(f"Has detect_cdiscount_captcha method: {hasattr(extractor, 'detect_cdiscount_captcha')}")
-            logger.info(f"Available methods: {[method for method in dir(extractor) if 'captcha' in method.lower()]}")
-            
-            # Use direct type checking instead of hasattr
-            if isinstance(extractor, CDiscountExtractor) and platform == 'cdiscount':
-                logger.info("Using CDiscount-specific captcha detection")
-                captcha_detected = extractor.detect_cdiscount_captcha()
-                logger.info(f"CDiscount captcha detection result: {captcha_detected}")
-            else:
-                logger.info("Using generic captcha detection")
-                captcha_detected = extractor.detect_captcha()
-                logger.info(f"Generic captcha detection result: {captcha_detected}")
-            
-            if captcha_detected:
-                logger.info(f"Captcha detected on {url}, attempting to solve...")
-                update_task_progress(actual_task_id, 6, "Solving captcha")
+            async with deadline.scope():
+                # Validate URL
+                if not is_valid_url(url):
+                    raise ValueError(f"Invalid URL format: {url}")
                 
-                # Get a fresh page for captcha solving
-                page = browser_manager.create_page(user_agent)
-                try:
-                    # Navigate to the URL again
-                    page.goto(url, wait_until='domcontentloaded', timeout=120000)
+                # Check user's credit (for synchronous scraping, we'll use a default user_id)
+                # Note: In production, this should be passed as a parameter
+                default_user_id = "00000000-0000-0000-0000-000000000000"  # Placeholder
+                credit_check = await asyncio.to_thread(can_perform_action, default_user_id, "scraping")
+                if credit_check.get("error"):
+                    raise ValueError(f"Credit check failed: {credit_check['error']}")
+                
+                if not credit_check.get("can_perform", False):
+                    reason = credit_check.get("reason", "Insufficient credits")
+                    current_credits = credit_check.get("current_credits", 0)
+                    required_credits = credit_check.get("required_credits", 1)
+                    raise ValueError(f"Credit check failed: {reason}. Current credits: {current_credits}, Required: {required_credits}")
+                
+                logger.info(f"Credit check passed for user {default_user_id}. Can perform scraping action.")
+                
+                # Update task status in MongoDB
+                await asyncio.to_thread(update_task_progress, actual_task_id, 1, "Starting scraping process")
+                
+                # Get proxy and user agent if not provided
+                if not proxy and settings.ROTATE_PROXIES:
+                    proxy = proxy_pool.acquire(url)
+                
+                if not user_agent and settings.ROTATE_USER_AGENTS:
+                    user_agent = user_agent_manager.get_user_agent()
+                
+                # Fetch the page and extract product information with the cheapest tier that works
+                platform, platform_confidence, platform_indicators, product_info, fetch_tier = await self._fetch_and_extract(
+                    actual_task_id, url, deadline, proxy, user_agent
+                )
+                
+                # Update task progress before saving to database
+                await asyncio.to_thread(update_task_progress, actual_task_id, 8, "Saving product to database and detecting category")
+                
+                # Once the save starts the task runs to completion
+                async with deadline.protect("save"):
+                    # Update task with results
+                    product_id, short_id = await asyncio.to_thread(self._save_product_to_supabase, default_user_id, product_info, url, platform, target_language, actual_task_id)
                     
-                    # Solve the captcha
-                    captcha_solved = extractor.solve_captcha(page)
-                    if captcha_solved:
-                        logger.info("Captcha solved successfully, re-fetching content")
-                        # Get updated HTML content after captcha solving
-                        html_content = page.content()
-                        
-                        # Recreate extractor with updated content
-                        extractor = ExtractorFactory.create_extractor(platform, html_content, url)
+                    # Complete the task in MongoDB with product_id and short_id
+                    from app.browser_manager import browser_manager
+                    await asyncio.to_thread(complete_task, actual_task_id, {
+                        "product_id": product_id,
+                        "short_id": short_id,
+                        "fetch_tier": fetch_tier,
+                        "resource_blocking": browser_manager.get_resource_counters() if fetch_tier == TIER_BROWSER else None,
+                        "queue_wait_ms": domain_scheduler.task_wait_ms()
+                    })
+                    
+                    # Update response with results
+                    response.status = TaskStatus.COMPLETED
+                    response.message = "Scraping completed successfully"
+                    response.product_info = product_info
+                    response.completed_at = datetime.now()
+                    response.detected_platform = platform
+                    response.platform_confidence = platform_confidence
+                    response.platform_indicators = platform_indicators or []
+                    response.supabase_product_id = product_id
+                    response.short_id = short_id
+                    
+                    # Add short_id to response detail
+                    if short_id:
+                        response.detail = {"short_id": short_id}
                     else:
-                        logger.warning("Failed to solve captcha, proceeding with original content")
-                except Exception as captcha_error:
-                    logger.error(f"Error during captcha solving: {captcha_error}")
-                finally:
-                    page.close()
-            else:
-                logger.info("No captcha detected, proceeding with normal extraction")
-            
-            # Extract product information using the platform-specific extractor
-            update_task_progress(actual_task_id, 7, "Extracting product information")
-            product_info = extractor.extract_product_info()
-            
-            # Update task progress before saving to database
-            update_task_progress(actual_task_id, 8, "Saving product to database and detecting category")
-            
-            # Update task with results
-            product_id, short_id = self._save_product_to_supabase(default_user_id, product_info, url, platform, target_language, actual_task_id)
-            
-            # Complete the task in MongoDB with product_id and short_id
-            complete_task(actual_task_id, {
-                "product_id": product_id,
-                "short_id": short_id
-            })
+                        response.detail = {}
+                    
+                    logger.info(f"Successfully scraped product from {url}")
+                    
+                    # Deduct credits on successful scraping
+                    try:
+                        success = await asyncio.to_thread(
+                            deduct_credits,
+                            user_id=default_user_id, 
+                            action_name="scraping",
+                            reference_id=product_id,
+                            reference_type="product",
+                            description=f"Product scraping completed for {url}"
+                        )
+                        if success:
+                            logger.info(f"Successfully deducted credits for user {default_user_id} for scraping task {actual_task_id}")
+                        else:
+                            logger.warning(f"Failed to deduct credits for user {default_user_id} for scraping task {actual_task_id}")
+                    except Exception as credit_error:
+                        logger.error(f"Error deducting credits for user {default_user_id} for scraping task {actual_task_id}: {credit_error}")
+            
+            # Return the task's browser context to the pool
+            try:
+                from app.browser_manager import browser_manager
+                await browser_manager.release_context()
+                logger.info(f"Browser context released for task {actual_task_id}")
+            except Exception as cleanup_error:
+                logger.warning(f"Browser context release failed for task {actual_task_id}: {cleanup_error}")
+        
+        except TaskCancelled as e:
+            outcome = 'cancelled'
+            logger.info(str(e))
             
-            # Update response with results
-            response.status = TaskStatus.COMPLETED
-            response.message = "Scraping completed successfully"
-            response.product_info = product_info
+            # Update response with cancellation
+            response.status = TaskStatus.CANCELLED
+            response.message = str(e)
             response.completed_at = datetime.now()
-            response.detected_platform = platform
-            response.platform_confidence = platform_confidence
-            response.platform_indicators = platform_indicators or []
-            response.supabase_product_id = product_id
-            response.short_id = short_id
-            
-            # Add short_id to response detail
-            if short_id:
-                response.detail = {"short_id": short_id}
-            else:
-                response.detail = {}
-            
-            logger.info(f"Successfully scraped product from {url}")
             
-            # Deduct credits on successful scraping
-            try:
-                success = deduct_credits(
-                    user_id=default_user_id, 
-                    action_name="scraping",
-                    reference_id=product_id,
-                    reference_type="product",
-                    description=f"Product scraping completed for {url}"
-                )
-                if success:
-                    logger.info(f"Successfully deducted credits for user {default_user_id} for scraping task {actual_task_id}")
-                else:
-                    logger.warning(f"Failed to deduct credits for user {default_user_id} for scraping task {actual_task_id}")
-            except Exception as credit_error:
-                logger.error(f"Error deducting credits for user {default_user_id} for scraping task {actual_task_id}: {credit_error}")
-            
-            # Clean up browser resources
+            # Return the task's browser context to the pool
             try:
                 from app.browser_manager import browser_manager
-                browser_manager.cleanup()
-                logger.info(f"Browser cleanup completed for task {actual_task_id}")
+                await browser_manager.release_context()
+                logger.info(f"Browser context released for cancelled task {actual_task_id}")
             except Exception as cleanup_error:
-                logger.warning(f"Browser cleanup failed for task {actual_task_id}: {cleanup_error}")
-            
+                logger.warning(f"Browser context release failed for cancelled task {actual_task_id}: {cleanup_error}")
+        
         except Exception as e:
+            outcome = 'deadline_exceeded' if isinstance(e, DeadlineExceeded) else 'failed'
             error_msg = str(e)
             logger.error(f"Error in scrape_product for {url}: {error_msg}", exc_info=True)
             
             # Update task with error in MongoDB
-            fail_task(actual_task_id, error_msg)
+            await asyncio.to_thread(fail_task, actual_task_id, error_msg)
             
             # Update response with error
             response.status = TaskStatus.FAILED
@@ -947,16 +562,284 @@ class ScrapingService:
             response.error = error_msg
             response.completed_at = datetime.now()
             
-            # Clean up browser resources even on error
+            # Return the task's browser context to the pool
             try:
                 from app.browser_manager import browser_manager
-                browser_manager.cleanup()
-                logger.info(f"Browser cleanup completed for failed task {actual_task_id}")
+                await browser_manager.release_context()
+                logger.info(f"Browser context released for failed task {actual_task_id}")
             except Exception as cleanup_error:
-                logger.warning(f"Browser cleanup failed for failed task {actual_task_id}: {cleanup_error}")
+                logger.warning(f"Browser context release failed for failed task {actual_task_id}: {cleanup_error}")
+        finally:
+            task_deadlines.finish(actual_task_id, outcome)
         
         return response
 
+    # ============================================================================
+    # FETCH TIERS
+    # ============================================================================
+    
+    async def _fetch_and_extract(
+        self,
+        task_id: str,
+        url: str,
+        deadline: Deadline,
+        proxy: Optional[str] = None,
+        user_agent: Optional[str] = None
+    ) -> Tuple[Optional[str], float, List[str], ProductInfo, str]:
+        """
+        Fetch the page and extract product information, trying the HTTP tier first
+        when the domain is expected to work without a browser
+        
+        Args:
+            task_id: Task ID used for progress updates
+            url: Product URL to scrape
+            deadline: Time budget of the task
+            proxy: Proxy to use
+            user_agent: User agent to use
+            
+        Returns:
+            Tuple of (platform, platform_confidence, platform_indicators, product_info, fetch_tier)
+        """
+        # Report politeness queueing in the task progress
+        async def report_queue_wait(domain: str, wait_seconds: float):
+            message = f"Waiting {wait_seconds:.0f}s for a {domain} fetch slot" if wait_seconds else f"Queued for a free {domain} fetch slot"
+            try:
+                await asyncio.to_thread(update_task_progress, task_id, 2, message)
+            except Exception as e:
+                logger.warning(f"Failed to report queue wait for task {task_id}: {e}")
+        
+        domain_scheduler.set_wait_listener(report_queue_wait)
+        
+        # URLs that just gave up with a 404 or DNS failure fail fast
+        retry_policy.check_hopeless(url)
+        
+        # Remembered domains get their platform hint and fetch tier before anything is fetched
+        memo = await asyncio.to_thread(platform_memo.lookup, url)
+        platform_hint = self._detect_platform_from_url(url)[0] or (memo.platform if memo else None)
+        if memo and memo.fetch_tier:
+            http_fetcher.seed_tier(url, memo.fetch_tier)
+        
+        if http_fetcher.preferred_tier(url) == TIER_HTTP:
+            result = await self._scrape_with_http(task_id, url, deadline, proxy, user_agent, platform_hint)
+            if result:
+                await asyncio.to_thread(platform_memo.record_tier, url, TIER_HTTP)
+                return result + (TIER_HTTP,)
+        else:
+            logger.info(f"Domain learned as browser-only, skipping HTTP tier for {url}")
+        
+        http_fetcher.record_browser_run(url)
+        result = await self._scrape_with_browser(task_id, url, deadline, proxy, user_agent, platform_hint)
+        await asyncio.to_thread(platform_memo.record_tier, url, TIER_BROWSER)
+        return result + (TIER_BROWSER,)
+    
+    async def _scrape_with_http(
+        self,
+        task_id: str,
+        url: str,
+        deadline: Deadline,
+        proxy: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        platform_hint: Optional[str] = None
+    ) -> Optional[Tuple[Optional[str], float, List[str], ProductInfo]]:
+        """
+        Scrape a product with a plain HTTP request
+        
+        Args:
+            platform_hint: Platform known from the URL or the platform memo
+            
+        Returns:
+            Tuple of (platform, platform_confidence, platform_indicators, product_info),
+            or None if the page needs the browser tier
+        """
+        await asyncio.to_thread(update_task_progress, task_id, 2, "Fetching page content over HTTP")
+        try:
+            async with deadline.stage("HTTP fetch"):
+                result = await http_fetcher.fetch(url, proxy, user_agent, platform_hint)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            error_class = classify_error(e)
+            http_fetcher.record_http_result(url, False, str(e))
+            if not proxy and not retry_policy.strategy(error_class).escalate:
+                # The browser would resolve the host the same way
+                logger.warning(f"HTTP tier failed for {url} with {error_class}, not escalating: {e}")
+                retry_policy.give_up(url, error_class)
+                raise
+            logger.info(f"HTTP tier failed for {url} ({error_class}), escalating to browser: {e}")
+            retry_policy.record(error_class, 'escalated')
+            return None
+        
+        if http_fetcher.looks_like_js_wall(result.html):
+            logger.info(f"HTTP tier got a JavaScript shell or challenge page for {url}, escalating to browser")
+            http_fetcher.record_http_result(url, False, "js_wall")
+            domain_scheduler.record_outcome(url, bool(JS_WALL_PATTERNS.search(result.html[:20000])), platform_hint)
+            return None
+        
+        # Headers and the document head may name the platform; its product JSON endpoint
+        # then fills fields the server-rendered HTML lacks, instead of escalating to the browser
+        early = None
+        if settings.EARLY_DETECTION_ENABLED:
+            early = await early_detector.inspect_http(url, result.headers, result.html, platform_hint, proxy, user_agent)
+        
+        await asyncio.to_thread(update_task_progress, task_id, 3, "Detecting e-commerce platform")
+        platform, platform_confidence, platform_indicators = await asyncio.to_thread(self._detect_platform_smart, url, result.html)
+        if not platform and early and early.platform:
+            platform, platform_confidence, platform_indicators = early.platform, early.confidence, early.indicators
+        
+        await asyncio.to_thread(update_task_progress, task_id, 4, "Creating platform-specific extractor")
+        from app.extractors.factory import ExtractorFactory
+        extractor = await asyncio.to_thread(ExtractorFactory.create_extractor, platform, result.html, url, early.api_responses if early else None)
+        
+        if self._detect_captcha(extractor, platform):
+            logger.info(f"HTTP tier hit a captcha on {url}, escalating to browser")
+            http_fetcher.record_http_result(url, False, "captcha")
+            domain_scheduler.record_outcome(url, True, platform_hint)
+            proxy_pool.record(proxy, url, OUTCOME_BLOCKED)
+            retry_policy.record(ERROR_CAPTCHA, 'escalated')
+            return None
+        domain_scheduler.record_outcome(url, False, platform_hint)
+        proxy_pool.record(proxy, url, OUTCOME_OK)
+        
+        await asyncio.to_thread(update_task_progress, task_id, 7, "Extracting product information")
+        async with deadline.stage("extraction"):
+            product_info = await asyncio.to_thread(extractor.extract_product_info)
+        
+        missing_fields = self._get_missing_fields(product_info)
+        if missing_fields:
+            logger.info(f"HTTP tier result for {url} is missing {missing_fields}, escalating to browser")
+            http_fetcher.record_http_result(url, False, f"missing fields: {', '.join(missing_fields)}")
+            return None
+        
+        http_fetcher.record_http_result(url, True)
+        # Only complete HTTP documents are archived; escalated ones are archived by the browser tier
+        await asyncio.to_thread(snapshot_archive.add, url, result.html, platform, TIER_HTTP, early.api_responses if early else None)
+        logger.info(f"HTTP tier produced a complete product for {url}")
+        return platform, platform_confidence, platform_indicators, product_info
+    
+    async def _scrape_with_browser(
+        self,
+        task_id: str,
+        url: str,
+        deadline: Deadline,
+        proxy: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        platform_hint: Optional[str] = None
+    ) -> Tuple[Optional[str], float, List[str], ProductInfo]:
+        """
+        Scrape a product by rendering it in the browser, solving captchas if needed
+        
+        Args:
+            platform_hint: Platform known from the URL or the platform memo; lets the browser
+                           stop waiting as soon as product data is ready
+            
+        Returns:
+            Tuple of (platform, platform_confidence, platform_indicators, product_info)
+        """
+        await asyncio.to_thread(update_task_progress, task_id, 2, "Fetching page content in browser")
+        from app.browser_manager import browser_manager
+        from app.extractors.factory import ExtractorFactory
+        
+        # The fetch (all retries) gets at most BROWSER_PAGE_FETCH_TIMEOUT of the task's budget;
+        # running out interrupts navigation instead of waiting for Playwright's own timeout
+        async with deadline.stage("page fetch", settings.BROWSER_PAGE_FETCH_TIMEOUT / 1000.0):
+            html_content = await browser_manager.get_page_content_with_retry(url, proxy, user_agent, True, platform_hint, keep_page=True)
+        # Retries may have moved to another proxy of the pool
+        proxy = browser_manager.proxy or proxy
+        
+        # Detect platform based on URL and content
+        await asyncio.to_thread(update_task_progress, task_id, 3, "Detecting e-commerce platform")
+        platform, platform_confidence, platform_indicators = await asyncio.to_thread(self._detect_platform_smart, url, html_content)
+        early = early_detector.current() if settings.EARLY_DETECTION_ENABLED else None
+        if not platform and early and early.platform:
+            # Only the response headers named the platform
+            platform, platform_confidence, platform_indicators = early.platform, early.confidence, early.indicators
+        
+        # Create appropriate extractor based on detected platform
+        await asyncio.to_thread(update_task_progress, task_id, 4, "Creating platform-specific extractor")
+        api_responses = await browser_manager.get_api_responses()
+        extractor = await asyncio.to_thread(ExtractorFactory.create_extractor, platform, html_content, url, api_responses)
+        
+        logger.info(f"Extractor created successfully: {type(extractor).__name__}")
+        
+        # Check for captcha and solve if needed
+        await asyncio.to_thread(update_task_progress, task_id, 5, "Checking for captcha")
+        
+        captcha_detected = self._detect_captcha(extractor, platform)
+        domain_scheduler.record_outcome(url, captcha_detected, platform_hint)
+        proxy_pool.record(proxy, url, OUTCOME_BLOCKED if captcha_detected else OUTCOME_OK)
+        if captcha_detected:
+            logger.info(f"Captcha detected on {url}, attempting to solve...")
+            await asyncio.to_thread(update_task_progress, task_id, 6, "Solving captcha")
+            
+            async with deadline.stage("captcha solving"):
+                # Solve on the page that produced the HTML - no second navigation
+                page = browser_manager.current_page
+                try:
+                    if page is None:
+                        logger.warning("Fetched page is no longer open, reloading it for captcha solving")
+                        page = await browser_manager.create_page(user_agent, platform)
+                        await page.goto(url, wait_until='domcontentloaded', timeout=deadline.remaining_ms(settings.PLAYWRIGHT_TIMEOUT))
+                    
+                    captcha_solved = await extractor.solve_captcha(page)
+                    
+                    if captcha_solved:
+                        logger.info("Captcha solved successfully, waiting for product page to become ready...")
+                        await browser_manager.wait_until_ready(page, platform)
+                        html_content = await page.content()
+                        api_responses = await browser_manager.get_api_responses()
+                        extractor = await asyncio.to_thread(ExtractorFactory.create_extractor, platform, html_content, url, api_responses)
+                        
+                        # The solve may land on an interstitial that redirects once more
+                        if self._detect_captcha(extractor, platform):
+                            logger.info("Captcha page still present after solving, waiting for redirect...")
+                            await browser_manager.wait_until_ready(page, platform)
+                            html_content = await page.content()
+                            api_responses = await browser_manager.get_api_responses()
+                            extractor = await asyncio.to_thread(ExtractorFactory.create_extractor, platform, html_content, url, api_responses)
+                    else:
+                        logger.warning("Failed to solve captcha, proceeding with original content")
+                except Exception as captcha_error:
+                    logger.error(f"Error during captcha solving: {captcha_error}")
+                finally:
+                    if page is not None and page is not browser_manager.current_page:
+                        await page.close()
+                    await browser_manager.close_page()
+        else:
+            logger.info("No captcha detected, proceeding with normal extraction")
+            await browser_manager.close_page()
+        
+        # Keep the domain's cookies (consent, captcha clearance) for the next context;
+        # a state that still ends on a captcha is dropped
+        still_blocked = captcha_detected and self._detect_captcha(extractor, platform)
+        await browser_manager.persist_storage_state(url, proxy, blocked=still_blocked, refresh=captcha_detected)
+        if captcha_detected:
+            retry_policy.record(ERROR_CAPTCHA, 'failed')
+            retry_policy.record(ERROR_CAPTCHA, 'gave_up' if still_blocked else 'recovered')
+        
+        # Extract product information using the platform-specific extractor
+        await asyncio.to_thread(update_task_progress, task_id, 7, "Extracting product information")
+        await asyncio.to_thread(snapshot_archive.add, url, html_content, platform, TIER_BROWSER, api_responses)
+        async with deadline.stage("extraction"):
+            product_info = await asyncio.to_thread(extractor.extract_product_info)
+        
+        return platform, platform_confidence, platform_indicators, product_info
+    
+    def _detect_captcha(self, extractor, platform: Optional[str]) -> bool:
+        """Detect a captcha using platform-specific detection when available"""
+        from app.extractors.cdiscount import CDiscountExtractor
+        
+        # Use direct type checking instead of hasattr
+        if isinstance(extractor, CDiscountExtractor) and platform == 'cdiscount':
+            logger.info("Using CDiscount-specific captcha detection")
+            return extractor.detect_cdiscount_captcha()
+        
+        logger.info("Using generic captcha detection")
+        return extractor.detect_captcha()
+    
+    def _get_missing_fields(self, product_info: ProductInfo) -> List[str]:
+        """Get the required product fields that were not extracted"""
+        return [field for field in settings.HTTP_TIER_REQUIRED_FIELDS if not getattr(product_info, field, None)]
+
     # ============================================================================
     # TASK MANAGEMENT METHODS
     # ============================================================================
@@ -995,6 +878,21 @@ class ScrapingService:
             logger.error(f"Error getting task status for {task_id}: {e}")
             return None
     
+    def cancel_task(self, task_id: str) -> bool:
+        """
+        Cancel a pending or running scraping task, interrupting its pipeline
+        
+        Args:
+            task_id: Task ID to cancel
+            
+        Returns:
+            False if the task is already saving its result and can no longer be cancelled
+        """
+        if not task_deadlines.cancel(task_id):
+            return False
+        cancel_task(task_id)
+        return True
+    
     def get_all_tasks(self) -> Dict[str, Dict[str, Any]]:
         """Get all active tasks"""
         # Since we removed the get_tasks_by_status function, 
@@ -1026,7 +924,26 @@ class ScrapingService:
     
     def _detect_platform_smart(self, url: str, html_content: str) -> Tuple[Optional[str], float, List[str]]:
         """
-        Smart platform detection: URL-only for known platforms, URL+content for others
+        Smart platform detection: the platform memo first, then URL-only for known
+        platforms and URL+content for others; confident results are remembered
+        Returns: (platform, confidence, indicators)
+        """
+        memo = platform_memo.lookup(url)
+        if memo and not memo.is_stale():
+            logger.info(f"Platform remembered for {memo.domain}: {memo.platform} ({memo.source}, confidence: {memo.confidence:.2f})")
+            return memo.platform, memo.confidence, [f"Platform remembered for {memo.domain}: {memo.platform} ({memo.source})"]
+        
+        platform, confidence, indicators = self._detect_platform_from_url_and_html(url, html_content)
+        if memo and (not platform or confidence < settings.PLATFORM_MEMO_MIN_CONFIDENCE):
+            # A weak re-verification (e.g. on a challenge page) does not replace what was learned
+            logger.info(f"Re-verification of {memo.domain} was inconclusive, keeping {memo.platform}")
+            return memo.platform, memo.confidence, [f"Platform remembered for {memo.domain}: {memo.platform} (re-verification inconclusive)"]
+        platform_memo.remember(url, platform, confidence)
+        return platform, confidence, indicators
+
+    def _detect_platform_from_url_and_html(self, url: str, html_content: str) -> Tuple[Optional[str], float, List[str]]:
+        """
+        Detect the platform from the URL for known platforms, from URL+content for others
         Returns: (platform, confidence, indicators)
         """
         # Platforms that only need URL-based detection
@@ -1072,84 +989,16 @@ class ScrapingService:
 
     def _detect_platform_from_url(self, url: str) -> Tuple[Optional[str], float, List[str]]:
         """
-        Detect platform from URL first
+        Detect platform from URL first, using the marketplace domain registry
         Returns: (platform, confidence, indicators)
         """
         try:
             from urllib.parse import urlparse
-            parsed = urlparse(url)
-            domain = parsed.netloc.lower()
-            
-            # URL-based platform detection
-            url_platforms = {
-                'amazon': {
-                    'domains': ['amazon.com', 'www.amazon.com', 'amazon.co.uk', 'www.amazon.co.uk', 
-                               'amazon.de', 'www.amazon.de', 'amazon.fr', 'www.amazon.fr', 
-                               'amazon.it', 'www.amazon.it', 'amazon.es', 'www.amazon.es', 
-                               'amazon.nl', 'www.amazon.nl', 'amazon.ca', 'www.amazon.ca', 
-                               'amazon.com.au', 'www.amazon.com.au', 'amazon.co.jp', 'www.amazon.co.jp', 
-                               'amazon.in', 'www.amazon.in'],
-                    'confidence': 0.95,
-                    'indicators': [f"Amazon domain detected: {domain}"]
-                },
-                'ebay': {
-                    'domains': ['ebay.com', 'www.ebay.com', 'ebay.co.uk', 'www.ebay.co.uk', 
-                               'ebay.de', 'www.ebay.de', 'ebay.fr', 'www.ebay.fr', 
-                               'ebay.it', 'www.ebay.it', 'ebay.es', 'www.ebay.es', 
-                               'ebay.ca', 'www.ebay.ca', 'ebay.nl', 'www.ebay.nl', 
-                               'ebay.com.au', 'www.ebay.com.au'],
-                    'confidence': 0.95,
-                    'indicators': [f"eBay domain detected: {domain}"]
-                },
-                'otto': {
-                    'domains': ['otto.de', 'www.otto.de'],
-                    'confidence': 0.95,
-                    'indicators': [f"Otto domain detected: {domain}"]
-                },
-                'bol': {
-                    'domains': ['bol.com', 'www.bol.com'],
-                    'confidence': 0.95,
-                    'indicators': [f"Bol.com domain detected: {domain}"]
-                },
-                'jd': {
-                    'domains': ['jd.com', 'www.jd.com', 'global.jd.com', 'www.global.jd.com'],
-                    'confidence': 0.95,
-                    'indicators': [f"JD.com domain detected: {domain}"]
-                },
-                'cdiscount': {
-                    'domains': ['cdiscount.com', 'www.cdiscount.com'],
-                    'confidence': 0.95,
-                    'indicators': [f"CDiscount domain detected: {domain}"]
-                },
-                'shopify': {
-                    'domains': ['myshopify.com', '*.myshopify.com', 'shop.myshopify.com'],
-                    'confidence': 0.95,
-                    'indicators': [f"Shopify domain detected: {domain}"]
-                },
-                'bigcommerce': {
-                    'domains': ['bigcommerce.com', '*.bigcommerce.com', 'api.bigcommerce.com'],
-                    'confidence': 0.95,
-                    'indicators': [f"Bigcommerce domain detected: {domain}"]
-                },
-                'squarespace': {
-                    'domains': ['squarespace.com', '*.squarespace.com', 'api.squarespace.com'],
-                    'confidence': 0.95,
-                    'indicators': [f"Squarespace domain detected: {domain}"]
-                }
-            }
+            domain = urlparse(url).netloc.lower()
             
-            # Check if domain matches any known platform
-            for platform, config in url_platforms.items():
-                # Check exact match first
-                if domain in config['domains']:
-                    return platform, config['confidence'], config['indicators']
-                
-                # Check wildcard patterns
-                for pattern in config['domains']:
-                    if pattern.startswith('*.'):
-                        suffix = pattern[2:]  # Remove '*.' prefix
-                        if domain.endswith(suffix):
-                            return platform, config['confidence'], config['indicators']
+            entry = domain_registry.lookup(url)
+            if entry:
+                return entry.platform, 0.95, [f"{entry.platform_name} domain detected: {domain}"]
             
             # No URL-based platform detected
             return None, 0.0, [f"No known platform detected from URL domain: {domain}"]
@@ -1164,82 +1013,13 @@ class ScrapingService:
         Returns: (platform, confidence, indicators)
         """
         try:
-            platform, confidence, indicators = self._analyze_content_for_platform(html_content)
+            platform, confidence, indicators = platform_detector.detect(html_content)
             return platform, confidence, indicators
         except Exception as e:
             logger.warning(f"Platform detection from HTML failed for {url}: {e}")
             # Return default values if detection fails
             return None, 0.0, [f"Platform detection failed: {str(e)}"]
 
-    def _analyze_content_for_platform(self, html_content: str) -> Tuple[Optional[str], float, List[str]]:
-        """Analyze HTML content for platform indicators using only reliable methods"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        scores = {}
-        all_indicators = {}
-        
-        for platform, config in self.platform_indicators.items():
-            score = 0
-            indicators = []
-            
-            # 1. Check HTML patterns (search entire HTML content) - Most reliable
-            for pattern in config.get('patterns', []):
-                matches = re.findall(pattern, html_content, re.IGNORECASE)
-                if matches:
-                    match_count = len(matches)
-                    pattern_score = min(0.4 * match_count, 0.8)  # Increased weight for patterns
-                    score += pattern_score
-                    indicators.append(f"HTML pattern '{pattern}' found {match_count} time(s)")
-            
-            # 2. Check meta tags - Very reliable
-            meta_tags = soup.find_all('meta')
-            for meta_pattern in config.get('meta_tags', []):
-                for meta in meta_tags:
-                    # Check all meta attributes
-                    meta_content = ' '.join([
-                        str(meta.get('content', '')),
-                        str(meta.get('name', '')),
-                        str(meta.get('property', '')),
-                        str(meta.get('http-equiv', ''))
-                    ])
-                    if re.search(meta_pattern, meta_content, re.IGNORECASE):
-                        score += 0.6  # Increased weight for meta tags
-                        indicators.append(f"Meta tag pattern: {meta_pattern}")
-                        break
-            
-            # 3. Check external script sources - Reliable
-            scripts = soup.find_all('script')
-            for script_pattern in config.get('script_sources', []):
-                for script in scripts:
-                    # Check src attribute only (external scripts)
-                    src = script.get('src', '')
-                    if src and script_pattern in src:
-                        score += 0.5  # Increased weight for external scripts
-                        indicators.append(f"External script: {script_pattern}")
-            
-            if score > 0:
-                scores[platform] = min(score, 1.0)  # Cap at 1.0
-                all_indicators[platform] = indicators
-        
-        # Handle platform conflicts and preferences
-        if 'wordpress' in scores and 'woocommerce' in scores:
-            # WooCommerce is WordPress-based, so if WooCommerce is detected with decent confidence, prefer it
-            if scores['woocommerce'] >= 0.3:
-                scores.pop('wordpress', None)
-                all_indicators.pop('wordpress', None)
-            elif scores['wordpress'] > scores['woocommerce'] * 2:
-                # If WordPress score is much higher, it's likely plain WordPress
-                scores.pop('woocommerce', None)
-                all_indicators.pop('woocommerce', None)
-        
-        if not scores:
-            return None, 0.0, ["No platform indicators found"]
-        
-        best_platform = max(scores, key=scores.get)
-        confidence = scores[best_platform]
-        indicators = all_indicators[best_platform]
-        
-        return best_platform, confidence, indicators
-
     # ============================================================================
     # SCRAPER CREATION METHODS
     # ============================================================================
@@ -1456,6 +1236,10 @@ Available sub-categories:
             
             logger.info("Sending category detection request to OpenAI...")
             
+            # Category detection only gets what is left of the task's deadline
+            deadline = current_deadline()
+            request_options = {'timeout': max(1.0, deadline.remaining())} if deadline else {}
+            
             # Call OpenAI for category detection with simple text response
             response = client.chat.completions.create(
                 model=settings.OPENAI_MODEL,
@@ -1468,7 +1252,8 @@ Available sub-categories:
                         "role": "user",
                         "content": prompt
                     }
-                ]
+                ],
+                **request_options
             )
             
             logger.info("OpenAI response received")
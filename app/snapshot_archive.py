@@ -0,0 +1,373 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+import zstandard
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+from app.config import settings
+from app.logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+# Snapshots are written with zstd; zlib is only read, for snapshots archived before zstd was required
+CODEC_ZSTD = 'zstd'
+CODEC_ZLIB = 'zlib'
+
+# Snapshots added between retention passes
+PRUNE_EVERY = 100
+
+
+@dataclass
+class Snapshot:
+    """One archived document: which URL was fetched when, and where its HTML and captured API JSON are stored"""
+    snapshot_id: str
+    url: str
+    platform: Optional[str]
+    fetched_at: float
+    fetch_tier: Optional[str]
+    content_hash: str
+    size: int
+    stored_size: int
+    codec: str
+    # Captured XHR/fetch JSON handed to the extractor with the document (always zstd)
+    api_responses_hash: Optional[str] = None
+    api_stored_size: int = 0
+
+
+def _compress(data: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=settings.SNAPSHOT_ZSTD_LEVEL).compress(data)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def _reextract_snapshot(blob_path: str, codec: str, platform: Optional[str], url: str, api_blob_path: Optional[str] = None) -> Dict[str, Any]:
+    """Re-run extraction for one snapshot (module-level so it can run in worker processes)"""
+    from app.extractors.factory import ExtractorFactory
+    try:
+        with open(blob_path, 'rb') as f:
+            html_content = _decompress(f.read(), codec).decode('utf-8', errors='replace')
+        api_responses = None
+        if api_blob_path:
+            with open(api_blob_path, 'rb') as f:
+                api_responses = json.loads(_decompress(f.read(), CODEC_ZSTD))
+        extractor = ExtractorFactory.create_extractor(platform, html_content, url, api_responses)
+        product_info = extractor.extract_product_info()
+        return {'product': product_info.model_dump(), 'error': None}
+    except Exception as e:
+        return {'product': None, 'error': str(e)}
+
+
+class SnapshotArchive:
+    """
+    Local archive of fetched product pages for offline re-extraction.
+
+    Documents are compressed with zstd (older zlib snapshots stay readable) and stored
+    content-addressed, so refetching an unchanged page costs no extra space. The API
+    JSON the extractor was given is stored the same way, so re-extraction sees the
+    same inputs as the live scrape.
+    A JSON-lines index keys each snapshot by URL, fetch time and platform.
+    Snapshots older than SNAPSHOT_RETENTION_DAYS, or beyond SNAPSHOT_MAX_SIZE_MB
+    (oldest first), are pruned.
+    """
+
+    def __init__(self, archive_dir: Optional[str] = None):
+        self.archive_dir = Path(archive_dir or settings.SNAPSHOT_ARCHIVE_DIR)
+        self.codec = CODEC_ZSTD
+        self._lock = threading.Lock()
+        self._snapshots: List[Snapshot] = []
+        self._blob_codecs: Dict[str, str] = {}
+        self._loaded = False
+        self._added_since_prune = 0
+        self.bytes_in = 0
+        self.bytes_stored = 0
+
+    def _index_path(self) -> Path:
+        return self.archive_dir / 'index.jsonl'
+
+    def blob_path(self, snapshot: Snapshot) -> Path:
+        """Path of the compressed document for a snapshot"""
+        extension = 'zst' if snapshot.codec == CODEC_ZSTD else 'zz'
+        return self.archive_dir / 'blobs' / snapshot.content_hash[:2] / f"{snapshot.content_hash}.{extension}"
+
+    def api_blob_path(self, snapshot: Snapshot) -> Optional[Path]:
+        """Path of the compressed API JSON for a snapshot, or None if it has none"""
+        content_hash = snapshot.api_responses_hash
+        return self.archive_dir / 'blobs' / content_hash[:2] / f"{content_hash}.json.zst" if content_hash else None
+
+    def _write_blob(self, path: Path, data: bytes) -> int:
+        """Compress data into path unless it is already stored (caller holds the lock), returning the stored size"""
+        if path.exists():
+            return path.stat().st_size
+        compressed = _compress(data)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+        self.bytes_in += len(data)
+        self.bytes_stored += len(compressed)
+        return len(compressed)
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        index_path = self._index_path()
+        if not index_path.exists():
+            return
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        snapshot = Snapshot(**json.loads(line))
+                        self._snapshots.append(snapshot)
+                        self._blob_codecs[snapshot.content_hash] = snapshot.codec
+            logger.info(f"Snapshot archive loaded {len(self._snapshots)} snapshots")
+        except Exception as e:
+            logger.warning(f"Failed to load snapshot index: {e}")
+
+    def add(
+        self,
+        url: str,
+        html_content: str,
+        platform: Optional[str] = None,
+        fetch_tier: Optional[str] = None,
+        api_responses: Optional[List[Dict[str, Any]]] = None
+    ) -> Optional[Snapshot]:
+        """
+        Archive a fetched document (blocking - call via asyncio.to_thread from async code)
+
+        Args:
+            url: URL the document was fetched from
+            html_content: Raw HTML
+            platform: Detected platform
+            fetch_tier: Tier that fetched the document (http/browser)
+            api_responses: Captured API JSON passed to the extractor with the document
+
+        Returns:
+            The stored Snapshot, or None if archiving is disabled or failed
+        """
+        if not settings.SNAPSHOT_ARCHIVE_ENABLED:
+            return None
+        try:
+            data = html_content.encode('utf-8')
+            content_hash = hashlib.sha256(data).hexdigest()
+            api_data = json.dumps(api_responses, sort_keys=True).encode('utf-8') if api_responses else None
+            api_hash = hashlib.sha256(api_data).hexdigest() if api_data else None
+            fetched_at = time.time()
+            with self._lock:
+                self._ensure_loaded()
+                # An identical document archived earlier with zlib keeps its stored blob
+                codec = self._blob_codecs.get(content_hash, self.codec)
+                snapshot = Snapshot(
+                    snapshot_id=hashlib.sha256(f"{url}|{fetched_at}|{platform}".encode('utf-8')).hexdigest()[:16],
+                    url=url,
+                    platform=platform,
+                    fetched_at=fetched_at,
+                    fetch_tier=fetch_tier,
+                    content_hash=content_hash,
+                    size=len(data),
+                    stored_size=0,
+                    codec=codec,
+                    api_responses_hash=api_hash,
+                )
+                blob_path = self.blob_path(snapshot)
+                if not blob_path.exists() and snapshot.codec != CODEC_ZSTD:
+                    # The old zlib blob was pruned - store the document again with zstd
+                    snapshot.codec = CODEC_ZSTD
+                    blob_path = self.blob_path(snapshot)
+                snapshot.stored_size = self._write_blob(blob_path, data)
+                if api_data:
+                    snapshot.api_stored_size = self._write_blob(self.api_blob_path(snapshot), api_data)
+
+                with open(self._index_path(), 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(asdict(snapshot)) + '\n')
+                self._snapshots.append(snapshot)
+                self._blob_codecs[content_hash] = snapshot.codec
+
+                self._added_since_prune += 1
+                if self._added_since_prune >= PRUNE_EVERY:
+                    self._prune()
+            return snapshot
+        except Exception as e:
+            logger.warning(f"Failed to archive snapshot of {url}: {e}")
+            return None
+
+    def _prune(self):
+        """Apply the retention limits and rewrite the index (caller holds the lock)"""
+        self._added_since_prune = 0
+        cutoff = time.time() - settings.SNAPSHOT_RETENTION_DAYS * 86400
+        max_bytes = settings.SNAPSHOT_MAX_SIZE_MB * 1024 * 1024
+
+        # Newest first: keep snapshots until the age or size limit is hit
+        kept: List[Snapshot] = []
+        kept_bytes = 0
+        counted_blobs = set()
+        for snapshot in sorted(self._snapshots, key=lambda s: s.fetched_at, reverse=True):
+            blob_bytes = 0 if snapshot.content_hash in counted_blobs else snapshot.stored_size
+            if snapshot.api_responses_hash and snapshot.api_responses_hash not in counted_blobs:
+                blob_bytes += snapshot.api_stored_size
+            if snapshot.fetched_at < cutoff or kept_bytes + blob_bytes > max_bytes:
+                continue
+            kept.append(snapshot)
+            kept_bytes += blob_bytes
+            counted_blobs.add(snapshot.content_hash)
+            if snapshot.api_responses_hash:
+                counted_blobs.add(snapshot.api_responses_hash)
+
+        if len(kept) == len(self._snapshots):
+            return
+
+        removed_paths = {self.blob_path(s) for s in self._snapshots if s.content_hash not in counted_blobs}
+        removed_paths.update(
+            self.api_blob_path(s) for s in self._snapshots
+            if s.api_responses_hash and s.api_responses_hash not in counted_blobs
+        )
+        kept.reverse()
+        self._snapshots = kept
+        self._blob_codecs = {snapshot.content_hash: snapshot.codec for snapshot in kept}
+
+        tmp_path = self._index_path().with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for snapshot in kept:
+                f.write(json.dumps(asdict(snapshot)) + '\n')
+        os.replace(tmp_path, self._index_path())
+
+        for path in removed_paths:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        logger.info(f"Pruned snapshot archive to {len(kept)} snapshots ({kept_bytes / 1024 / 1024:.1f} MB)")
+
+    def prune(self):
+        """Apply the retention limits now"""
+        with self._lock:
+            self._ensure_loaded()
+            self._prune()
+
+    def find(
+        self,
+        url: Optional[str] = None,
+        platform: Optional[str] = None,
+        since: Optional[float] = None,
+        latest_only: bool = False,
+        limit: Optional[int] = None
+    ) -> List[Snapshot]:
+        """
+        Find archived snapshots, newest first
+
+        Args:
+            url: Only snapshots of this URL
+            platform: Only snapshots of this platform
+            since: Only snapshots fetched at or after this Unix timestamp
+            latest_only: Only the newest snapshot per URL
+            limit: Maximum number of snapshots
+
+        Returns:
+            List of Snapshot
+        """
+        with self._lock:
+            self._ensure_loaded()
+            snapshots = list(self._snapshots)
+
+        results: List[Snapshot] = []
+        seen_urls = set()
+        for snapshot in sorted(snapshots, key=lambda s: s.fetched_at, reverse=True):
+            if url and snapshot.url != url:
+                continue
+            if platform and (snapshot.platform or '').lower() != platform.lower():
+                continue
+            if since and snapshot.fetched_at < since:
+                continue
+            if latest_only:
+                if snapshot.url in seen_urls:
+                    continue
+                seen_urls.add(snapshot.url)
+            results.append(snapshot)
+            if limit and len(results) >= limit:
+                break
+        return results
+
+    def load_html(self, snapshot: Snapshot) -> str:
+        """Read and decompress the document of a snapshot"""
+        with open(self.blob_path(snapshot), 'rb') as f:
+            return _decompress(f.read(), snapshot.codec).decode('utf-8', errors='replace')
+
+    def load_api_responses(self, snapshot: Snapshot) -> Optional[List[Dict[str, Any]]]:
+        """Read the captured API JSON of a snapshot, or None if it has none"""
+        api_blob_path = self.api_blob_path(snapshot)
+        if api_blob_path is None:
+            return None
+        with open(api_blob_path, 'rb') as f:
+            return json.loads(_decompress(f.read(), CODEC_ZSTD))
+
+    def reextract(self, snapshots: List[Snapshot], workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Re-run the platform extractors over archived snapshots, in parallel worker processes
+
+        Args:
+            snapshots: Snapshots to re-extract
+            workers: Number of worker processes (CPU count if None; 1 runs in-process)
+
+        Returns:
+            List of dictionaries with snapshot metadata, the extracted product and any error
+        """
+        start_time = time.time()
+        jobs = [
+            (str(self.blob_path(s)), s.codec, s.platform, s.url, str(self.api_blob_path(s)) if s.api_responses_hash else None)
+            for s in snapshots
+        ]
+        workers = workers or settings.SNAPSHOT_REEXTRACT_WORKERS or os.cpu_count() or 1
+
+        if workers <= 1 or len(jobs) <= 1:
+            outcomes = [_reextract_snapshot(*job) for job in jobs]
+        else:
+            # Spawned, not forked: the API server's engine thread, event loop and logging
+            # locks must not be copied into the workers mid-use
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                outcomes = list(executor.map(_reextract_snapshot, *zip(*jobs), chunksize=16))
+
+        results = []
+        for snapshot, outcome in zip(snapshots, outcomes):
+            results.append({
+                'snapshot_id': snapshot.snapshot_id,
+                'url': snapshot.url,
+                'platform': snapshot.platform,
+                'fetched_at': snapshot.fetched_at,
+                **outcome,
+            })
+        failed = sum(1 for r in results if r['error'])
+        logger.info(f"Re-extracted {len(results)} snapshots in {time.time() - start_time:.1f}s ({failed} failed)")
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get archive size and compression statistics"""
+        with self._lock:
+            self._ensure_loaded()
+            snapshots = list(self._snapshots)
+        blobs = {s.content_hash: s for s in snapshots}
+        return {
+            'enabled': settings.SNAPSHOT_ARCHIVE_ENABLED,
+            'codec': self.codec,
+            'snapshots': len(snapshots),
+            'unique_documents': len(blobs),
+            'raw_bytes': sum(s.size for s in blobs.values()),
+            'stored_bytes': sum(s.stored_size for s in blobs.values()),
+            'compression_ratio': round(self.bytes_in / self.bytes_stored, 2) if self.bytes_stored else None,
+        }
+
+
+# Global snapshot archive instance
+snapshot_archive = SnapshotArchive()
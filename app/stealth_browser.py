@@ -1,12 +1,107 @@
+import asyncio
 import random
+import re
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple
 from playwright.async_api import Page, BrowserContext
+from app.config import settings
 from app.logging_config import get_logger
 
 logger = get_logger(__name__)
 
 
+# Evasions as (browser types they apply to, source). Each runs in its own
+# try block so a page that already defines a property does not stop the rest.
+STEALTH_EVASIONS: List[Tuple[Tuple[str, ...], str]] = [
+    # Remove webdriver property
+    (('chromium', 'firefox', 'webkit'), """
+        Object.defineProperty(Navigator.prototype, 'webdriver', {
+            get: () => undefined,
+            configurable: true
+        });
+    """),
+    # Report the notification permission consistently with Notification.permission
+    (('chromium', 'firefox', 'webkit'), """
+        const originalQuery = window.navigator.permissions && window.navigator.permissions.query;
+        if (originalQuery) {
+            window.navigator.permissions.query = (parameters) => (
+                parameters && parameters.name === 'notifications' ?
+                    Promise.resolve({ state: Notification.permission }) :
+                    originalQuery.call(window.navigator.permissions, parameters)
+            );
+        }
+    """),
+    # Headless Chromium has no plugins
+    (('chromium',), """
+        Object.defineProperty(navigator, 'plugins', {
+            get: () => [1, 2, 3, 4, 5],
+        });
+    """),
+    # Match the context locale
+    (('chromium', 'firefox', 'webkit'), """
+        Object.defineProperty(navigator, 'languages', {
+            get: () => ['en-US', 'en'],
+        });
+    """),
+    # window.chrome exists in desktop Chrome only
+    (('chromium',), """
+        if (!window.chrome) {
+            window.chrome = { runtime: {} };
+        }
+    """),
+    # Report a common GPU instead of SwiftShader
+    (('chromium', 'firefox', 'webkit'), """
+        const patchGetParameter = (proto) => {
+            const getParameter = proto.getParameter;
+            proto.getParameter = function(parameter) {
+                if (parameter === 37445) {
+                    return 'Intel Inc.';
+                }
+                if (parameter === 37446) {
+                    return 'Intel(R) Iris(TM) Graphics 6100';
+                }
+                return getParameter.apply(this, arguments);
+            };
+        };
+        patchGetParameter(WebGLRenderingContext.prototype);
+        if (window.WebGL2RenderingContext) {
+            patchGetParameter(WebGL2RenderingContext.prototype);
+        }
+    """),
+]
+
+# String literals are kept verbatim when the bundle is compacted
+_JS_STRING_RE = re.compile(r"""('(?:\\.|[^'\\])*'|"(?:\\.|[^"\\])*"|`(?:\\.|[^`\\])*`)""")
+_JS_COMMENT_RE = re.compile(r"(?m)^\s*//[^\n]*$")
+_JS_LINE_BREAK_RE = re.compile(r"[ \t]*\n\s*")
+
+# Init scripts already built, per browser type
+_init_scripts: Dict[str, str] = {}
+
+
+def compact_js(source: str) -> str:
+    """Drop indentation, blank lines and whole-line comments outside string literals (line breaks are kept)"""
+    parts = _JS_STRING_RE.split(source)
+    for i in range(0, len(parts), 2):
+        code = _JS_COMMENT_RE.sub('', parts[i])
+        parts[i] = _JS_LINE_BREAK_RE.sub('\n', code)
+    return ''.join(parts).strip()
+
+
+def build_stealth_bundle(browser_name: str = 'chromium') -> str:
+    """
+    Build one init script with every evasion that applies to a browser type
+    
+    Args:
+        browser_name: Playwright browser type (chromium, firefox or webkit)
+        
+    Returns:
+        JavaScript source
+    """
+    blocks = [f"try {{\n{source}\n}} catch (e) {{}}" for engines, source in STEALTH_EVASIONS if browser_name in engines]
+    return compact_js("(() => {\n" + "\n".join(blocks) + "\n})();")
+
+
 class StealthBrowser:
     """Advanced stealth browser configuration to avoid bot detection"""
     
@@ -104,229 +199,60 @@ class StealthBrowser:
             '--disable-features=VizDisplayCompositor',
         ]
     
+    @classmethod
+    def get_init_script(cls, browser_name: str = 'chromium') -> str:
+        """
+        Get the stealth init script for a browser type (built once per type)
+        
+        Args:
+            browser_name: Playwright browser type (chromium, firefox or webkit)
+            
+        Returns:
+            JavaScript source to register with add_init_script
+        """
+        if browser_name not in _init_scripts:
+            _init_scripts[browser_name] = build_stealth_bundle(browser_name)
+            logger.info(f"Built {browser_name} stealth init script ({len(_init_scripts[browser_name])} bytes)")
+        return _init_scripts[browser_name]
+    
     @staticmethod
     async def setup_stealth_page(page: Page, user_agent: str, domain: str = None) -> None:
-        """Setup page with stealth features"""
+        """Setup a page that was not created from a stealth context (single init script call)"""
         try:
-            # Set realistic viewport
-            viewports = [
-                {'width': 1920, 'height': 1080},
-                {'width': 1366, 'height': 768},
-                {'width': 1440, 'height': 900},
-                {'width': 1536, 'height': 864},
-                {'width': 1280, 'height': 720},
-            ]
-            viewport = random.choice(viewports)
-            await page.set_viewport_size(viewport)
-            
-            # Set user agent
-            await page.set_extra_http_headers({'User-Agent': user_agent})
-            
-            # Set additional headers for realism
-            await page.set_extra_http_headers({
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'DNT': '1',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Sec-Fetch-User': '?1',
-                'Cache-Control': 'max-age=0',
-            })
-            
-            # Inject stealth scripts
-            await StealthBrowser._inject_stealth_scripts(page)
-            
-            # Set timezone and locale
-            await StealthBrowser._set_timezone_and_locale(page)
-            
-            # Set geolocation (for European sites like bol.com)
-            if domain and any(eu_domain in domain.lower() for eu_domain in ['bol.com', 'amazon.de', 'amazon.fr', 'amazon.it', 'amazon.es', 'amazon.nl']):
-                await StealthBrowser._set_european_location(page)
-            
+            await page.add_init_script(script=StealthBrowser.get_init_script(page.context.browser.browser_type.name))
             logger.info(f"Stealth page setup completed for {domain or 'unknown domain'}")
-            
         except Exception as e:
             logger.error(f"Failed to setup stealth page: {e}")
     
     @staticmethod
-    async def _inject_stealth_scripts(page: Page) -> None:
-        """Inject JavaScript to hide automation indicators"""
-        stealth_scripts = [
-            # Remove webdriver property
-            """
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined,
-            });
-            """,
-            
-            # Override permissions
-            """
-            const originalQuery = window.navigator.permissions.query;
-            window.navigator.permissions.query = (parameters) => (
-                parameters.name === 'notifications' ?
-                    Promise.resolve({ state: Notification.permission }) :
-                    originalQuery(parameters)
-            );
-            """,
-            
-            # Override plugins
-            """
-            Object.defineProperty(navigator, 'plugins', {
-                get: () => [1, 2, 3, 4, 5],
-            });
-            """,
-            
-            # Override languages
-            """
-            Object.defineProperty(navigator, 'languages', {
-                get: () => ['en-US', 'en'],
-            });
-            """,
-            
-            # Override chrome
-            """
-            window.chrome = {
-                runtime: {},
-            };
-            """,
-            
-            # Override permissions
-            """
-            const originalQuery = window.navigator.permissions.query;
-            return originalQuery = (parameters) => (
-                parameters.name === 'notifications' ?
-                    Promise.resolve({ state: Notification.permission }) :
-                    originalQuery(parameters)
-            );
-            """,
-            
-            # Override webgl
-            """
-            const getParameter = WebGLRenderingContext.prototype.getParameter;
-            WebGLRenderingContext.prototype.getParameter = function(parameter) {
-                if (parameter === 37445) {
-                    return 'Intel Inc.';
-                }
-                if (parameter === 37446) {
-                    return 'Intel(R) Iris(TM) Graphics 6100';
-                }
-                return getParameter.apply(this, arguments);
-            };
-            """,
-            
-            # Override canvas fingerprinting
-            """
-            const originalGetContext = HTMLCanvasElement.prototype.getContext;
-            HTMLCanvasElement.prototype.getContext = function(type, ...args) {
-                const context = originalGetContext.apply(this, [type, ...args]);
-                if (type === '2d') {
-                    const originalFillText = context.fillText;
-                    context.fillText = function(...args) {
-                        return originalFillText.apply(this, args);
-                    };
-                }
-                return context;
-            };
-            """,
-        ]
+    async def simulate_human_behavior(page: Page, budget_ms: Optional[int] = None) -> None:
+        """
+        Simulate a little human input (mouse path and a wheel scroll) within a hard budget
         
-        for script in stealth_scripts:
-            try:
-                await page.add_init_script(script)
-            except Exception as e:
-                logger.warning(f"Failed to inject stealth script: {e}")
-    
-    @staticmethod
-    async def _set_timezone_and_locale(page: Page) -> None:
-        """Set realistic timezone and locale"""
-        try:
-            # Set timezone to a common European timezone
-            await page.add_init_script("""
-                Object.defineProperty(Intl, 'DateTimeFormat', {
-                    get: function() {
-                        return function(locale, options) {
-                            if (options && options.timeZone) {
-                                return new Intl.DateTimeFormat(locale, options);
-                            }
-                            return new Intl.DateTimeFormat(locale, { timeZone: 'Europe/Amsterdam' });
-                        };
-                    }
-                });
-            """)
-        except Exception as e:
-            logger.warning(f"Failed to set timezone: {e}")
-    
-    @staticmethod
-    async def _set_european_location(page: Page) -> None:
-        """Set European geolocation for European sites (DISABLED)"""
+        Args:
+            page: Playwright page object
+            budget_ms: Time budget in milliseconds (uses STEALTH_HUMAN_BUDGET_MS if None)
+        """
+        if budget_ms is None:
+            budget_ms = settings.STEALTH_HUMAN_BUDGET_MS
+        if budget_ms <= 0:
+            return
+        
+        start_time = time.time()
+        viewport = page.viewport_size or {'width': 1280, 'height': 720}
         try:
-            # Geolocation is disabled for privacy - no location data will be set
-            logger.info("Geolocation disabled for privacy protection")
+            async with asyncio.timeout(budget_ms / 1000.0):
+                # Interpolated moves are sent as one call each, not one per step
+                for _ in range(2):
+                    x = random.randint(100, max(101, viewport['width'] - 100))
+                    y = random.randint(100, max(101, viewport['height'] - 100))
+                    await page.mouse.move(x, y, steps=random.randint(5, 12))
+                await page.mouse.wheel(0, random.randint(100, 300))
+        except TimeoutError:
             pass
-        except Exception as e:
-            logger.warning(f"Failed to set geolocation: {e}")
-    
-    @staticmethod
-    async def simulate_human_behavior(page: Page) -> None:
-        """Simulate human-like behavior"""
-        try:
-            # Random mouse movements
-            await StealthBrowser._random_mouse_movements(page)
-            
-            # Random scrolling
-            await StealthBrowser._random_scrolling(page)
-            
-            # Random delays
-            await StealthBrowser._random_delays(page)
-            
         except Exception as e:
             logger.warning(f"Failed to simulate human behavior: {e}")
-    
-    @staticmethod
-    async def _random_mouse_movements(page: Page) -> None:
-        """Simulate random mouse movements"""
-        try:
-            # Get page dimensions
-            viewport = page.viewport_size
-            if not viewport:
-                return
-            
-            # Generate 3-7 random mouse movements
-            num_movements = random.randint(3, 7)
-            for _ in range(num_movements):
-                x = random.randint(100, viewport['width'] - 100)
-                y = random.randint(100, viewport['height'] - 100)
-                await page.mouse.move(x, y)
-                await page.wait_for_timeout(random.randint(100, 300))
-                
-        except Exception as e:
-            logger.warning(f"Failed to simulate mouse movements: {e}")
-    
-    @staticmethod
-    async def _random_scrolling(page: Page) -> None:
-        """Simulate random scrolling behavior"""
-        try:
-            # Scroll down a bit
-            await page.evaluate("window.scrollBy(0, Math.random() * 200 + 100)")
-            await page.wait_for_timeout(random.randint(500, 1500))
-            
-            # Sometimes scroll back up
-            if random.random() < 0.3:
-                await page.evaluate("window.scrollBy(0, -Math.random() * 100 - 50)")
-                await page.wait_for_timeout(random.randint(300, 800))
-                
-        except Exception as e:
-            logger.warning(f"Failed to simulate scrolling: {e}")
-    
-    @staticmethod
-    async def _random_delays(page: Page) -> None:
-        """Add random delays to simulate human behavior"""
-        delay = random.randint(500, 2000)
-        await page.wait_for_timeout(delay)
+        logger.debug(f"Human behavior simulation took {(time.time() - start_time) * 1000:.0f}ms")
     
     @staticmethod
     def get_stealth_context_options() -> Dict[str, Any]:
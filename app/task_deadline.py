@@ -0,0 +1,252 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any
+from app.config import settings
+from app.logging_config import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Seconds a cancellation of a not-yet-started task is remembered
+PENDING_CANCEL_TTL = 3600
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a scraping task runs out of its time budget"""
+
+
+class TaskCancelled(Exception):
+    """Raised when a scraping task was cancelled through the API"""
+
+
+class Deadline:
+    """
+    Time budget of one scraping task.
+
+    The whole pipeline (fetch, captcha solving, extraction, category detection,
+    save) runs inside scope(); each step runs inside stage(), which can cap its
+    own share of the remaining budget. When the budget runs out or the task is
+    cancelled, the asyncio task is interrupted at its current await, so open
+    pages and the browser context are released right away instead of after
+    Playwright's own timeouts.
+    """
+
+    def __init__(self, task_id: str, budget_seconds: float):
+        self.task_id = task_id
+        self.budget = budget_seconds
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget_seconds
+        self.stage_name: Optional[str] = None
+        self.cancelled = False
+        self.protected = False
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._timeout: Optional[asyncio.Timeout] = None
+
+    def remaining(self) -> float:
+        """Seconds left in the budget (never negative)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def remaining_ms(self, cap_ms: Optional[int] = None) -> int:
+        """
+        Remaining budget in milliseconds, for Playwright/HTTP timeouts
+
+        Args:
+            cap_ms: Upper bound (e.g. the configured timeout of the operation)
+
+        Returns:
+            Milliseconds left, at least 1
+        """
+        remaining = int(self.remaining() * 1000)
+        if cap_ms is not None:
+            remaining = min(remaining, cap_ms)
+        return max(1, remaining)
+
+    def check(self, stage: Optional[str] = None):
+        """
+        Raise if the task was cancelled or its budget is used up
+
+        Args:
+            stage: Stage about to start (used in the error message)
+        """
+        if self.cancelled:
+            raise TaskCancelled(f"Task {self.task_id} was cancelled")
+        if self.remaining() <= 0:
+            raise DeadlineExceeded(f"Task deadline of {self.budget:.0f}s exceeded before {stage or self.stage_name or 'completion'}")
+
+    @asynccontextmanager
+    async def scope(self):
+        """Run the task's pipeline under the overall budget (enter once, on the task's own asyncio task)"""
+        self._task = asyncio.current_task()
+        self._loop = asyncio.get_running_loop()
+        self.check()
+        try:
+            async with asyncio.timeout_at(self._loop.time() + self.remaining()) as self._timeout:
+                yield self
+        except TimeoutError:
+            if not self._timeout.expired():
+                raise
+            raise DeadlineExceeded(f"Task deadline of {self.budget:.0f}s exceeded during {self.stage_name or 'scraping'}") from None
+        except asyncio.CancelledError:
+            if self.cancelled:
+                self._task.uncancel()
+                raise TaskCancelled(f"Task {self.task_id} was cancelled during {self.stage_name or 'scraping'}") from None
+            raise
+        finally:
+            # Cleanup after the scope must not be interrupted by a late cancel
+            self._task = None
+
+    @asynccontextmanager
+    async def stage(self, name: str, cap_seconds: Optional[float] = None):
+        """
+        Run one pipeline stage, optionally capped below the remaining budget
+
+        Args:
+            name: Stage name (shown in timeout errors)
+            cap_seconds: Maximum seconds this stage may take
+        """
+        self.check(name)
+        self.stage_name = name
+        if cap_seconds is None or cap_seconds >= self.remaining():
+            yield self
+            return
+        timeout = asyncio.timeout(cap_seconds)
+        try:
+            async with timeout:
+                yield self
+        except TimeoutError:
+            if not timeout.expired():
+                raise
+            raise DeadlineExceeded(f"{name} timed out after {cap_seconds:.0f}s") from None
+
+    @asynccontextmanager
+    async def protect(self, name: str):
+        """
+        Run a stage that must not be interrupted halfway (e.g. the database save).
+        The overall timer is suspended; the stage bounds its own calls with remaining_ms().
+
+        Args:
+            name: Stage name
+        """
+        self.check(name)
+        self.stage_name = name
+        self.protected = True
+        if self._timeout is not None:
+            self._timeout.reschedule(None)
+        try:
+            yield self
+        finally:
+            self.protected = False
+
+    def cancel(self) -> bool:
+        """
+        Cancel the task (thread-safe)
+
+        Returns:
+            False if the task is already in a protected stage and will finish
+        """
+        if self.protected:
+            return False
+        self.cancelled = True
+        if self._task is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._interrupt)
+        return True
+
+    def _interrupt(self):
+        if self._task is not None and not self._task.done() and not self.protected:
+            self._task.cancel()
+
+
+# Deadline of the scraping task running in the current asyncio task
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar('task_deadline', default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Get the deadline of the current scraping task (also visible in asyncio.to_thread workers)"""
+    return _current_deadline.get()
+
+
+class DeadlineRegistry:
+    """Tracks the deadlines of running scraping tasks so the API can cancel them"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._deadlines: Dict[str, Deadline] = {}
+        self._pending_cancels: Dict[str, float] = {}
+        self.stats = {'started': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'deadline_exceeded': 0}
+
+    def start(self, task_id: str, budget_seconds: Optional[float] = None) -> Deadline:
+        """
+        Start the deadline of a task and make it current for this asyncio task
+
+        Args:
+            task_id: Task ID
+            budget_seconds: Time budget (uses SCRAPE_TASK_TIMEOUT if None)
+
+        Returns:
+            The task's Deadline
+        """
+        deadline = Deadline(task_id, budget_seconds or settings.SCRAPE_TASK_TIMEOUT)
+        with self._lock:
+            # Cancelled while still queued for a pool slot
+            if self._pending_cancels.pop(task_id, None) is not None:
+                deadline.cancelled = True
+            self._deadlines[task_id] = deadline
+            self.stats['started'] += 1
+        _current_deadline.set(deadline)
+        return deadline
+
+    def finish(self, task_id: str, outcome: str = 'completed'):
+        """
+        Forget a finished task
+
+        Args:
+            task_id: Task ID
+            outcome: completed, failed, cancelled or deadline_exceeded
+        """
+        with self._lock:
+            self._deadlines.pop(task_id, None)
+            if outcome in self.stats:
+                self.stats[outcome] += 1
+        _current_deadline.set(None)
+
+    def cancel(self, task_id: str) -> bool:
+        """
+        Cancel a running or queued task (thread-safe)
+
+        Args:
+            task_id: Task ID
+
+        Returns:
+            False if the task is already saving its result and can no longer be cancelled
+        """
+        with self._lock:
+            deadline = self._deadlines.get(task_id)
+            if deadline is None:
+                now = time.time()
+                self._pending_cancels = {k: t for k, t in self._pending_cancels.items() if now - t < PENDING_CANCEL_TTL}
+                self._pending_cancels[task_id] = now
+                return True
+        cancelled = deadline.cancel()
+        if cancelled:
+            logger.info(f"Cancelling task {task_id} during {deadline.stage_name or 'startup'}")
+        return cancelled
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get counts of running, cancelled and timed-out tasks"""
+        with self._lock:
+            running = {task_id: {'stage': d.stage_name, 'remaining_seconds': round(d.remaining(), 1)}
+                       for task_id, d in self._deadlines.items()}
+        return {
+            'budget_seconds': settings.SCRAPE_TASK_TIMEOUT,
+            'running': running,
+            **self.stats,
+        }
+
+
+# Global task deadline registry
+task_deadlines = DeadlineRegistry()
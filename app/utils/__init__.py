@@ -19,6 +19,7 @@ from .currency_utils import (
     map_currency_symbol_to_code,
     _get_default_currency_by_domain
 )
+from .parsed_document import ParsedDocument
 from .structured_data import StructuredDataExtractor
 from .task_management import (
     TaskType,
@@ -46,6 +47,7 @@ __all__ = [
     'DecodoProxyManager', 
     'UserAgentManager',
     'StructuredDataExtractor',
+    'ParsedDocument',
     'TaskType',
     'TaskStatus',
     'TaskPriority',
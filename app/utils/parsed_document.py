@@ -0,0 +1,126 @@
+import re
+from typing import Optional, List, Dict, Union
+from bs4 import BeautifulSoup
+from app.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+# Script ids of Shopify-style product JSON blocks
+PRODUCT_JSON_ID = re.compile(r'(ProductJson-.*|WH-ProductJson-.*)')
+
+
+class ParsedDocument:
+    """
+    The HTML of one fetch, parsed once and shared by the extractor and its helpers.
+
+    The BeautifulSoup tree is built on first use and the indexes most helpers scan
+    for (script tags, inline script texts, script sources, meta tags, JSON-LD and
+    ProductJson blocks) are built once from it. Consumers only read the tree; the
+    indexes hold strings, so each consumer parses JSON into its own objects.
+    """
+
+    def __init__(self, html_content: str, url: str = ''):
+        """
+        Initialize with HTML content (parsing is deferred until the tree is needed)
+
+        Args:
+            html_content: Raw HTML content from the page
+            url: Original URL that was scraped
+        """
+        self.html_content = html_content
+        self.url = url
+        self._soup: Optional[BeautifulSoup] = None
+        self._scripts = None
+        self._meta: Optional[Dict[str, List[str]]] = None
+
+    @classmethod
+    def of(cls, document: Union[str, 'ParsedDocument'], url: str = '') -> 'ParsedDocument':
+        """
+        Get the parsed document for HTML that may already have been parsed
+
+        Args:
+            document: Raw HTML or the ParsedDocument of the fetch
+            url: Original URL that was scraped
+
+        Returns:
+            The given ParsedDocument, or a new one for raw HTML
+        """
+        if isinstance(document, ParsedDocument):
+            return document
+        return cls(document or '', url)
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        """Parsed tree of the document"""
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.html_content, 'html.parser')
+        return self._soup
+
+    @property
+    def scripts(self) -> list:
+        """All <script> tags, in document order"""
+        if self._scripts is None:
+            self._scripts = self.soup.find_all('script')
+        return self._scripts
+
+    @property
+    def inline_scripts(self) -> List[str]:
+        """Text of every script tag that has any"""
+        return [script.string for script in self.scripts if script.string]
+
+    @property
+    def script_srcs(self) -> List[str]:
+        """src attribute of every external script"""
+        return [script['src'] for script in self.scripts if script.get('src')]
+
+    @property
+    def json_ld_blocks(self) -> List[str]:
+        """Text of every application/ld+json script"""
+        return [script.string for script in self.scripts if script.get('type') == 'application/ld+json' and script.string]
+
+    @property
+    def product_json_blocks(self) -> List[str]:
+        """Text of every ProductJson-* script"""
+        return [script.string for script in self.scripts if PRODUCT_JSON_ID.search(script.get('id') or '') and script.string]
+
+    def scripts_matching(self, pattern: Union[str, re.Pattern]) -> List[str]:
+        """
+        Inline script texts that contain a regex match
+
+        Args:
+            pattern: Regex (string or compiled)
+        """
+        regex = re.compile(pattern) if isinstance(pattern, str) else pattern
+        return [text for text in self.inline_scripts if regex.search(text)]
+
+    def meta_values(self, key: str) -> List[str]:
+        """
+        Non-empty contents of the meta tags with a name, property or itemprop
+
+        Args:
+            key: e.g. "og:image", "description", "product:price:amount"
+        """
+        if self._meta is None:
+            self._meta = {}
+            for tag in self.soup.find_all('meta'):
+                content = tag.get('content')
+                if not content:
+                    continue
+                for attr in ('property', 'name', 'itemprop'):
+                    if tag.get(attr):
+                        self._meta.setdefault(tag[attr], []).append(content)
+        return self._meta.get(key, [])
+
+    def meta(self, *keys: str) -> Optional[str]:
+        """
+        Content of the first meta tag for the first key that has one
+
+        Args:
+            keys: Meta names/properties in order of preference
+        """
+        for key in keys:
+            values = self.meta_values(key)
+            if values:
+                return values[0]
+        return None
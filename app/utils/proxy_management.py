@@ -38,6 +38,20 @@ class DecodoProxyManager:
         logger.info(f"Using Decodo proxy: {self.proxy_endpoint}")
         return proxy_url
     
+    def get_session_proxy(self, session_id: str) -> str:
+        """
+        Get a sticky-session proxy URL that keeps its exit IP between requests
+        
+        Args:
+            session_id: Session name (each session gets its own exit IP)
+            
+        Returns:
+            Proxy URL with the session encoded in the username (DECODO_SESSION_USERNAME_FORMAT)
+        """
+        username = settings.DECODO_SESSION_USERNAME_FORMAT.format(username=self.username, session=session_id)
+        scheme = "socks5" if self.proxy_type == "socks5" else "http"
+        return f"{scheme}://{username}:{self.password}@{self.proxy_endpoint}"
+    
     def rotate_proxy(self) -> Optional[str]:
         """Rotate to a new proxy session"""
         if self.proxy_rotation_attempts >= self.max_rotation_attempts:
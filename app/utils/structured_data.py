@@ -1,8 +1,7 @@
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Union
 import json
-import re
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
+from app.utils.parsed_document import ParsedDocument
 from app.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -11,17 +10,17 @@ logger = get_logger(__name__)
 class StructuredDataExtractor:
     """Utility class for extracting structured data (JSON-LD) from HTML content"""
     
-    def __init__(self, html_content: str, url: str):
+    def __init__(self, html_content: Union[str, ParsedDocument], url: str):
         """
         Initialize with HTML content
         
         Args:
-            html_content: Raw HTML content from the page
+            html_content: Raw HTML content from the page, or its ParsedDocument (shared, not re-parsed)
             url: Original URL that was scraped
         """
-        self.html_content = html_content
+        self.document = ParsedDocument.of(html_content, url)
+        self.html_content = self.document.html_content
         self.url = url
-        self.soup = BeautifulSoup(html_content, 'html.parser')
     
     def extract_structured_product_data(self) -> Optional[dict]:
         """
@@ -34,22 +33,20 @@ class StructuredDataExtractor:
             all_product_data = []
             
             # Method 1: Look for ProductJson script tags (common in e-commerce platforms)
-            product_json_scripts = self.soup.find_all('script', id=re.compile(r'(ProductJson-.*|WH-ProductJson-.*)'))
-            for script in product_json_scripts:
-                if script.string:
+            for block in self.document.product_json_blocks:
+                if block:
                     try:
-                        data = json.loads(script.string)
+                        data = json.loads(block)
                         if isinstance(data, dict) and ('title' in data or 'variants' in data):
                             all_product_data.append(('ProductJson', data))
                     except json.JSONDecodeError:
                         continue
             
             # Method 2: Look for JSON-LD structured data (application/ld+json)
-            json_ld_scripts = self.soup.find_all('script', type='application/ld+json')
-            for script in json_ld_scripts:
-                if script.string:
+            for block in self.document.json_ld_blocks:
+                if block:
                     try:
-                        data = json.loads(script.string)
+                        data = json.loads(block)
                         # Process the JSON-LD data (handles @graph, arrays, and single objects)
                         processed_data = self._process_json_ld_data(data)
                         all_product_data.extend(processed_data)
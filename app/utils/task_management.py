@@ -981,6 +981,11 @@ def fail_task(task_id: str, error_message: str, retry: bool = False) -> bool:
     return task_manager.fail_task(task_id, error_message, retry)
 
 
+def cancel_task(task_id: str) -> bool:
+    """Cancel a task"""
+    return task_manager.cancel_task(task_id)
+
+
 def get_task_status(task_id: str) -> Optional[Task]:
     """Get task status"""
     return task_manager.get_task_status(task_id)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Re-run product extraction over archived page snapshots (no proxies or browsers needed)
+
+Examples:
+    python reextract_snapshots.py --platform amazon
+    python reextract_snapshots.py --url https://www.ebay.com/itm/123 --all-versions
+    python reextract_snapshots.py --since 2025-01-01 --output results.jsonl
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime
+
+from app.snapshot_archive import snapshot_archive
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Re-extract products from archived HTML snapshots")
+    parser.add_argument('--url', help="Only snapshots of this URL")
+    parser.add_argument('--platform', help="Only snapshots of this platform (e.g. amazon, shopify)")
+    parser.add_argument('--since', help="Only snapshots fetched on or after this date (YYYY-MM-DD)")
+    parser.add_argument('--limit', type=int, help="Maximum number of snapshots")
+    parser.add_argument('--all-versions', action='store_true', help="Re-extract every snapshot, not just the newest per URL")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument('--output', help="Write results as JSON lines to this file instead of stdout")
+    parser.add_argument('--list', action='store_true', help="Only list matching snapshots")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    since = datetime.strptime(args.since, '%Y-%m-%d').timestamp() if args.since else None
+
+    snapshots = snapshot_archive.find(
+        url=args.url,
+        platform=args.platform,
+        since=since,
+        latest_only=not args.all_versions,
+        limit=args.limit
+    )
+    if not snapshots:
+        print("No matching snapshots found", file=sys.stderr)
+        return 1
+
+    if args.list:
+        for snapshot in snapshots:
+            fetched_at = datetime.fromtimestamp(snapshot.fetched_at).isoformat(timespec='seconds')
+            print(f"{snapshot.snapshot_id}  {fetched_at}  {snapshot.platform or 'unknown':<12} {snapshot.url}")
+        return 0
+
+    print(f"Re-extracting {len(snapshots)} snapshots...", file=sys.stderr)
+    results = snapshot_archive.reextract(snapshots, workers=args.workers)
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for result in results:
+            output.write(json.dumps(result, ensure_ascii=False, default=str) + '\n')
+    finally:
+        if args.output:
+            output.close()
+
+    failed = sum(1 for r in results if r['error'])
+    print(f"Done: {len(results) - failed} succeeded, {failed} failed", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+from app.domain_scheduler import DomainScheduler, DomainState
+
+
+LIMITS = {'concurrency': 10, 'min_interval': 0.2, 'rate': 5.0, 'burst': 2}
+
+
+def _next_delay(state: DomainState) -> float:
+    return state.reserve_start() - time.monotonic()
+
+
+def _run_burst(waiter_count: int, cancel_waiters: bool) -> float:
+    """Send two requests, queue waiters behind them, optionally cancel them, and return the next request's delay"""
+
+    async def scenario() -> float:
+        scheduler = DomainScheduler()
+        state = DomainState('example.com', LIMITS)
+        scheduler._domains['example.com'] = state
+        release = asyncio.Event()
+
+        async def fetch():
+            async with scheduler.slot('https://example.com/product'):
+                await release.wait()
+
+        sent = [asyncio.create_task(fetch()) for _ in range(2)]
+        await asyncio.sleep(0.25)
+        waiters = [asyncio.create_task(fetch()) for _ in range(waiter_count)]
+        await asyncio.sleep(0)
+        if cancel_waiters:
+            for waiter in waiters:
+                waiter.cancel()
+            await asyncio.gather(*waiters, return_exceptions=True)
+
+        delay = _next_delay(state)
+        for waiter in waiters:
+            waiter.cancel()
+        release.set()
+        await asyncio.gather(*sent, *waiters, return_exceptions=True)
+        return delay
+
+    return asyncio.run(scenario())
+
+
+def test_cancelled_waiters_do_not_delay_next_request():
+    baseline = _run_burst(0, cancel_waiters=False)
+
+    assert abs(_run_burst(3, cancel_waiters=True) - baseline) < 0.05
+    assert _run_burst(3, cancel_waiters=False) > baseline + 0.5
+
+
+def test_refund_of_earlier_reservation_pulls_queue_back_one_interval():
+    state = DomainState('example.com', LIMITS)
+    first = state.reserve_start()
+    state.reserve_start()
+    end = state.next_start
+
+    state.refund_start(first)
+
+    assert abs(state.next_start - (end - LIMITS['min_interval'])) < 1e-9
+    assert 1 <= state.tokens < 1.1